@@ -10,6 +10,9 @@ except PackageNotFoundError:
     __version__ = "0.0.0"
 
 __all__: list[str] = [
+    "archive",
+    "asyncresolve",
+    "circuit",
     "cli",
     "config",
     "exceptions",
@@ -18,9 +21,18 @@ __all__: list[str] = [
     "github",
     "gitlab",
     "http",
+    "httpcache",
+    "lexer",
     "markdown",
     "models",
+    "patterns",
+    "ratelimit",
     "report",
+    "resolvecache",
+    "scanindex",
     "scanner",
+    "smarthttp",
+    "sourcetable",
     "updater",
+    "watch",
 ]
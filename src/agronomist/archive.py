@@ -0,0 +1,105 @@
+"""Read infrastructure code straight from tar and zip archives.
+
+Lets the scanner treat a release bundle (``.tar``, ``.tar.gz``,
+``.tgz``, ``.tar.bz2``, ``.tar.xz`` or ``.zip``) like a directory
+without extracting it. Tar archives are read as a stream, member
+by member, so compressed bundles are never seeked or held in
+memory; zip archives are read through their central directory.
+Only the members selected by the caller are read, one at a time,
+so memory use is bounded by the largest selected member rather
+than by the archive size.
+"""
+
+from __future__ import annotations
+
+import os
+import tarfile
+import zipfile
+from collections.abc import Callable, Iterator
+
+from .exceptions import ScanError
+
+# File name suffixes recognised as archives, matched
+# case-insensitively against ``--root``.
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ZIP_SUFFIXES = (".zip",)
+
+
+def is_archive(path: str) -> bool:
+    """Return True if *path* is a regular file with an archive suffix.
+
+    Parameters:
+        path: Candidate scan root.
+
+    Returns:
+        True when :func:`iter_archive_members` can read *path*.
+    """
+    return path.lower().endswith(TAR_SUFFIXES + ZIP_SUFFIXES) and os.path.isfile(path)
+
+
+def _iter_tar(path: str, wanted: Callable[[str], bool]) -> Iterator[tuple[str, bytes]]:
+    """Stream the wanted regular files of a tar archive.
+
+    Parameters:
+        path: The archive file.
+        wanted: Called with each member name; members for which
+            it returns False are skipped without being read.
+
+    Yields:
+        ``(member name, content)`` pairs in archive order.
+    """
+    # ``r|*`` reads sequentially with transparent decompression;
+    # skipped members are consumed without being buffered.
+    with tarfile.open(path, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile() or not wanted(member.name):
+                continue
+            handle = archive.extractfile(member)
+            if handle is not None:
+                yield member.name, handle.read()
+
+
+def _iter_zip(path: str, wanted: Callable[[str], bool]) -> Iterator[tuple[str, bytes]]:
+    """Read the wanted regular files of a zip archive.
+
+    Parameters:
+        path: The archive file.
+        wanted: Called with each member name; members for which
+            it returns False are skipped without being read.
+
+    Yields:
+        ``(member name, content)`` pairs in archive order.
+    """
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not wanted(info.filename):
+                continue
+            yield info.filename, archive.read(info)
+
+
+def iter_archive_members(
+    path: str,
+    wanted: Callable[[str], bool],
+) -> Iterator[tuple[str, bytes]]:
+    """Yield the content of selected files in a tar or zip archive.
+
+    Directories, links and special files are skipped. Member
+    names are returned as stored (``/``-separated, possibly with
+    a ``./`` prefix); callers normalize them.
+
+    Parameters:
+        path: The archive file (see :func:`is_archive`).
+        wanted: Called with each member name; members for which
+            it returns False are skipped without being read.
+
+    Yields:
+        ``(member name, content)`` pairs in archive order.
+
+    Raises:
+        ScanError: If the archive cannot be opened or is corrupt.
+    """
+    reader = _iter_zip if path.lower().endswith(ZIP_SUFFIXES) else _iter_tar
+    try:
+        yield from reader(path, wanted)
+    except (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile) as exc:
+        raise ScanError(f"Cannot read archive {path}: {exc}") from exc
@@ -0,0 +1,133 @@
+"""asyncio engine for resolving many repositories at once.
+
+The thread-pool engine in :func:`agronomist.cli._collect_updates`
+holds one thread per lookup in flight, so ``--workers`` bounds the
+concurrency. This engine runs every lookup as a coroutine instead:
+``git ls-remote`` calls are asyncio subprocesses, so hundreds of
+them can wait on the network at once, while the blocking GitHub
+and GitLab clients run on a thread pool as large as the total
+limit. Lookups are limited per host, so a single server is never
+flooded, and in total.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+from collections.abc import Awaitable, Callable, Mapping
+
+from .models import SourceRef
+
+logger = logging.getLogger(__name__)
+
+# Lookups in flight at once, across all hosts.
+DEFAULT_MAX_IN_FLIGHT = 256
+
+# Lookups in flight at once against one host.
+DEFAULT_HOST_CONCURRENCY = 32
+
+
+class HostLimiter:
+    """Per-host semaphores, created on first use.
+
+    Must be used from within one running event loop.
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_HOST_CONCURRENCY,
+        host_limits: Mapping[str, int] | None = None,
+    ) -> None:
+        """Create the limiter.
+
+        Parameters:
+            limit: Lookups allowed in flight per host.
+            host_limits: Limits of specific hosts, keyed by
+                lower-case host name, overriding *limit*.
+        """
+        self.limit = max(1, limit)
+        self.host_limits = dict(host_limits or {})
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, host: str) -> asyncio.Semaphore:
+        """Return the semaphore of *host*.
+
+        Parameters:
+            host: Repository host, e.g. ``github.com``.
+
+        Returns:
+            The semaphore bounding lookups against *host*.
+        """
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            limit = self.host_limits.get(host.lower(), self.limit)
+            semaphore = self._semaphores[host] = asyncio.Semaphore(max(1, limit))
+        return semaphore
+
+
+async def _resolve_all(
+    sources: Mapping[str, SourceRef],
+    latest_ref: Callable[[SourceRef], Awaitable[str | None]],
+    max_in_flight: int,
+    host_concurrency: int,
+    host_limits: Mapping[str, int] | None,
+) -> dict[str, str | None]:
+    """Coroutine behind :func:`resolve_repos`."""
+    loop = asyncio.get_running_loop()
+    # Runs the blocking API calls made through ``asyncio.to_thread``.
+    # Each lookup holds at most one thread, so sizing the pool to the
+    # total limit lets every lookup in flight make its call at once.
+    loop.set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, max_in_flight),
+            thread_name_prefix="agronomist-resolve",
+        )
+    )
+    total = asyncio.Semaphore(max(1, max_in_flight))
+    per_host = HostLimiter(host_concurrency, host_limits)
+
+    async def _one(repo: str, source: SourceRef) -> str | None:
+        """Resolve one repository; failures resolve to None."""
+        async with total, per_host(source.repo_host):
+            try:
+                return await latest_ref(source)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Failed to resolve latest ref for %s: %s", repo, exc)
+                return None
+
+    results = await asyncio.gather(*(_one(repo, source) for repo, source in sources.items()))
+    return dict(zip(sources, results, strict=True))
+
+
+def resolve_repos(
+    sources: Mapping[str, SourceRef],
+    latest_ref: Callable[[SourceRef], Awaitable[str | None]],
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    host_concurrency: int = DEFAULT_HOST_CONCURRENCY,
+    host_limits: Mapping[str, int] | None = None,
+) -> dict[str, str | None]:
+    """Resolve the latest ref of every repository concurrently.
+
+    Runs a new event loop, so it must not be called from a
+    coroutine.
+
+    Parameters:
+        sources: One SourceRef per repository, keyed by repo.
+        latest_ref: Coroutine function resolving one SourceRef.
+            Blocking work inside it should go through
+            :func:`asyncio.to_thread`, which gets one thread per
+            lookup in flight.
+        max_in_flight: Lookups in flight at once, in total.
+        host_concurrency: Lookups in flight at once per
+            ``repo_host``.
+        host_limits: Per-host overrides of *host_concurrency*,
+            keyed by lower-case host name.
+
+    Returns:
+        The latest ref of every repository, None when it has no
+        tags or its lookup failed (failures are logged).
+    """
+    return asyncio.run(
+        _resolve_all(sources, latest_ref, max_in_flight, host_concurrency, host_limits)
+    )
@@ -0,0 +1,189 @@
+"""Per-host circuit breaker for resolver network calls.
+
+When a forge is down, every lookup against it waits for the full
+timeout, retries included, before the next resolver tries the same
+host again. :class:`CircuitBreaker` counts consecutive connection
+failures and timeouts per host; after ``threshold`` of them the
+host's circuit *opens* and further lookups fail at once with
+:class:`~agronomist.exceptions.CircuitOpenError`. Once ``cooldown``
+seconds have passed the circuit is *half-open*: a single trial
+lookup is let through, which closes the circuit on success and
+opens it again on failure.
+
+Any answer from the host, including an HTTP error status or a
+``git`` error about a missing repository, counts as a success:
+the breaker only tracks whether the host is reachable.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from .exceptions import CircuitOpenError
+from .models import TrippedHost
+
+logger = logging.getLogger(__name__)
+
+# Consecutive connection failures or timeouts that open a circuit.
+DEFAULT_FAILURE_THRESHOLD = 5
+
+# Seconds an open circuit waits before letting a trial lookup through.
+DEFAULT_COOLDOWN = 60.0
+
+
+@dataclass
+class _Circuit:
+    """Breaker state of one host.
+
+    Attributes:
+        failures: Consecutive failures since the last success.
+        open_until: Monotonic time at which an open circuit
+            becomes half-open; 0 while closed.
+        trial_started: Monotonic start of the half-open trial
+            in progress, if any.
+        trips: Number of times the circuit opened.
+        last_error: Description of the most recent failure.
+    """
+
+    failures: int = 0
+    open_until: float = 0.0
+    trial_started: float | None = None
+    trips: int = 0
+    last_error: str = ""
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker shared by every resolver.
+
+    Thread-safe; one instance should be shared by the HTTP
+    sessions and the git client of a run, so that a host found
+    unreachable by one resolver is skipped by the others too.
+    """
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown: float = DEFAULT_COOLDOWN,
+    ) -> None:
+        """Create the breaker.
+
+        Parameters:
+            threshold: Consecutive failures that open a host's
+                circuit; 0 disables the breaker.
+            cooldown: Seconds before an open circuit lets a
+                trial lookup through.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before_call(self, host: str) -> None:
+        """Check that a call to *host* may be made.
+
+        Parameters:
+            host: Host name, compared case-insensitively.
+
+        Raises:
+            CircuitOpenError: If the host's circuit is open, or
+                half-open with a trial call still in progress.
+        """
+        if self.threshold <= 0 or not host:
+            return
+        with self._lock:
+            circuit = self._circuits.get(host.lower())
+            if circuit is None or not circuit.open_until:
+                return
+            now = time.monotonic()
+            if now < circuit.open_until:
+                raise CircuitOpenError(
+                    f"{host} is unreachable, skipping for another "
+                    f"{circuit.open_until - now:.0f}s: {circuit.last_error}"
+                )
+            if circuit.trial_started is not None and now - circuit.trial_started < self.cooldown:
+                raise CircuitOpenError(f"{host} is unreachable, waiting for a trial lookup")
+            circuit.trial_started = now
+
+    def record_success(self, host: str) -> None:
+        """Record that *host* answered, closing its circuit.
+
+        Parameters:
+            host: Host name, compared case-insensitively.
+        """
+        if self.threshold <= 0 or not host:
+            return
+        with self._lock:
+            circuit = self._circuits.get(host.lower())
+            if circuit is None:
+                return
+            if circuit.open_until:
+                logger.info("%s is reachable again; resuming lookups", host)
+            circuit.failures = 0
+            circuit.open_until = 0.0
+            circuit.trial_started = None
+
+    def record_failure(self, host: str, error: object) -> None:
+        """Record a connection failure or timeout talking to *host*.
+
+        Opens the circuit once ``threshold`` consecutive failures
+        are recorded, or at once when a half-open trial fails.
+
+        Parameters:
+            host: Host name, compared case-insensitively.
+            error: The failure, kept for the report.
+        """
+        if self.threshold <= 0 or not host:
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(host.lower(), _Circuit())
+            circuit.failures += 1
+            circuit.last_error = str(error) or type(error).__name__
+            if circuit.trial_started is None and circuit.failures < self.threshold:
+                return
+            if circuit.open_until and circuit.trial_started is None:
+                return
+            circuit.open_until = time.monotonic() + self.cooldown
+            circuit.trial_started = None
+            circuit.trips += 1
+            logger.warning(
+                "%s failed %d time(s) in a row; skipping its lookups for %.0fs: %s",
+                host,
+                circuit.failures,
+                self.cooldown,
+                circuit.last_error,
+            )
+
+    def is_open(self, host: str) -> bool:
+        """Return True if *host*'s circuit is open or half-open.
+
+        Parameters:
+            host: Host name, compared case-insensitively.
+
+        Returns:
+            True until a call to the host succeeds again.
+        """
+        with self._lock:
+            circuit = self._circuits.get(host.lower())
+            return circuit is not None and bool(circuit.open_until)
+
+    def tripped(self) -> list[TrippedHost]:
+        """Return every host whose circuit opened during the run.
+
+        Returns:
+            One entry per host, sorted by host name.
+        """
+        with self._lock:
+            return [
+                TrippedHost(
+                    host=host,
+                    trips=circuit.trips,
+                    failures=circuit.failures,
+                    open=bool(circuit.open_until),
+                    last_error=circuit.last_error,
+                )
+                for host, circuit in sorted(self._circuits.items())
+                if circuit.trips
+            ]
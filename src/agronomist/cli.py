@@ -1,6 +1,6 @@
 """Command-line interface for Agronomist.
 
-Provides ``report`` and ``update`` sub-commands for scanning
+Provides ``report``, ``update`` and ``watch`` sub-commands for scanning
 Terragrunt, OpenTofu, and Terraform/HCL files, resolving latest
 module versions, and optionally applying in-place updates.
 """
@@ -8,24 +8,46 @@ module versions, and optionally applying in-place updates.
 from __future__ import annotations
 
 import argparse
+import asyncio
 import concurrent.futures
+import contextlib
 import logging
 import os
+import sqlite3
 import sys
-from collections.abc import Callable
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
 from urllib.parse import urlparse
 
 from . import __version__
-from .config import load_config
-from .exceptions import AuthenticationError, ConfigError
-from .git import GitClient
-from .github import GitHubClient
+from .archive import is_archive
+from .asyncresolve import DEFAULT_MAX_IN_FLIGHT, resolve_repos
+from .circuit import DEFAULT_COOLDOWN, DEFAULT_FAILURE_THRESHOLD, CircuitBreaker
+from .config import Config, load_config
+from .exceptions import AuthenticationError, ConfigError, ScanError, WatchError
+from .git import GitClient, changed_paths
+from .github import GRAPHQL_BATCH_SIZE, GRAPHQL_MAX_BATCH_SIZE, GitHubClient
 from .gitlab import GitLabClient
+from .httpcache import HTTP_CACHE_FILE, ConditionalCache
 from .markdown import write_markdown
-from .models import Replacement, SourceRef, UpdateEntry
+from .models import (
+    Replacement,
+    ScanStats,
+    SourceRef,
+    TrippedHost,
+    UpdateEntry,
+    add_case_insensitive_hosts,
+)
+from .patterns import PatternSet
+from .ratelimit import DEFAULT_MAX_WAIT, RateLimitScheduler
 from .report import build_report, write_report
-from .scanner import _match_any, scan_sources
+from .resolvecache import DEFAULT_NEGATIVE_TTL, DEFAULT_TTL, RESOLVE_CACHE_FILE, ResolutionCache
+from .scanindex import DEFAULT_CACHE_DIR, SCAN_INDEX_FILE, ScanIndex
+from .scanner import DEFAULT_PRUNE_DIRS, SCAN_BACKENDS, scan_sources
+from .smarthttp import SmartHttpClient
+from .sourcetable import SourceTable
 from .updater import apply_updates
+from .watch import TreeWatcher, WatchState, expand_changed
 
 logger = logging.getLogger(__name__)
 
@@ -36,9 +58,143 @@ def _add_common_args(parser: argparse.ArgumentParser) -> None:
     Parameters:
         parser: The sub-parser to augment.
     """
-    parser.add_argument("--root", default=".")
+    parser.add_argument(
+        "--root",
+        default=".",
+        help="Directory to scan, or a .tar, .tar.gz or .zip archive to read (report only)",
+    )
     parser.add_argument("--include", action="append", default=[])
     parser.add_argument("--exclude", action="append", default=[])
+    parser.add_argument(
+        "--no-default-prune",
+        action="store_true",
+        help=(
+            "Also walk .git, .terraform, .terragrunt-cache and .agronomist"
+            " directories (skipped by default)"
+        ),
+    )
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help=(
+            "Descend into symlinked directories; each physical file is parsed"
+            " once and reported under every path that reaches it"
+        ),
+    )
+    parser.add_argument(
+        "--changed-since",
+        default=None,
+        metavar="GIT_REV",
+        help="Only scan files changed since GIT_REV (uses git diff --name-only)",
+    )
+    parser.add_argument(
+        "--files-from",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Scan only the files listed in PATH ('-' for stdin), one per line or"
+            " NUL-separated, instead of walking --root"
+        ),
+    )
+    parser.add_argument(
+        "--git-rev",
+        default=None,
+        metavar="GIT_REV",
+        help=(
+            "Scan the files of GIT_REV in the repository at --root (which may be"
+            " bare) instead of the working tree; report only"
+        ),
+    )
+    parser.add_argument(
+        "--scan-backend",
+        choices=SCAN_BACKENDS,
+        default="walk",
+        help=(
+            "How to find files to scan: walk the tree (default) or ask git grep"
+            " for tracked files containing ?ref= (falls back to walking)"
+        ),
+    )
+    parser.add_argument(
+        "--scan-workers",
+        type=int,
+        default=1,
+        help=("Number of processes used to parse files (default: 1; small trees stay serial)"),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help=(
+            "Directory for persistent caches (default: <root>/.agronomist; next to"
+            " an archive --root, or ./.agronomist for a bare repository)"
+        ),
+    )
+    parser.add_argument(
+        "--no-scan-cache",
+        action="store_true",
+        help="Re-parse every file instead of reusing the incremental scan index",
+    )
+    parser.add_argument(
+        "--resolve-cache-ttl",
+        type=int,
+        default=DEFAULT_TTL,
+        metavar="SECONDS",
+        help=f"Seconds a resolved latest ref is reused without a lookup (default: {DEFAULT_TTL})",
+    )
+    parser.add_argument(
+        "--resolve-negative-ttl",
+        type=int,
+        default=DEFAULT_NEGATIVE_TTL,
+        metavar="SECONDS",
+        help=(
+            "Seconds a failed lookup or a repository without tags is remembered"
+            f" (default: {DEFAULT_NEGATIVE_TTL})"
+        ),
+    )
+    parser.add_argument(
+        "--stale-while-revalidate",
+        action="store_true",
+        help="Use expired cached refs immediately and refresh them in the background",
+    )
+    parser.add_argument(
+        "--no-resolve-cache",
+        action="store_true",
+        help="Look up every repository instead of using the resolution cache",
+    )
+    parser.add_argument(
+        "--no-http-cache",
+        action="store_true",
+        help="Send unconditional GitHub/GitLab API requests instead of revalidating ETags",
+    )
+    parser.add_argument(
+        "--rate-limit-wait",
+        type=float,
+        default=DEFAULT_MAX_WAIT,
+        metavar="SECONDS",
+        help=(
+            "Longest an API request waits for a rate limit to reset before the lookup"
+            f" falls back to git (default: {DEFAULT_MAX_WAIT:.0f})"
+        ),
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=DEFAULT_FAILURE_THRESHOLD,
+        metavar="N",
+        help=(
+            "Skip a host's remaining lookups after N consecutive connection failures or"
+            f" timeouts; 0 disables (default: {DEFAULT_FAILURE_THRESHOLD})"
+        ),
+    )
+    parser.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=DEFAULT_COOLDOWN,
+        metavar="SECONDS",
+        help=(
+            "Seconds before a skipped host is tried again with a single lookup"
+            f" (default: {DEFAULT_COOLDOWN:.0f})"
+        ),
+    )
     parser.add_argument(
         "--github-base-url",
         default="https://api.github.com",
@@ -67,8 +223,31 @@ def _add_common_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--resolver",
         default="git",
-        choices=["git", "github", "auto"],
-        help="How to resolve the latest version: git, github or auto",
+        choices=["git", "github", "github-graphql", "auto"],
+        help="How to resolve the latest version: git, github, github-graphql or auto",
+    )
+    parser.add_argument(
+        "--github-graphql",
+        action="store_true",
+        help="With --resolver auto, resolve GitHub repositories in batched GraphQL queries",
+    )
+    parser.add_argument(
+        "--graphql-batch-size",
+        type=int,
+        default=GRAPHQL_BATCH_SIZE,
+        metavar="N",
+        help=(
+            "Repositories per GitHub GraphQL query"
+            f" (default: {GRAPHQL_BATCH_SIZE}, max: {GRAPHQL_MAX_BATCH_SIZE})"
+        ),
+    )
+    parser.add_argument(
+        "--git-http",
+        action="store_true",
+        help=(
+            "List tags of http(s) remotes in-process with git protocol v2 ls-refs"
+            " instead of running git ls-remote (falls back to git on failure)"
+        ),
     )
     parser.add_argument(
         "--json",
@@ -97,6 +276,22 @@ def _add_common_args(parser: argparse.ArgumentParser) -> None:
         default=10,
         help=("Number of parallel workers for version resolution (default: 10)"),
     )
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "asyncio"],
+        default="threads",
+        help=(
+            "Resolve on a thread pool of --workers threads (default) or on asyncio,"
+            " with git ls-remote as async subprocesses and one thread per API call in flight"
+        ),
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        metavar="N",
+        help=f"Lookups in flight at once with --engine asyncio (default: {DEFAULT_MAX_IN_FLIGHT})",
+    )
     verbose_group = parser.add_mutually_exclusive_group()
     verbose_group.add_argument(
         "--verbose",
@@ -133,6 +328,7 @@ examples:
   %(prog)s report --resolver github         # Use GitHub API resolver
   %(prog)s update --include '**/*.tf'       # Update matching Terraform files
   %(prog)s report --markdown report.md      # Export as Markdown
+  %(prog)s watch --json report.json         # Rewrite the report on every change
         """,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
@@ -158,6 +354,22 @@ examples:
     )
     _add_common_args(update_parser)
 
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help=(
+            "Keep scanning in the background and rewrite the reports whenever"
+            " Terragrunt, OpenTofu, or Terraform files change (Linux only)"
+        ),
+    )
+    _add_common_args(watch_parser)
+    watch_parser.add_argument(
+        "--debounce",
+        type=int,
+        default=300,
+        metavar="MS",
+        help="Milliseconds without file events that end a burst of changes (default: 300)",
+    )
+
     args = parser.parse_args(argv)
 
     if not argv or not args.command:
@@ -167,78 +379,188 @@ examples:
     return args
 
 
-def _categorize(rules: list, repo: str, module: str | None) -> str | None:
+class _CategoryMatcher:
+    """Category rules compiled into two merged pattern sets.
+
+    All ``repo_patterns`` (and all ``module_patterns``) across
+    every rule are merged into a single :class:`PatternSet`,
+    remembering which rule owns each pattern. The winning rule
+    is the lowest-indexed owner among the repo and module hits,
+    which preserves the "first matching rule wins" semantics.
+    """
+
+    def __init__(self, rules: list) -> None:
+        """Compile *rules* into repo and module matchers.
+
+        Parameters:
+            rules: List of CategoryRule objects.
+        """
+        self._names = [str(rule.name) for rule in rules]
+        repo_patterns: list[str] = []
+        module_patterns: list[str] = []
+        self._repo_owners: list[int] = []
+        self._module_owners: list[int] = []
+        for index, rule in enumerate(rules):
+            for pattern in rule.repo_patterns:
+                repo_patterns.append(pattern)
+                self._repo_owners.append(index)
+            for pattern in rule.module_patterns:
+                module_patterns.append(pattern)
+                self._module_owners.append(index)
+        self._repo_set = PatternSet(repo_patterns)
+        self._module_set = PatternSet(module_patterns)
+
+    def categorize(self, repo: str, module: str | None) -> str | None:
+        """Return the category for a repo/module pair.
+
+        Parameters:
+            repo: Repository path string.
+            module: Optional module path string.
+
+        Returns:
+            The matching category name, ``"uncategorized"``
+            when rules exist but none match, or None when no
+            rules are configured.
+        """
+        candidates: list[int] = []
+        repo_hit = self._repo_set.first_match(repo)
+        if repo_hit is not None:
+            candidates.append(self._repo_owners[repo_hit])
+        if module:
+            module_hit = self._module_set.first_match(module)
+            if module_hit is not None:
+                candidates.append(self._module_owners[module_hit])
+        if candidates:
+            return self._names[min(candidates)]
+        return "uncategorized" if self._names else None
+
+
+def _categorize(
+    rules: list,
+    repo: str,
+    module: str | None,
+    matcher: _CategoryMatcher | None = None,
+) -> str | None:
     """Assign a category name to a repo/module pair.
 
     Parameters:
         rules: List of CategoryRule objects.
         repo: Repository path string.
         module: Optional module path string.
+        matcher: Pre-compiled matcher for *rules*; compiled on
+            the fly when omitted.
 
     Returns:
         The matching category name, ``"uncategorized"`` when
         rules exist but none match, or None when no rules
         are configured.
     """
-    for rule in rules:
-        if rule.repo_patterns and _match_any(repo, rule.repo_patterns):
-            return str(rule.name)
-        if module and rule.module_patterns and _match_any(module, rule.module_patterns):
-            return str(rule.name)
-    return "uncategorized" if rules else None
+    if matcher is None:
+        matcher = _CategoryMatcher(rules)
+    return matcher.categorize(repo, module)
 
 
 def _collect_updates(
     latest_ref_fn: Callable[[SourceRef], str | None],
-    sources: list[SourceRef],
+    sources: Iterable[SourceRef],
     category_rules: list,
     max_workers: int = 10,
+    prefetch: Callable[[list[SourceRef]], None] | None = None,
+    latest_ref_async: Callable[[SourceRef], Awaitable[str | None]] | None = None,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    pool_key: Callable[[SourceRef], str] | None = None,
+    host_limits: Mapping[str, int] | None = None,
 ) -> list[UpdateEntry]:
     """Resolve latest refs and build the list of updates.
 
-    Resolves each unique repository in parallel, then compares
-    the current ref with the latest to produce update entries.
+    Resolves each unique repository in parallel, on thread pools
+    or, when *latest_ref_async* is given, on the asyncio engine,
+    then compares the current ref with the latest to produce
+    update entries. Both engines yield the same entries.
+
+    On threads, repositories of each host in *host_limits* get a
+    pool of that many threads, and the others one pool of
+    *max_workers* threads per *pool_key* (e.g. per resolver
+    backend), so a slow host or backend never holds the threads
+    of the others.
 
     Parameters:
         latest_ref_fn: Callable that returns the latest ref
             for a given SourceRef.
-        sources: Discovered source references.
+        sources: Discovered source references, as a list or a
+            columnar :class:`~agronomist.sourcetable.SourceTable`.
         category_rules: Category rules from config.
-        max_workers: Thread pool size.
+        max_workers: Size of each thread pool.
+        prefetch: Called once with one SourceRef per repository
+            before the per-repository lookups, so that a batching
+            resolver can answer many of them in one request.
+        latest_ref_async: Coroutine equivalent of
+            *latest_ref_fn*; selects the asyncio engine, with up
+            to *max_in_flight* threads for blocking API calls.
+        max_in_flight: Lookups in flight at once on the asyncio
+            engine.
+        pool_key: Names the thread pool of a source, such as the
+            backend resolving it; one shared pool when omitted.
+        host_limits: Most lookups in flight at once per host,
+            keyed by lower-case ``repo_host``, on either engine.
 
     Returns:
         A list of UpdateEntry instances ready for reporting
         or applying.
     """
     unique_repos: dict[str, SourceRef] = {}
-    for source in sources:
-        if source.repo not in unique_repos:
-            unique_repos[source.repo] = source
+    if isinstance(sources, SourceTable):
+        unique_repos = sources.first_by_repo()
+    else:
+        for source in sources:
+            if source.repo_key not in unique_repos:
+                unique_repos[source.repo_key] = source
 
-    by_repo: dict[str, str | None] = {}
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=max_workers,
-    ) as executor:
-        future_to_repo = {
-            executor.submit(latest_ref_fn, src): repo for repo, src in unique_repos.items()
-        }
-        for future in concurrent.futures.as_completed(
-            future_to_repo,
-        ):
-            repo = future_to_repo[future]
-            try:
-                by_repo[repo] = future.result()
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "Failed to resolve latest ref for %s: %s",
-                    repo,
-                    exc,
-                )
-                by_repo[repo] = None
+    if prefetch is not None:
+        prefetch(list(unique_repos.values()))
 
+    by_repo: dict[str, str | None] = {}
+    if latest_ref_async is not None:
+        by_repo = resolve_repos(
+            unique_repos,
+            latest_ref_async,
+            max_in_flight=max_in_flight,
+            host_limits=host_limits,
+        )
+    else:
+        limits = host_limits or {}
+        with contextlib.ExitStack() as stack:
+            pools: dict[str, concurrent.futures.ThreadPoolExecutor] = {}
+            future_to_repo = {}
+            for repo_key, src in unique_repos.items():
+                host = src.repo_host.lower()
+                key = f"host {host}" if host in limits else (pool_key(src) if pool_key else "")
+                executor = pools.get(key)
+                if executor is None:
+                    executor = pools[key] = stack.enter_context(
+                        concurrent.futures.ThreadPoolExecutor(
+                            max_workers=max(1, limits.get(host, max_workers)),
+                        )
+                    )
+                future_to_repo[executor.submit(latest_ref_fn, src)] = repo_key
+            for future in concurrent.futures.as_completed(
+                future_to_repo,
+            ):
+                repo_key = future_to_repo[future]
+                try:
+                    by_repo[repo_key] = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning(
+                        "Failed to resolve latest ref for %s: %s",
+                        repo_key,
+                        exc,
+                    )
+                    by_repo[repo_key] = None
+
+    matcher = _CategoryMatcher(category_rules)
     updates: list[UpdateEntry] = []
     for source in sources:
-        latest_ref = by_repo.get(source.repo)
+        latest_ref = by_repo.get(source.repo_key)
         if not latest_ref or latest_ref == source.ref:
             continue
 
@@ -247,7 +569,12 @@ def _collect_updates(
         module_id = source.module if source.module else "root"
         unique_module = f"{module_id}@{source.file_path}"
 
-        category = _categorize(category_rules, source.repo, source.module)
+        category = _categorize(
+            category_rules,
+            source.repo,
+            source.module,
+            matcher=matcher,
+        )
 
         entry = UpdateEntry(
             repo=source.repo,
@@ -287,6 +614,9 @@ def _print_category_summary(
 
 def _create_clients(
     args: argparse.Namespace,
+    conditional_cache: ConditionalCache | None = None,
+    scheduler: RateLimitScheduler | None = None,
+    breaker: CircuitBreaker | None = None,
 ) -> tuple[GitHubClient, GitLabClient, GitClient, str | None, str | None]:
     """Instantiate API clients and resolve tokens.
 
@@ -295,6 +625,11 @@ def _create_clients(
 
     Parameters:
         args: Parsed CLI arguments.
+        conditional_cache: Store of response validators shared
+            by the GitHub and GitLab clients, if any.
+        scheduler: Rate-limit scheduler shared by the GitHub
+            and GitLab clients, if any.
+        breaker: Circuit breaker shared by every client, if any.
 
     Returns:
         A tuple of (github_client, gitlab_client, git_client,
@@ -306,13 +641,27 @@ def _create_clients(
         base_url=args.github_base_url,
         token=github_token,
         timeout=args.timeout,
+        conditional_cache=conditional_cache,
+        scheduler=scheduler,
+        breaker=breaker,
     )
     gitlab_client = GitLabClient(
         base_url=args.gitlab_base_url,
         token=gitlab_token,
         timeout=args.timeout,
+        conditional_cache=conditional_cache,
+        scheduler=scheduler,
+        breaker=breaker,
+    )
+    git_client = GitClient(
+        timeout=args.timeout,
+        http=(
+            SmartHttpClient(timeout=args.timeout, scheduler=scheduler, breaker=breaker)
+            if args.git_http
+            else None
+        ),
+        breaker=breaker,
     )
-    git_client = GitClient(timeout=args.timeout)
     return (
         github_client,
         gitlab_client,
@@ -367,6 +716,276 @@ def _validate_tokens(
     return True
 
 
+def _default_cache_dir(root: str, archive_root: bool) -> str:
+    """Return the cache directory used when ``--cache-dir`` is not given.
+
+    Caches normally live in ``<root>/.agronomist``. An archive
+    cannot hold them, so they go next to it; a bare repository
+    (scanned with ``--git-rev``) is never written to, so they go in
+    the current directory.
+
+    Parameters:
+        root: The ``--root`` argument.
+        archive_root: Whether *root* is an archive.
+
+    Returns:
+        The directory for the scan index and the resolver caches.
+    """
+    if archive_root:
+        return os.path.join(os.path.dirname(os.path.abspath(root)), DEFAULT_CACHE_DIR)
+    if not os.path.isdir(root) or _is_bare_repository(root):
+        return DEFAULT_CACHE_DIR
+    return os.path.join(root, DEFAULT_CACHE_DIR)
+
+
+def _api_host_limits(host_limits: Mapping[str, int], api_urls: Iterable[str]) -> dict[str, int]:
+    """Extend per-repository-host limits to the matching API hosts.
+
+    Limits are configured by the host in module sources, while the
+    rate-limit scheduler sees the host each request goes to. An API
+    served from ``api.<host>`` (``api.github.com`` for
+    ``github.com``) gets the limit of ``<host>``, unless it has its
+    own; APIs on the repository host itself need no mapping.
+
+    Parameters:
+        host_limits: Limits keyed by lower-case repository host.
+        api_urls: Base URLs of the configured APIs.
+
+    Returns:
+        The limits keyed by the hosts requests are sent to.
+    """
+    limits = dict(host_limits)
+    for url in api_urls:
+        api_host = (urlparse(url).hostname or "").lower()
+        repo_host = api_host.removeprefix("api.")
+        if repo_host != api_host and repo_host in host_limits:
+            limits.setdefault(api_host, host_limits[repo_host])
+    return limits
+
+
+def _is_bare_repository(path: str) -> bool:
+    """Return True if *path* looks like a bare Git repository.
+
+    Parameters:
+        path: A directory.
+
+    Returns:
+        True when *path* holds ``HEAD``, ``objects`` and ``refs``
+        directly rather than in a ``.git`` directory.
+    """
+    return (
+        os.path.isfile(os.path.join(path, "HEAD"))
+        and os.path.isdir(os.path.join(path, "objects"))
+        and os.path.isdir(os.path.join(path, "refs"))
+    )
+
+
+def _can_be_directory(path: str) -> bool:
+    """Return True if *path* is, or could be created as, a directory.
+
+    Parameters:
+        path: A directory that may not exist yet.
+
+    Returns:
+        False when *path* or its nearest existing ancestor is a
+        file, such as a path inside an archive.
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return os.path.isdir(path)
+
+
+def _read_file_list(path: str) -> list[str]:
+    """Read the paths given to ``--files-from``.
+
+    The list is NUL-separated when it contains a NUL byte (as
+    written by ``find -print0`` or ``fd -0``) and newline-separated
+    otherwise; blank entries and carriage returns at line ends
+    are ignored.
+
+    Parameters:
+        path: File to read, or ``-`` for standard input.
+
+    Returns:
+        The listed paths, in order.
+
+    Raises:
+        OSError: If *path* cannot be read.
+    """
+    if path == "-":
+        data = sys.stdin.buffer.read()
+    else:
+        with open(path, "rb") as handle:
+            data = handle.read()
+    if b"\0" in data:
+        entries = data.split(b"\0")
+    else:
+        entries = [line.rstrip(b"\r") for line in data.splitlines()]
+    return [os.fsdecode(entry) for entry in entries if entry]
+
+
+def _write_reports(
+    args: argparse.Namespace,
+    updates: list[UpdateEntry],
+    tripped: list[TrippedHost] | None = None,
+) -> None:
+    """Write the JSON and Markdown reports requested on the command line.
+
+    Parameters:
+        args: Parsed CLI arguments.
+        updates: The updates to report.
+        tripped: Hosts skipped by the circuit breaker.
+    """
+    report = None
+    tripped_dicts = [host.to_dict() for host in tripped or ()]
+
+    if args.json:
+        update_dicts = [u.to_dict() for u in updates]
+        report = build_report(args.root, update_dicts, tripped_dicts)
+        write_report(args.json, report)
+        print(f"Report written to {args.json}.")
+
+    if args.markdown:
+        if report is None:
+            update_dicts = [u.to_dict() for u in updates]
+            report = build_report(args.root, update_dicts, tripped_dicts)
+        write_markdown(args.markdown, report)
+        print(f"Markdown report written to {args.markdown}.")
+
+
+def _watch(
+    args: argparse.Namespace,
+    config: Config,
+    sources: Iterable[SourceRef],
+    latest_ref_fn: Callable[[SourceRef], str | None],
+    rescan: Callable[[list[str] | None, ScanStats], list[SourceRef]],
+    prefetch: Callable[[list[SourceRef]], None] | None = None,
+    latest_ref_async: Callable[[SourceRef], Awaitable[str | None]] | None = None,
+    pool_key: Callable[[SourceRef], str] | None = None,
+    breaker: CircuitBreaker | None = None,
+) -> int:
+    """Rewrite the reports whenever scanned files change.
+
+    The refs of every file and the latest ref of every repository
+    are kept in memory. After each burst of inotify events only
+    the changed files are parsed again, and only repositories
+    without a known latest ref are looked up. Batches that touch
+    no scanned file (such as the reports being rewritten) are
+    ignored.
+
+    Parameters:
+        args: Parsed CLI arguments.
+        config: Loaded configuration.
+        sources: Refs of the initial full scan.
+        latest_ref_fn: Resolver for one SourceRef.
+        rescan: Scans a list of files relative to the root, or
+            the whole tree when given None.
+        prefetch: Batch resolver passed to :func:`_collect_updates`.
+        latest_ref_async: Coroutine resolver selecting the asyncio
+            engine, passed to :func:`_collect_updates`.
+        pool_key: Thread pool of a source, passed to
+            :func:`_collect_updates`.
+        breaker: Circuit breaker whose tripped hosts are listed
+            in the reports.
+
+    Returns:
+        Exit code: 0 when interrupted, 1 when the root cannot
+        be watched.
+    """
+    resolved: dict[str, str] = {}
+
+    def _known_latest_ref(source: SourceRef) -> str | None:
+        """Resolve a repository once; failures are retried later.
+
+        A lookup that finds no ref is not remembered, so the
+        repository is looked up again with the next batch.
+        """
+        latest = resolved.get(source.repo_key)
+        if latest is None:
+            latest = latest_ref_fn(source)
+            if latest is not None:
+                resolved[source.repo_key] = latest
+        return latest
+
+    async def _known_latest_ref_async(source: SourceRef) -> str | None:
+        """Coroutine version of ``_known_latest_ref``."""
+        latest = resolved.get(source.repo_key)
+        if latest is None and latest_ref_async is not None:
+            latest = await latest_ref_async(source)
+            if latest is not None:
+                resolved[source.repo_key] = latest
+        return latest
+
+    known_latest_ref_async = None if latest_ref_async is None else _known_latest_ref_async
+
+    prune_names = frozenset() if args.no_default_prune else frozenset(DEFAULT_PRUNE_DIRS)
+    try:
+        watcher = TreeWatcher(args.root, prune_names)
+    except WatchError as exc:
+        logger.error("Cannot watch %s: %s", args.root, exc)
+        return 1
+
+    state = WatchState(sources)
+    try:
+        updates = _collect_updates(
+            _known_latest_ref,
+            state,
+            config.categories,
+            max_workers=args.workers,
+            prefetch=prefetch,
+            latest_ref_async=known_latest_ref_async,
+            max_in_flight=args.max_in_flight,
+            pool_key=pool_key,
+            host_limits=config.host_limits(),
+        )
+        _write_reports(args, updates, breaker.tripped() if breaker else None)
+        print(f"Watching {args.root} for changes ({len(updates)} update(s)); press Ctrl-C to stop.")
+        while True:
+            changed = watcher.wait(args.debounce / 1000)
+            if changed is not None and not changed:
+                continue
+            start = time.perf_counter()
+            stats = ScanStats()
+            if changed is None:
+                state = WatchState(rescan(None, stats))
+                forgotten = 0
+            else:
+                forgotten = state.discard(changed)
+                state.add(rescan(expand_changed(args.root, changed, prune_names), stats))
+                if not forgotten and not stats.files_scanned:
+                    continue
+            known = len(resolved)
+            updates = _collect_updates(
+                _known_latest_ref,
+                state,
+                config.categories,
+                max_workers=args.workers,
+                prefetch=prefetch,
+                latest_ref_async=known_latest_ref_async,
+                max_in_flight=args.max_in_flight,
+                pool_key=pool_key,
+                host_limits=config.host_limits(),
+            )
+            _write_reports(args, updates, breaker.tripped() if breaker else None)
+            logger.info(
+                "Re-parsed %d file(s) (%d removed), resolved %d new repo(s);"
+                " %d update(s) reported in %.1f ms.",
+                stats.files_scanned,
+                forgotten,
+                len(resolved) - known,
+                len(updates),
+                (time.perf_counter() - start) * 1000,
+            )
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+
+
 def main(argv: list[str] | None = None) -> int:
     """Entry point for the Agronomist CLI.
 
@@ -393,22 +1012,124 @@ def main(argv: list[str] | None = None) -> int:
         logger.error("Configuration error: %s", exc)
         return 1
 
-    sources = scan_sources(
-        args.root,
-        include=args.include,
-        exclude=args.exclude,
-        blacklist_repos=config.blacklist.repos,
-        blacklist_modules=config.blacklist.modules,
-        blacklist_files=config.blacklist.files,
+    if args.git_rev and args.command == "update":
+        logger.error("--git-rev scans a revision, not a working tree; use the report command.")
+        return 1
+    if args.git_rev and args.changed_since:
+        logger.error("--git-rev cannot be combined with --changed-since.")
+        return 1
+
+    archive_root = is_archive(args.root)
+    if args.command == "watch" and (
+        args.git_rev
+        or args.changed_since
+        or args.files_from
+        or args.follow_symlinks
+        or archive_root
+    ):
+        logger.error(
+            "watch follows the working tree; it cannot be combined with --git-rev,"
+            " --changed-since, --files-from, --follow-symlinks or an archive --root."
+        )
+        return 1
+    if args.files_from and args.changed_since:
+        logger.error("--files-from cannot be combined with --changed-since.")
+        return 1
+    if archive_root and args.command == "update":
+        logger.error("--root is an archive, which cannot be updated; use the report command.")
+        return 1
+    if archive_root and args.changed_since:
+        logger.error("--changed-since cannot be used when --root is an archive.")
+        return 1
+
+    files = None
+    if args.files_from:
+        try:
+            files = _read_file_list(args.files_from)
+        except OSError as exc:
+            logger.error("Cannot read file list %s: %s", args.files_from, exc)
+            return 1
+        logger.info("%d file(s) listed in %s.", len(files), args.files_from)
+    if args.changed_since:
+        try:
+            files = changed_paths(args.root, args.changed_since, timeout=args.timeout)
+        except ScanError as exc:
+            logger.error("Cannot list changed files: %s", exc)
+            return 1
+        logger.info("%d file(s) changed since %s.", len(files), args.changed_since)
+
+    # Repository names on the configured forges are case-insensitive,
+    # like on the public ones; register them before keys are derived.
+    add_case_insensitive_hosts(
+        urlparse(args.github_base_url).hostname or "",
+        urlparse(args.gitlab_base_url).hostname or "",
     )
 
+    cache_dir = args.cache_dir or _default_cache_dir(args.root, archive_root)
+    scan_index = None
+    if not args.no_scan_cache and not archive_root:
+        scan_index = ScanIndex.load(os.path.join(cache_dir, SCAN_INDEX_FILE))
+
+    scan_stats = ScanStats()
+    try:
+        sources = scan_sources(
+            args.root,
+            include=args.include,
+            exclude=args.exclude,
+            blacklist_repos=config.blacklist.repos,
+            blacklist_modules=config.blacklist.modules,
+            blacklist_files=config.blacklist.files,
+            prune_defaults=not args.no_default_prune,
+            stats=scan_stats,
+            workers=args.scan_workers,
+            index=scan_index,
+            files=files,
+            follow_symlinks=args.follow_symlinks,
+            git_rev=args.git_rev,
+            backend=args.scan_backend,
+            as_table=True,
+        )
+    except ScanError as exc:
+        logger.error("Scan failed: %s", exc)
+        return 1
+    logger.info(
+        "Scanned %d file(s) (%d unchanged from index, %d with already parsed content,"
+        " %d linked duplicates), pruned %d director(ies).",
+        scan_stats.files_scanned,
+        scan_stats.files_cached,
+        scan_stats.files_reused,
+        scan_stats.files_deduplicated,
+        scan_stats.dirs_pruned,
+    )
+    if scan_index is not None:
+        try:
+            scan_index.save()
+        except OSError as exc:
+            logger.warning("Could not write scan index %s: %s", scan_index.path, exc)
+
+    conditional_cache = None
+    if not args.no_http_cache and not _can_be_directory(cache_dir):
+        logger.warning("HTTP cache disabled: %s is not a directory", cache_dir)
+    elif not args.no_http_cache:
+        try:
+            conditional_cache = ConditionalCache(os.path.join(cache_dir, HTTP_CACHE_FILE))
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("HTTP cache disabled: %s", exc)
+    scheduler = RateLimitScheduler(
+        max_wait=args.rate_limit_wait,
+        host_limits=_api_host_limits(
+            config.host_limits(), [args.github_base_url, args.gitlab_base_url]
+        ),
+    )
+    breaker = CircuitBreaker(threshold=args.breaker_threshold, cooldown=args.breaker_cooldown)
+
     (
         github_client,
         gitlab_client,
         git_client,
         github_token,
         gitlab_token,
-    ) = _create_clients(args)
+    ) = _create_clients(args, conditional_cache, scheduler, breaker)
 
     if not _validate_tokens(
         args,
@@ -417,6 +1138,8 @@ def main(argv: list[str] | None = None) -> int:
         github_token,
         gitlab_token,
     ):
+        if conditional_cache is not None:
+            conditional_cache.close()
         return 1
 
     base_host = urlparse(args.github_base_url).netloc
@@ -424,65 +1147,200 @@ def main(argv: list[str] | None = None) -> int:
     if base_host:
         github_hosts.add(base_host)
 
-    def _latest_ref(source: SourceRef) -> str | None:
-        """Resolve latest ref using the configured strategy."""
-        gitlab_host = GitLabClient.detect_gitlab_host(source.repo_url)
+    # Latest refs answered by batched GraphQL queries, by repo_key.
+    batch_refs: dict[str, str | None] = {}
 
-        if args.resolver == "github":
-            if source.repo_host in github_hosts:
-                ref = github_client.latest_ref(source.repo)
-                if ref:
-                    return ref
-            return git_client.latest_ref(source.repo_url)
-
-        if args.resolver == "git":
-            return git_client.latest_ref(source.repo_url)
-
-        if args.resolver == "auto":
-            if gitlab_host:
-                ref = gitlab_client.latest_ref(source.repo_url)
-                if ref:
-                    return ref
-            elif source.repo_host in github_hosts:
-                ref = github_client.latest_ref(source.repo)
-                if ref:
-                    return ref
-            return git_client.latest_ref(source.repo_url)
+    def _github_ref(source: SourceRef) -> str | None:
+        """Return the batched GitHub result, else ask the REST API."""
+        if source.repo_key in batch_refs:
+            return batch_refs[source.repo_key]
+        return github_client.latest_ref(source.repo)
 
+    def _backend(source: SourceRef) -> str:
+        """Return the backend the strategy resolves *source* with first."""
+        if args.resolver in ("github", "github-graphql"):
+            if source.repo_host in github_hosts:
+                return "github"
+        elif args.resolver == "auto":
+            if GitLabClient.detect_gitlab_host(source.repo_url):
+                return "gitlab"
+            if source.repo_host in github_hosts:
+                return "github"
+        return "git"
+
+    def _api_lookup(source: SourceRef) -> Callable[[], str | None] | None:
+        """Return the API lookup the strategy tries before git, if any."""
+        backend = _backend(source)
+        if backend == "github":
+            return lambda: _github_ref(source)
+        if backend == "gitlab":
+            return lambda: gitlab_client.latest_ref(source.repo_url)
         return None
 
-    updates = _collect_updates(
-        _latest_ref,
-        sources,
-        config.categories,
-        max_workers=args.workers,
-    )
+    def _latest_ref(source: SourceRef) -> str | None:
+        """Resolve latest ref using the configured strategy."""
+        api_lookup = _api_lookup(source)
+        if api_lookup is not None:
+            ref = api_lookup()
+            if ref:
+                return ref
+        return git_client.latest_ref(source.repo_url)
+
+    async def _latest_ref_async(source: SourceRef) -> str | None:
+        """Resolve like :func:`_latest_ref`, without blocking the loop."""
+        api_lookup = _api_lookup(source)
+        if api_lookup is not None:
+            ref = await asyncio.to_thread(api_lookup)
+            if ref:
+                return ref
+        return await git_client.latest_ref_async(source.repo_url)
+
+    def _cache_key(source: SourceRef) -> str:
+        """Return the resolution cache key of a source."""
+        return f"{args.resolver} {source.repo_key}"
+
+    resolve_cache = None
+    latest_ref_fn: Callable[[SourceRef], str | None] = _latest_ref
+    latest_ref_async: Callable[[SourceRef], Awaitable[str | None]] = _latest_ref_async
+    if not args.no_resolve_cache:
+        try:
+            resolve_cache = ResolutionCache(
+                os.path.join(cache_dir, RESOLVE_CACHE_FILE),
+                ttl=args.resolve_cache_ttl,
+                negative_ttl=args.resolve_negative_ttl,
+                stale_while_revalidate=args.stale_while_revalidate,
+            )
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Resolution cache disabled: %s", exc)
+        else:
+            latest_ref_fn = resolve_cache.wrap(_latest_ref, _cache_key)
+            latest_ref_async = resolve_cache.wrap_async(_latest_ref_async, _latest_ref, _cache_key)
+            # The git resolver keeps full tag lists too, shared by
+            # every --resolver strategy that falls back to git.
+            git_client.tag_cache = resolve_cache
+
+    def _prefetch(unique_sources: list[SourceRef]) -> None:
+        """Resolve GitHub repositories in batched GraphQL queries."""
+        keys_by_repo: dict[str, list[str]] = {}
+        for source in unique_sources:
+            if (
+                source.repo_host in github_hosts
+                and source.repo_key not in batch_refs
+                and not (resolve_cache is not None and resolve_cache.covers(_cache_key(source)))
+            ):
+                keys_by_repo.setdefault(source.repo, []).append(source.repo_key)
+        repos = list(keys_by_repo)
+        if not repos:
+            return
+        start = time.perf_counter()
+        answered = github_client.latest_refs(repos, batch_size=args.graphql_batch_size)
+        for repo, latest in answered.items():
+            for repo_key in keys_by_repo.get(repo, ()):
+                batch_refs[repo_key] = latest
+        logger.info(
+            "Resolved %d of %d GitHub repositories with GraphQL in %.1f ms.",
+            len(answered),
+            len(repos),
+            (time.perf_counter() - start) * 1000,
+        )
 
-    if updates:
-        report = None
+    use_graphql = args.resolver == "github-graphql" or (
+        args.resolver == "auto" and args.github_graphql
+    )
+    prefetch = _prefetch if use_graphql else None
+    async_engine = latest_ref_async if args.engine == "asyncio" else None
 
-        if args.json:
-            update_dicts = [u.to_dict() for u in updates]
-            report = build_report(args.root, update_dicts)
-            write_report(args.json, report)
-            print(f"Report written to {args.json}.")
-
-        if args.markdown:
-            if report is None:
-                update_dicts = [u.to_dict() for u in updates]
-                report = build_report(args.root, update_dicts)
-            write_markdown(args.markdown, report)
-            print(f"Markdown report written to {args.markdown}.")
-
-        if args.command == "update":
-            touched = apply_updates(args.root, updates)
-            if touched:
-                print(f"Updated {len(touched)} file(s).")
-            else:
-                print("No updates applied.")
+    try:
+        if args.command == "watch":
+
+            def _rescan(files: list[str] | None, stats: ScanStats) -> list[SourceRef]:
+                """Scan *files* (or the whole tree) with the CLI's filters."""
+                return scan_sources(
+                    args.root,
+                    include=args.include,
+                    exclude=args.exclude,
+                    blacklist_repos=config.blacklist.repos,
+                    blacklist_modules=config.blacklist.modules,
+                    blacklist_files=config.blacklist.files,
+                    prune_defaults=not args.no_default_prune,
+                    stats=stats,
+                    files=files,
+                )
 
-        _print_category_summary(updates)
-    else:
-        print("No updates found.")
+            return _watch(
+                args,
+                config,
+                sources,
+                latest_ref_fn,
+                _rescan,
+                prefetch,
+                async_engine,
+                _backend,
+                breaker,
+            )
+
+        updates = _collect_updates(
+            latest_ref_fn,
+            sources,
+            config.categories,
+            max_workers=args.workers,
+            prefetch=prefetch,
+            latest_ref_async=async_engine,
+            max_in_flight=args.max_in_flight,
+            pool_key=_backend,
+            host_limits=config.host_limits(),
+        )
 
-    return 0
+        tripped = breaker.tripped()
+        if updates or tripped:
+            _write_reports(args, updates, tripped)
+
+        if updates:
+            if args.command == "update":
+                touched = apply_updates(args.root, updates)
+                if touched:
+                    print(f"Updated {len(touched)} file(s).")
+                else:
+                    print("No updates applied.")
+
+            _print_category_summary(updates)
+        else:
+            print("No updates found.")
+
+        return 0
+    finally:
+        if resolve_cache is not None:
+            resolve_cache.close()
+            stats = resolve_cache.stats
+            logger.info(
+                "Resolution cache: %d hit(s), %d remembered failure(s), %d stale"
+                " (%d refreshed), %d lookup(s).",
+                stats.hits,
+                stats.negative_hits,
+                stats.stale,
+                stats.refreshed,
+                stats.misses,
+            )
+        if conditional_cache is not None:
+            conditional_cache.close()
+            http_stats = conditional_cache.stats
+            if http_stats.not_modified or http_stats.fetched:
+                logger.info(
+                    "API requests: %d not modified (served from the HTTP cache), %d downloaded.",
+                    http_stats.not_modified,
+                    http_stats.fetched,
+                )
+        if scheduler.stats.throttled or scheduler.stats.waited:
+            logger.info(
+                "API rate limits: %d throttled response(s), %.1fs spent waiting.",
+                scheduler.stats.throttled,
+                scheduler.stats.waited,
+            )
+        for host in breaker.tripped():
+            logger.warning(
+                "Circuit breaker: %s tripped %d time(s)%s; last error: %s",
+                host.host,
+                host.trips,
+                ", still open" if host.open else "",
+                host.last_error,
+            )
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 import yaml
@@ -47,6 +47,18 @@ class Blacklist:
     files: list[str]
 
 
+@dataclass(frozen=True)
+class HostSettings:
+    """Settings applying to one repository host.
+
+    Attributes:
+        max_concurrency: Most lookups in flight at once against
+            the host, or None for the global default.
+    """
+
+    max_concurrency: int | None = None
+
+
 @dataclass(frozen=True)
 class Config:
     """Top-level configuration container.
@@ -54,10 +66,26 @@ class Config:
     Attributes:
         categories: Ordered list of category assignment rules.
         blacklist: Patterns for resources to ignore entirely.
+        hosts: Per-host settings, keyed by lower-case host name
+            as it appears in module sources.
     """
 
     categories: list[CategoryRule]
     blacklist: Blacklist
+    hosts: dict[str, HostSettings] = field(default_factory=dict)
+
+    def host_limits(self) -> dict[str, int]:
+        """Return the configured concurrency limit of each host.
+
+        Returns:
+            ``{host: max_concurrency}`` for every host that sets
+            one.
+        """
+        return {
+            host: settings.max_concurrency
+            for host, settings in self.hosts.items()
+            if settings.max_concurrency is not None
+        }
 
 
 def _normalize_rules(data: dict[str, Any]) -> list[CategoryRule]:
@@ -86,6 +114,38 @@ def _normalize_rules(data: dict[str, Any]) -> list[CategoryRule]:
     return rules
 
 
+def _normalize_hosts(data: dict[str, Any]) -> dict[str, HostSettings]:
+    """Parse the ``hosts`` mapping into HostSettings objects.
+
+    Parameters:
+        data: Top-level config dict (may contain ``hosts``).
+
+    Returns:
+        HostSettings keyed by lower-case host name.
+
+    Raises:
+        ConfigError: If ``hosts`` is not a mapping of mappings,
+            or a ``max_concurrency`` is not a positive integer.
+    """
+    raw = data.get("hosts") or {}
+    if not isinstance(raw, dict):
+        raise ConfigError(f"'hosts' must be a mapping of host names, got {type(raw).__name__}")
+    hosts: dict[str, HostSettings] = {}
+    for host, item in raw.items():
+        item = item or {}
+        if not isinstance(item, dict):
+            raise ConfigError(f"Settings of host {host!r} must be a mapping")
+        limit = item.get("max_concurrency")
+        if limit is not None and (
+            isinstance(limit, bool) or not isinstance(limit, int) or limit < 1
+        ):
+            raise ConfigError(
+                f"max_concurrency of host {host!r} must be a positive integer, got {limit!r}"
+            )
+        hosts[str(host).lower()] = HostSettings(max_concurrency=limit)
+    return hosts
+
+
 def load_config(path: str, root: str) -> Config:
     """Load and parse an Agronomist configuration file.
 
@@ -98,7 +158,12 @@ def load_config(path: str, root: str) -> Config:
         root: Root directory used to resolve relative paths.
 
     Returns:
-        A Config instance with categories and blacklist.
+        A Config instance with categories, blacklist and host
+        settings.
+
+    Raises:
+        ConfigError: If the file is not a mapping, or its
+            ``hosts`` section is malformed.
     """
     empty = Config(
         categories=[],
@@ -135,4 +200,4 @@ def load_config(path: str, root: str) -> Config:
         files=blacklist_data.get("files", []) or [],
     )
 
-    return Config(categories=categories, blacklist=blacklist)
+    return Config(categories=categories, blacklist=blacklist, hosts=_normalize_hosts(data))
@@ -11,6 +11,14 @@ class NetworkError(AgronomistError):
     """Raised when a network/HTTP request fails after retries."""
 
 
+class RateLimitError(NetworkError):
+    """Raised when an API host stays rate limited for too long."""
+
+
+class CircuitOpenError(NetworkError):
+    """Raised instead of contacting a host that keeps failing."""
+
+
 class AuthenticationError(AgronomistError):
     """Raised when an API token is invalid or lacks permissions."""
 
@@ -21,3 +29,11 @@ class ResolverError(AgronomistError):
 
 class ConfigError(AgronomistError):
     """Raised when agronomist configuration is missing or malformed."""
+
+
+class ScanError(AgronomistError):
+    """Raised when the scanner cannot enumerate the files to scan."""
+
+
+class WatchError(AgronomistError):
+    """Raised when the scan root cannot be watched for changes."""
@@ -1,7 +1,8 @@
 """Shared file-writing utilities for Agronomist.
 
 Provides an atomic write helper that prevents file corruption
-when the process is interrupted mid-write.
+when the process is interrupted mid-write, and a helper creating
+cache directories that Git ignores.
 """
 
 from __future__ import annotations
@@ -44,3 +45,27 @@ def atomic_write(
     except BaseException:
         os.unlink(tmp_path)
         raise
+
+
+def ensure_cache_dir(path: str) -> None:
+    """Create the cache directory *path* if needed.
+
+    A directory created here gets a ``.gitignore`` ignoring
+    everything in it, so caches kept inside a scanned repository
+    never show up in ``git status`` or get committed by ``git add
+    -A``. Existing directories are left alone.
+
+    Parameters:
+        path: Directory to create; empty for the current one.
+
+    Raises:
+        OSError: If the directory or ``.gitignore`` cannot be
+            written.
+    """
+    if not path or os.path.isdir(path):
+        return
+    try:
+        os.makedirs(path)
+    except FileExistsError:
+        return
+    atomic_write(os.path.join(path, ".gitignore"), "*\n")
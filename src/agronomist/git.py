@@ -1,15 +1,137 @@
-"""Git CLI resolver for determining the latest tag.
+"""Git CLI helpers for resolving tags and reading repositories.
 
-Shells out to ``git ls-remote --tags`` and parses the output
-to find the most recent version-sorted tag.
+Shells out to ``git ls-remote --tags`` (blocking, or as an
+asyncio subprocess) and parses the output to find the most
+recent version-sorted tag, unless a
+:class:`~agronomist.smarthttp.SmartHttpClient` can list an
+``http(s)://`` remote in-process. Also shells out to
+``git diff --name-only`` to find files changed since a revision,
+to ``git ls-tree``/``git cat-file --batch`` to read the files
+of any revision without a checkout, and to ``git grep`` and
+``git ls-files`` to find candidate files in a worktree.
+
+With a :class:`~agronomist.circuit.CircuitBreaker`, ``git
+ls-remote`` timeouts and connection errors count against the
+remote's host, and remotes on a host whose circuit is open are
+not contacted.
 """
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
 import subprocess  # nosec B404, B603
-from dataclasses import dataclass
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from .circuit import CircuitBreaker
+from .exceptions import ResolverError, ScanError
+from .resolvecache import ResolutionCache
+from .smarthttp import SmartHttpClient
+
+logger = logging.getLogger(__name__)
+
+# Lower-case fragments of git (and libcurl/ssh) messages that mean
+# the remote's host could not be reached, as opposed to a missing
+# repository or denied access.
+_UNREACHABLE_MARKERS = (
+    "could not resolve host",
+    "could not resolve hostname",
+    "connection refused",
+    "connection timed out",
+    "operation timed out",
+    "failed to connect",
+    "couldn't connect",
+    "network is unreachable",
+    "no route to host",
+)
+
+
+def _ls_remote_command(repo_url: str) -> list[str]:
+    """Return the ``git ls-remote`` command listing *repo_url*'s tags.
 
-from .exceptions import ResolverError
+    Parameters:
+        repo_url: Full URL of the remote Git repository.
+
+    Returns:
+        The command line, newest version first.
+    """
+    return ["git", "ls-remote", "--tags", "--sort=-v:refname", repo_url]
+
+
+def _ls_remote_error(repo_url: str, stderr: str) -> ResolverError:
+    """Describe a failed ``git ls-remote``.
+
+    Parameters:
+        repo_url: The remote that was listed.
+        stderr: What git printed.
+
+    Returns:
+        The error to raise.
+    """
+    if "not found" in stderr or "fatal:" in stderr:
+        return ResolverError(f"Git: repository {repo_url} not found or no access")
+    return ResolverError(f"Git ls-remote failed for {repo_url}: {stderr}")
+
+
+def _is_unreachable(stderr: str) -> bool:
+    """Return True if *stderr* says the remote host is unreachable.
+
+    Parameters:
+        stderr: What a failed ``git ls-remote`` printed.
+
+    Returns:
+        True for DNS, connection and timeout errors.
+    """
+    stderr = stderr.lower()
+    return any(marker in stderr for marker in _UNREACHABLE_MARKERS)
+
+
+def _first_tag(output: str) -> str | None:
+    """Return the first non-peeled tag of ``git ls-remote`` output.
+
+    Parameters:
+        output: The command's standard output.
+
+    Returns:
+        The tag name (without ``refs/tags/`` prefix), or None.
+    """
+    for line in output.splitlines():
+        try:
+            _, ref = line.split("\t", 1)
+        except ValueError:
+            continue
+        ref = ref.strip()
+        if ref.endswith("^{}"):
+            continue
+        if ref.startswith("refs/tags/"):
+            return ref.replace("refs/tags/", "", 1)
+    return None
+
+
+def _tag_names(output: str) -> list[str]:
+    """Return every non-peeled tag of ``git ls-remote`` output.
+
+    Parameters:
+        output: The command's standard output.
+
+    Returns:
+        Tag names (without ``refs/tags/`` prefix), in output
+        order.
+    """
+    tags = []
+    for line in output.splitlines():
+        try:
+            _, ref = line.split("\t", 1)
+        except ValueError:
+            continue
+        ref = ref.strip()
+        if ref.startswith("refs/tags/") and not ref.endswith("^{}"):
+            tags.append(ref[len("refs/tags/") :])
+    return tags
 
 
 @dataclass
@@ -18,34 +140,98 @@ class GitClient:
 
     Attributes:
         timeout: Maximum seconds to wait for ``git ls-remote``.
+        http: Optional in-process lister tried first for
+            ``http(s)://`` remotes; ``git ls-remote`` runs when
+            it is absent or the remote does not speak its
+            protocol, but not when the host is unreachable.
+        breaker: Circuit breaker shared with the HTTP clients;
+            unreachable hosts are never skipped when omitted.
+        tag_cache: Optional cache of full tag lists; the latest
+            tag is then read from the cached list of the remote.
     """
 
     timeout: int = 20
+    http: SmartHttpClient | None = field(default=None, repr=False)
+    breaker: CircuitBreaker | None = field(default=None, repr=False)
+    tag_cache: ResolutionCache | None = field(default=None, repr=False)
 
-    def latest_ref(self, repo_url: str) -> str | None:
-        """Return the latest tag from a remote repository.
+    def _record(self, host: str, failure: object | None) -> None:
+        """Report the outcome of ``git ls-remote`` to the breaker.
 
-        Runs ``git ls-remote --tags --sort=-v:refname`` and
-        returns the first non-peeled tag (skips ``^{}`` lines).
+        Parameters:
+            host: Host of the remote; empty for local paths.
+            failure: The connection error or timeout, or None
+                when the host answered.
+        """
+        if self.breaker is None:
+            return
+        if failure is None:
+            self.breaker.record_success(host)
+        else:
+            self.breaker.record_failure(host, failure)
+
+    def _http_ref(self, repo_url: str) -> tuple[bool, str | None]:
+        """Try the in-process lister on *repo_url*.
 
         Parameters:
             repo_url: Full URL of the remote Git repository.
 
         Returns:
-            The tag name (without ``refs/tags/`` prefix),
-            or None when no tags exist.
+            ``(True, tag)`` when the lister answered, else
+            ``(False, None)`` and ``git ls-remote`` should run.
+
+        Raises:
+            NetworkError: If the host cannot be reached, which
+                ``git ls-remote`` would not change.
+        """
+        if self.http is None or not self.http.supports(repo_url):
+            return False, None
+        try:
+            return True, self.http.latest_ref(repo_url)
+        except ResolverError as exc:
+            logger.debug("Git HTTP listing of %s failed, running git: %s", repo_url, exc)
+            return False, None
+
+    def _http_tags(self, repo_url: str) -> tuple[bool, list[str]]:
+        """Try the in-process lister on *repo_url* for every tag.
+
+        Parameters:
+            repo_url: Full URL of the remote Git repository.
+
+        Returns:
+            ``(True, tags)`` when the lister answered, else
+            ``(False, [])`` and ``git ls-remote`` should run.
+
+        Raises:
+            NetworkError: If the host cannot be reached, which
+                ``git ls-remote`` would not change.
+        """
+        if self.http is None or not self.http.supports(repo_url):
+            return False, []
+        try:
+            return True, self.http.list_tags(repo_url)
+        except ResolverError as exc:
+            logger.debug("Git HTTP listing of %s failed, running git: %s", repo_url, exc)
+            return False, []
+
+    def _ls_remote(self, repo_url: str) -> str:
+        """Run ``git ls-remote`` on *repo_url*.
+
+        Parameters:
+            repo_url: Full URL of the remote Git repository.
+
+        Returns:
+            The command's standard output.
 
         Raises:
             ResolverError: When the git command fails due to
                 timeout, missing binary, or process error.
+            CircuitOpenError: When the breaker skips the host.
         """
-        cmd = [
-            "git",
-            "ls-remote",
-            "--tags",
-            "--sort=-v:refname",
-            repo_url,
-        ]
+        host = urlparse(repo_url).hostname or ""
+        if self.breaker is not None:
+            self.breaker.before_call(host)
+        cmd = _ls_remote_command(repo_url)
         try:
             result = subprocess.run(  # nosec B603
                 cmd,
@@ -55,24 +241,416 @@ class GitClient:
                 timeout=self.timeout,
             )
         except subprocess.TimeoutExpired as exc:
+            self._record(host, "git ls-remote timed out")
             raise ResolverError(f"Git ls-remote for {repo_url} timed out") from exc
         except subprocess.CalledProcessError as exc:
-            if "not found" in exc.stderr or "fatal:" in exc.stderr:
-                raise ResolverError(f"Git: repository {repo_url} not found or no access") from exc
-            raise ResolverError(f"Git ls-remote failed for {repo_url}: {exc.stderr}") from exc
+            self._record(host, exc.stderr.strip() if _is_unreachable(exc.stderr) else None)
+            raise _ls_remote_error(repo_url, exc.stderr) from exc
         except FileNotFoundError as exc:
             raise ResolverError("Git not installed or not in PATH") from exc
         except Exception as exc:
             raise ResolverError(f"Unexpected error running git ls-remote: {exc}") from exc
 
-        for line in result.stdout.splitlines():
-            try:
-                _, ref = line.split("\t", 1)
-            except ValueError:
-                continue
-            ref = ref.strip()
-            if ref.endswith("^{}"):
+        self._record(host, None)
+        return result.stdout
+
+    async def _ls_remote_async(self, repo_url: str) -> str:
+        """Run ``git ls-remote`` on *repo_url* as an asyncio subprocess.
+
+        Parameters:
+            repo_url: Full URL of the remote Git repository.
+
+        Returns:
+            The command's standard output.
+
+        Raises:
+            ResolverError: When the git command fails due to
+                timeout, missing binary, or process error.
+            CircuitOpenError: When the breaker skips the host.
+        """
+        host = urlparse(repo_url).hostname or ""
+        if self.breaker is not None:
+            self.breaker.before_call(host)
+        try:
+            process = await asyncio.create_subprocess_exec(  # nosec B603
+                *_ls_remote_command(repo_url),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except FileNotFoundError as exc:
+            raise ResolverError("Git not installed or not in PATH") from exc
+        except OSError as exc:
+            raise ResolverError(f"Unexpected error running git ls-remote: {exc}") from exc
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError as exc:
+            process.kill()
+            await process.wait()
+            self._record(host, "git ls-remote timed out")
+            raise ResolverError(f"Git ls-remote for {repo_url} timed out") from exc
+        if process.returncode:
+            message = stderr.decode("utf-8", "replace")
+            self._record(host, message.strip() if _is_unreachable(message) else None)
+            raise _ls_remote_error(repo_url, message)
+        self._record(host, None)
+        return stdout.decode("utf-8", "replace")
+
+    def latest_ref(self, repo_url: str) -> str | None:
+        """Return the latest tag from a remote repository.
+
+        Runs ``git ls-remote --tags --sort=-v:refname`` and
+        returns the first non-peeled tag (skips ``^{}`` lines).
+        With :attr:`http`, ``http(s)://`` remotes are listed
+        in-process first, with the same result. With
+        :attr:`tag_cache`, the tag list is cached and its first
+        tag returned.
+
+        Parameters:
+            repo_url: Full URL of the remote Git repository.
+
+        Returns:
+            The tag name (without ``refs/tags/`` prefix),
+            or None when no tags exist.
+
+        Raises:
+            ResolverError: When the git command fails due to
+                timeout, missing binary, or process error.
+            NetworkError: When the in-process lister cannot
+                reach the host.
+            CircuitOpenError: When the breaker skips the host.
+        """
+        if self.tag_cache is not None:
+            tags = self.tag_cache.resolve_tags(f"git {repo_url}", lambda: self.list_tags(repo_url))
+            return tags[0] if tags else None
+        answered, tag = self._http_ref(repo_url)
+        if answered:
+            return tag
+        return _first_tag(self._ls_remote(repo_url))
+
+    async def latest_ref_async(self, repo_url: str) -> str | None:
+        """Return the latest tag without blocking the event loop.
+
+        Same as :meth:`latest_ref`, but ``git ls-remote`` runs as
+        an asyncio subprocess, so many lookups can wait on the
+        network at once without a thread each. The in-process
+        lister, if any, runs on a worker thread.
+
+        Parameters:
+            repo_url: Full URL of the remote Git repository.
+
+        Returns:
+            The tag name (without ``refs/tags/`` prefix),
+            or None when no tags exist.
+
+        Raises:
+            ResolverError: When the git command fails due to
+                timeout, missing binary, or process error.
+            NetworkError: When the in-process lister cannot
+                reach the host.
+            CircuitOpenError: When the breaker skips the host.
+        """
+        if self.tag_cache is not None:
+            tags = await self.tag_cache.resolve_tags_async(
+                f"git {repo_url}",
+                lambda: self.list_tags_async(repo_url),
+                lambda: self.list_tags(repo_url),
+            )
+            return tags[0] if tags else None
+        if self.http is not None and self.http.supports(repo_url):
+            answered, tag = await asyncio.to_thread(self._http_ref, repo_url)
+            if answered:
+                return tag
+        return _first_tag(await self._ls_remote_async(repo_url))
+
+    def list_tags(self, repo_url: str) -> list[str]:
+        """Return every tag of a remote repository, latest first.
+
+        Lists the same tags as :meth:`latest_ref`, so the first
+        one is its answer.
+
+        Parameters:
+            repo_url: Full URL of the remote Git repository.
+
+        Returns:
+            Tag names (without ``refs/tags/`` prefix) in
+            ``--sort=-v:refname`` order; empty when no tags exist.
+
+        Raises:
+            ResolverError: See :meth:`latest_ref`.
+            NetworkError: See :meth:`latest_ref`.
+            CircuitOpenError: See :meth:`latest_ref`.
+        """
+        answered, tags = self._http_tags(repo_url)
+        if answered:
+            return tags
+        return _tag_names(self._ls_remote(repo_url))
+
+    async def list_tags_async(self, repo_url: str) -> list[str]:
+        """Coroutine version of :meth:`list_tags`.
+
+        Parameters:
+            repo_url: Full URL of the remote Git repository.
+
+        Returns:
+            Tag names, latest first.
+
+        Raises:
+            ResolverError: See :meth:`latest_ref`.
+            NetworkError: See :meth:`latest_ref`.
+            CircuitOpenError: See :meth:`latest_ref`.
+        """
+        if self.http is not None and self.http.supports(repo_url):
+            answered, tags = await asyncio.to_thread(self._http_tags, repo_url)
+            if answered:
+                return tags
+        return _tag_names(await self._ls_remote_async(repo_url))
+
+
+def changed_paths(root: str, rev: str, timeout: int = 20) -> list[str]:
+    """List files under *root* that changed since *rev*.
+
+    Runs ``git diff --name-only --relative`` inside *root*, so
+    the returned paths are relative to *root* and limited to
+    its subtree. Deleted files are omitted.
+
+    Parameters:
+        root: Directory inside a Git working tree.
+        rev: Any revision accepted by ``git diff`` (e.g.
+            ``origin/main`` or a commit SHA).
+        timeout: Maximum seconds to wait for ``git``.
+
+    Returns:
+        The changed paths, using ``/`` separators.
+
+    Raises:
+        ScanError: When *root* is not in a Git repository,
+            *rev* is unknown, or ``git`` cannot be run.
+    """
+    cmd = [
+        "git",
+        "-C",
+        root,
+        "diff",
+        "--name-only",
+        "-z",
+        "--relative",
+        "--diff-filter=d",
+        rev,
+        "--",
+    ]
+    try:
+        result = subprocess.run(  # nosec B603
+            cmd,
+            check=True,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise ScanError(f"git diff against {rev} timed out") from exc
+    except subprocess.CalledProcessError as exc:
+        raise ScanError(f"git diff against {rev} failed: {exc.stderr.strip()}") from exc
+    except FileNotFoundError as exc:
+        raise ScanError("Git not installed or not in PATH") from exc
+
+    return [path for path in result.stdout.split("\0") if path]
+
+
+def _run_z(cmd: list[str], what: str, timeout: int, ok_codes: tuple[int, ...] = (0,)) -> list[str]:
+    """Run a ``git`` command whose output is NUL-separated paths.
+
+    Parameters:
+        cmd: The full command line.
+        what: Short description used in error messages.
+        timeout: Maximum seconds to wait for ``git``.
+        ok_codes: Exit codes that are not failures.
+
+    Returns:
+        The non-empty output records, decoded as file names.
+
+    Raises:
+        ScanError: When ``git`` fails, times out, or is missing.
+    """
+    try:
+        result = subprocess.run(  # nosec B603
+            cmd,
+            check=False,
+            capture_output=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise ScanError(f"{what} timed out") from exc
+    except FileNotFoundError as exc:
+        raise ScanError("Git not installed or not in PATH") from exc
+    if result.returncode not in ok_codes:
+        stderr = result.stderr.decode("utf-8", "replace").strip()
+        raise ScanError(f"{what} failed: {stderr}")
+    return [os.fsdecode(path) for path in result.stdout.split(b"\0") if path]
+
+
+def grep_files(root: str, text: str, timeout: int = 60) -> list[str]:
+    """List tracked files under *root* that contain *text*.
+
+    Runs ``git grep -l -F`` (threaded, driven by the index) on
+    the worktree contents of tracked files, skipping binary
+    files and recursing into submodules.
+
+    Parameters:
+        root: Directory inside a Git worktree.
+        text: Literal string to search for.
+        timeout: Maximum seconds to wait for ``git``.
+
+    Returns:
+        Matching paths relative to *root*, in path order.
+
+    Raises:
+        ScanError: When *root* is not in a worktree or ``git``
+            cannot be run.
+    """
+    cmd = ["git", "-C", root, "grep", "-l", "-z", "-F", "-I", "--recurse-submodules", "-e", text]
+    # git grep exits with 1 when nothing matches.
+    return _run_z(cmd, "git grep", timeout, ok_codes=(0, 1))
+
+
+def untracked_paths(root: str, timeout: int = 60) -> list[str]:
+    """List untracked, non-ignored files under *root*.
+
+    Parameters:
+        root: Directory inside a Git worktree.
+        timeout: Maximum seconds to wait for ``git``.
+
+    Returns:
+        Paths relative to *root*.
+
+    Raises:
+        ScanError: When *root* is not in a worktree or ``git``
+            cannot be run.
+    """
+    cmd = ["git", "-C", root, "ls-files", "-z", "--others", "--exclude-standard"]
+    return _run_z(cmd, "git ls-files", timeout)
+
+
+# ``git ls-tree`` mode of symbolic links; their blob is the link
+# target, not file content.
+_SYMLINK_MODE = "120000"
+
+
+def list_tree(root: str, rev: str, timeout: int = 20) -> list[tuple[str, str]]:
+    """List the regular files of revision *rev*.
+
+    Runs ``git ls-tree -r`` in *root*, which may be a bare
+    repository. When *root* is a subdirectory of a worktree, only
+    the files below it are listed. Symlinks and submodules are
+    skipped.
+
+    Parameters:
+        root: A Git repository (bare or with a worktree).
+        rev: Any tree-ish, e.g. a branch, tag or commit SHA.
+        timeout: Maximum seconds to wait for ``git``.
+
+    Returns:
+        ``(path, blob_id)`` pairs in ``git ls-tree`` order, with
+        paths relative to *root*.
+
+    Raises:
+        ScanError: When *root* is not a repository, *rev* is
+            unknown, or ``git`` cannot be run.
+    """
+    cmd = ["git", "-C", root, "ls-tree", "-r", "-z", rev]
+    try:
+        result = subprocess.run(  # nosec B603
+            cmd,
+            check=True,
+            capture_output=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise ScanError(f"git ls-tree {rev} timed out") from exc
+    except subprocess.CalledProcessError as exc:
+        stderr = exc.stderr.decode("utf-8", "replace").strip()
+        raise ScanError(f"git ls-tree {rev} failed: {stderr}") from exc
+    except FileNotFoundError as exc:
+        raise ScanError("Git not installed or not in PATH") from exc
+
+    entries: list[tuple[str, str]] = []
+    for record in result.stdout.split(b"\0"):
+        meta, tab, path = record.partition(b"\t")
+        if not tab:
+            continue
+        mode, object_type, object_id = meta.decode("ascii").split(" ")
+        if object_type != "blob" or mode == _SYMLINK_MODE:
+            continue
+        entries.append((os.fsdecode(path), object_id))
+    return entries
+
+
+def iter_blobs(root: str, object_ids: Iterable[str]) -> Iterator[tuple[str, bytes | None]]:
+    """Stream blob contents through one ``git cat-file --batch``.
+
+    A single long-lived process serves every object. Requests
+    are written from a helper thread while responses are read,
+    so neither side blocks on a full pipe.
+
+    Parameters:
+        root: A Git repository (bare or with a worktree).
+        object_ids: Blob IDs to read.
+
+    Yields:
+        ``(object_id, content)`` pairs in request order;
+        *content* is None for missing objects.
+
+    Raises:
+        ScanError: When ``git`` cannot be started or its output
+            ends early.
+    """
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    cmd = ["git", "-C", root, "cat-file", "--batch"]
+    try:
+        process = subprocess.Popen(  # nosec B603
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except FileNotFoundError as exc:
+        raise ScanError("Git not installed or not in PATH") from exc
+    stdin, stdout = process.stdin, process.stdout
+    if stdin is None or stdout is None:
+        process.kill()
+        raise ScanError("git cat-file pipes are unavailable")
+
+    def _write_requests() -> None:
+        """Send every object ID, then close git's input."""
+        try:
+            for object_id in object_ids:
+                stdin.write(object_id.encode("ascii") + b"\n")
+            stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    writer = threading.Thread(target=_write_requests, daemon=True)
+    writer.start()
+    try:
+        for object_id in object_ids:
+            header = stdout.readline()
+            if not header:
+                raise ScanError(f"git cat-file ended before {object_id}")
+            fields = header.split()
+            if len(fields) != 3:
+                yield object_id, None
                 continue
-            if ref.startswith("refs/tags/"):
-                return ref.replace("refs/tags/", "", 1)
-        return None
+            size = int(fields[2])
+            content = stdout.read(size)
+            stdout.read(1)  # trailing newline
+            if len(content) != size:
+                raise ScanError(f"git cat-file returned a truncated {object_id}")
+            yield object_id, content
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        writer.join()
+        stdout.close()
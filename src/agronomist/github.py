@@ -2,21 +2,59 @@
 
 Uses the GitHub REST API to query the latest release or tag
 for a given repository. Falls back from releases to tags when
-no published release exists.
+no published release exists. :meth:`GitHubClient.latest_refs`
+resolves many repositories at once through the GraphQL API.
 """
 
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 
 import requests
 
-from .exceptions import AuthenticationError, NetworkError
+from .circuit import CircuitBreaker
+from .exceptions import AuthenticationError, NetworkError, RateLimitError
 from .http import build_session
+from .httpcache import CachedResponse, ConditionalCache
+from .ratelimit import RateLimitScheduler
 
 logger = logging.getLogger(__name__)
 
+# Repositories per GraphQL query. GitHub caps the cost of one
+# query, and 100 aliased repositories stay well below it.
+GRAPHQL_BATCH_SIZE = 50
+GRAPHQL_MAX_BATCH_SIZE = 100
+
+# Fields fetched per repository: the latest release, and the tag
+# whose commit is most recent, for repositories without releases.
+_GRAPHQL_REPO_FIELDS = (
+    "latestRelease { tagName } "
+    'refs(refPrefix: "refs/tags/", first: 1, '
+    "orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) { nodes { name } }"
+)
+
+
+def _graphql_query(repos: list[tuple[str, str]]) -> str:
+    """Build one aliased query for several repositories.
+
+    Owners and names are passed as variables (``$o0``, ``$n0``,
+    ...), never interpolated into the query text.
+
+    Parameters:
+        repos: ``(owner, name)`` pairs.
+
+    Returns:
+        The GraphQL document; repository *i* is aliased ``r<i>``.
+    """
+    params = ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(len(repos)))
+    fields = " ".join(
+        f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ {_GRAPHQL_REPO_FIELDS} }}"
+        for i in range(len(repos))
+    )
+    return f"query({params}) {{ {fields} }}"
+
 
 @dataclass
 class GitHubClient:
@@ -28,6 +66,13 @@ class GitHubClient:
         timeout: HTTP request timeout in seconds.
         retries: Number of automatic retries on transient errors.
         backoff_factor: Exponential backoff multiplier.
+        conditional_cache: Optional store of ``ETag`` and
+            ``Last-Modified`` validators; when set, release and
+            tag lookups are sent as conditional requests.
+        scheduler: Rate-limit scheduler shared with other
+            clients; each client creates its own when omitted.
+        breaker: Circuit breaker shared with other clients;
+            unreachable hosts are never skipped when omitted.
     """
 
     base_url: str
@@ -35,11 +80,16 @@ class GitHubClient:
     timeout: int = 20
     retries: int = 3
     backoff_factor: float = 0.5
+    conditional_cache: ConditionalCache | None = field(default=None, repr=False)
+    scheduler: RateLimitScheduler | None = field(default=None, repr=False)
+    breaker: CircuitBreaker | None = field(default=None, repr=False)
     _session: requests.Session = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         """Initialize the HTTP session with retry settings."""
-        self._session = build_session(self.retries, self.backoff_factor)
+        self._session = build_session(
+            self.retries, self.backoff_factor, self.scheduler, self.breaker
+        )
 
     def validate_token(self) -> bool:
         """Verify that the configured token is valid.
@@ -84,6 +134,30 @@ class GitHubClient:
             headers["Authorization"] = f"Bearer {self.token}"
         return headers
 
+    def _get(self, url: str) -> tuple[requests.Response, CachedResponse | None]:
+        """Send a GET, conditional when validators are stored.
+
+        Parameters:
+            url: The API URL.
+
+        Returns:
+            The response and the stored entry whose validators
+            were sent (None for an unconditional request). On
+            ``304 Not Modified`` the entry's value is current.
+
+        Raises:
+            requests.RequestException: On transport errors.
+        """
+        headers = self._headers()
+        cache = self.conditional_cache
+        cached = cache.lookup(url) if cache is not None else None
+        if cached is not None:
+            headers.update(cached.headers())
+        response = self._session.get(url, headers=headers, timeout=self.timeout)
+        if cache is not None and cached is not None and response.status_code == 304:
+            cache.record_not_modified()
+        return response, cached
+
     def latest_release_tag(self, repo: str) -> str | None:
         """Fetch the tag name of the latest published release.
 
@@ -95,11 +169,9 @@ class GitHubClient:
         """
         url = f"{self.base_url}/repos/{repo}/releases/latest"
         try:
-            response = self._session.get(
-                url,
-                headers=self._headers(),
-                timeout=self.timeout,
-            )
+            response, cached = self._get(url)
+            if response.status_code == 304 and cached is not None:
+                return cached.value
             if response.status_code == 404:
                 return None
             if response.status_code == 401:
@@ -113,7 +185,10 @@ class GitHubClient:
                 return None
             response.raise_for_status()
             data = response.json()
-            return str(data.get("tag_name"))
+            tag = str(data.get("tag_name"))
+            if self.conditional_cache is not None:
+                self.conditional_cache.store(url, response, tag)
+            return tag
         except requests.RequestException as exc:
             raise NetworkError(f"Error fetching release tag for {repo}: {exc}") from exc
 
@@ -128,11 +203,9 @@ class GitHubClient:
         """
         url = f"{self.base_url}/repos/{repo}/tags"
         try:
-            response = self._session.get(
-                url,
-                headers=self._headers(),
-                timeout=self.timeout,
-            )
+            response, cached = self._get(url)
+            if response.status_code == 304 and cached is not None:
+                return cached.value
             if response.status_code == 404:
                 return None
             if response.status_code == 401:
@@ -146,12 +219,120 @@ class GitHubClient:
                 return None
             response.raise_for_status()
             data = response.json()
-            if not data:
-                return None
-            return str(data[0].get("name"))
+            tag = str(data[0].get("name")) if data else None
+            if self.conditional_cache is not None:
+                self.conditional_cache.store(url, response, tag)
+            return tag
         except requests.RequestException as exc:
             raise NetworkError(f"Error fetching tags for {repo}: {exc}") from exc
 
+    def graphql_url(self) -> str:
+        """Return the GraphQL endpoint matching :attr:`base_url`.
+
+        Returns:
+            ``<base>/graphql`` for github.com, or
+            ``<host>/api/graphql`` for an Enterprise
+            ``<host>/api/v3`` base URL.
+        """
+        base = self.base_url.rstrip("/")
+        if base.endswith("/api/v3"):
+            return base[: -len("/v3")] + "/graphql"
+        return base + "/graphql"
+
+    def _graphql_batch(self, repos: list[str]) -> dict[str, str | None]:
+        """Resolve one batch of repositories with a single query.
+
+        Parameters:
+            repos: Repositories in ``owner/name`` format.
+
+        Returns:
+            The latest release tag, else the most recent tag,
+            of every repository the query answered; None for
+            repositories without either, or not found.
+
+        Raises:
+            NetworkError: If the request fails, is rejected, or
+                returns no data.
+        """
+        pairs: list[tuple[str, str]] = []
+        variables: dict[str, str] = {}
+        for i, repo in enumerate(repos):
+            owner, name = repo.split("/")
+            pairs.append((owner, name))
+            variables[f"o{i}"] = owner
+            variables[f"n{i}"] = name
+        try:
+            response = self._session.post(
+                self.graphql_url(),
+                json={"query": _graphql_query(pairs), "variables": variables},
+                headers=self._headers(),
+                timeout=self.timeout,
+            )
+            if response.status_code in (401, 403):
+                raise NetworkError(f"GitHub GraphQL request rejected ({response.status_code})")
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise NetworkError(f"Error querying GitHub GraphQL: {exc}") from exc
+
+        data = payload.get("data") if isinstance(payload, dict) else None
+        if not isinstance(data, dict):
+            errors = payload.get("errors") if isinstance(payload, dict) else None
+            raise NetworkError(f"GitHub GraphQL returned no data: {errors}")
+
+        refs: dict[str, str | None] = {}
+        for i, repo in enumerate(repos):
+            node = data.get(f"r{i}")
+            if not isinstance(node, dict):
+                refs[repo] = None
+                continue
+            release = node.get("latestRelease") or {}
+            tags = (node.get("refs") or {}).get("nodes") or []
+            tag = release.get("tagName") or (tags[0].get("name") if tags else None)
+            refs[repo] = str(tag) if tag else None
+        return refs
+
+    def latest_refs(
+        self,
+        repos: Iterable[str],
+        batch_size: int = GRAPHQL_BATCH_SIZE,
+    ) -> dict[str, str | None]:
+        """Resolve many repositories through the GraphQL API.
+
+        Each query covers up to *batch_size* repositories and
+        fetches, for each, the latest release and the tag with
+        the most recent commit, so a whole organisation takes a
+        handful of requests instead of one or two per repository.
+        The GraphQL API requires a token.
+
+        Parameters:
+            repos: Repositories in ``owner/name`` format.
+            batch_size: Repositories per query, at most
+                ``GRAPHQL_MAX_BATCH_SIZE``.
+
+        Returns:
+            The latest release tag, else the most recent tag, of
+            every repository a query answered (None when it has
+            neither or was not found). Repositories of failed
+            batches, and malformed names, are left out so callers
+            can fall back to :meth:`latest_ref`.
+        """
+        if not self.token:
+            logger.warning("GitHub GraphQL requires a token; resolving through the REST API.")
+            return {}
+        size = max(1, min(batch_size, GRAPHQL_MAX_BATCH_SIZE))
+        valid = [repo for repo in dict.fromkeys(repos) if repo.count("/") == 1]
+        refs: dict[str, str | None] = {}
+        for start in range(0, len(valid), size):
+            batch = valid[start : start + size]
+            try:
+                refs.update(self._graphql_batch(batch))
+            except NetworkError as exc:
+                logger.warning(
+                    "GitHub GraphQL batch of %d repositories failed: %s", len(batch), exc
+                )
+        return refs
+
     def latest_ref(self, repo: str) -> str | None:
         """Return the latest version ref for a repository.
 
@@ -168,6 +349,9 @@ class GitHubClient:
             tag = self.latest_release_tag(repo)
             if tag:
                 return tag
+        except RateLimitError as exc:
+            logger.warning("GitHub: rate limited while resolving %s: %s", repo, exc)
+            return None
         except NetworkError as exc:
             logger.debug(
                 "GitHub: failed to fetch latest release for %s, falling back to tags: %s",
@@ -176,5 +360,8 @@ class GitHubClient:
             )
         try:
             return self.latest_tag(repo)
+        except RateLimitError as exc:
+            logger.warning("GitHub: rate limited while resolving %s: %s", repo, exc)
+            return None
         except NetworkError:
             return None
@@ -8,12 +8,15 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass, field
-from urllib.parse import urlparse
+from urllib.parse import urlencode, urlparse
 
 import requests
 
-from .exceptions import AuthenticationError, NetworkError
+from .circuit import CircuitBreaker
+from .exceptions import AuthenticationError, CircuitOpenError, NetworkError, RateLimitError
 from .http import build_session
+from .httpcache import ConditionalCache
+from .ratelimit import RateLimitScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,13 @@ class GitLabClient:
         timeout: HTTP request timeout in seconds.
         retries: Number of automatic retries on transient errors.
         backoff_factor: Exponential backoff multiplier.
+        conditional_cache: Optional store of ``ETag`` and
+            ``Last-Modified`` validators; when set, tag lookups
+            are sent as conditional requests.
+        scheduler: Rate-limit scheduler shared with other
+            clients; each client creates its own when omitted.
+        breaker: Circuit breaker shared with other clients;
+            unreachable hosts are never skipped when omitted.
     """
 
     base_url: str
@@ -35,11 +45,16 @@ class GitLabClient:
     timeout: int = 20
     retries: int = 3
     backoff_factor: float = 0.5
+    conditional_cache: ConditionalCache | None = field(default=None, repr=False)
+    scheduler: RateLimitScheduler | None = field(default=None, repr=False)
+    breaker: CircuitBreaker | None = field(default=None, repr=False)
     _session: requests.Session = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         """Initialize the HTTP session with retry settings."""
-        self._session = build_session(self.retries, self.backoff_factor)
+        self._session = build_session(
+            self.retries, self.backoff_factor, self.scheduler, self.breaker
+        )
 
     @staticmethod
     def detect_gitlab_host(repo_url: str) -> str | None:
@@ -121,18 +136,24 @@ class GitLabClient:
             The tag name string, or None on any error.
         """
         effective_url = base_url or self.base_url
+        params = {"per_page": "1", "order_by": "updated", "sort": "desc"}
         url = f"{effective_url}/api/v4/projects/{project_id}/repository/tags"
+        cache_key = f"{url}?{urlencode(params)}"
+        headers = self._headers()
+        cache = self.conditional_cache
+        cached = cache.lookup(cache_key) if cache is not None else None
+        if cached is not None:
+            headers.update(cached.headers())
         try:
             response = self._session.get(
                 url,
-                headers=self._headers(),
+                headers=headers,
                 timeout=self.timeout,
-                params={
-                    "per_page": 1,
-                    "order_by": "updated",
-                    "sort": "desc",
-                },  # type: ignore[arg-type]
+                params=params,
             )
+            if cache is not None and cached is not None and response.status_code == 304:
+                cache.record_not_modified()
+                return cached.value
             if response.status_code == 404:
                 return None
             if response.status_code == 401:
@@ -149,9 +170,10 @@ class GitLabClient:
                 return None
             response.raise_for_status()
             data = response.json()
-            if not data:
-                return None
-            return str(data[0].get("name"))
+            tag = str(data[0].get("name")) if data else None
+            if cache is not None:
+                cache.store(cache_key, response, tag)
+            return tag
         except requests.RequestException as exc:
             raise NetworkError(f"Error fetching GitLab tags for {project_id}: {exc}") from exc
 
@@ -178,6 +200,12 @@ class GitLabClient:
                 project_id,
                 base_url=host_url,
             )
+        except RateLimitError as exc:
+            logger.warning("GitLab: rate limited while resolving %s: %s", repo_url, exc)
+            return None
+        except CircuitOpenError as exc:
+            logger.debug("GitLab: skipped %s: %s", repo_url, exc)
+            return None
         except Exception as e:
             logger.error("Error processing repo_url for GitLab: %s", e)
             return None
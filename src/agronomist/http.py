@@ -2,29 +2,43 @@
 
 Provides a pre-configured ``requests.Session`` with automatic
 retry and exponential backoff, used by both the GitHub and
-GitLab clients.
+GitLab clients. Requests are scheduled by a
+:class:`~agronomist.ratelimit.RateLimitScheduler`, which handles
+rate limiting (``429``, ``Retry-After``, exhausted quotas), and
+optionally guarded by a :class:`~agronomist.circuit.CircuitBreaker`.
 """
 
 from __future__ import annotations
 
 import requests
-from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .circuit import CircuitBreaker
+from .ratelimit import RateLimitAdapter, RateLimitScheduler
+
 
 def build_session(
     retries: int = 3,
     backoff_factor: float = 0.5,
+    scheduler: RateLimitScheduler | None = None,
+    breaker: CircuitBreaker | None = None,
 ) -> requests.Session:
     """Return a ``requests.Session`` with retry and backoff.
 
     The session automatically retries on transient HTTP errors
-    (429, 500, 502, 503, 504) using exponential backoff.
+    (500, 502, 503, 504) using exponential backoff. Rate-limited
+    responses (429, and 403 from a rate limit) are left to
+    *scheduler*, which pauses every request to the host for as
+    long as the server asks.
 
     Parameters:
         retries: Maximum number of retry attempts per request.
         backoff_factor: Multiplier applied between retries
             (e.g. 0.5 produces delays of 0.5 s, 1 s, 2 s, ...).
+        scheduler: Scheduler shared with other sessions; a new
+            one is created when omitted.
+        breaker: Circuit breaker shared with other sessions and
+            the git client; hosts are never skipped when omitted.
 
     Returns:
         A ``requests.Session`` configured with retry adapters
@@ -34,11 +48,13 @@ def build_session(
     retry = Retry(
         total=retries,
         backoff_factor=backoff_factor,
-        status_forcelist=[429, 500, 502, 503, 504],
+        status_forcelist=[500, 502, 503, 504],
         allowed_methods=["GET"],
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = RateLimitAdapter(
+        scheduler or RateLimitScheduler(), breaker=breaker, max_retries=retry
+    )
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
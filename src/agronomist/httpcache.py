@@ -0,0 +1,139 @@
+"""Persistent validators for conditional API requests.
+
+Stores, per request URL, the ``ETag`` and ``Last-Modified`` headers
+of the last successful response together with the value the client
+parsed from it, in a small SQLite database next to the scan index.
+The GitHub and GitLab clients send them back as ``If-None-Match``
+and ``If-Modified-Since``; on ``304 Not Modified`` the stored value
+is reused without downloading or parsing the body. GitHub does not
+count such responses against the rate limit.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+import requests
+
+from .fileutil import ensure_cache_dir
+from .models import ConditionalStats
+
+HTTP_CACHE_FILE = "http-cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    value TEXT,
+    stored_at REAL NOT NULL
+)
+"""
+
+
+class CachedResponse(NamedTuple):
+    """Validators and parsed value of a stored response.
+
+    Attributes:
+        etag: The ``ETag`` header, if any.
+        last_modified: The ``Last-Modified`` header, if any.
+        value: What the client parsed from the body (None for
+            an empty tag list).
+    """
+
+    etag: str | None
+    last_modified: str | None
+    value: str | None
+
+    def headers(self) -> dict[str, str]:
+        """Return the conditional request headers.
+
+        Returns:
+            ``If-None-Match`` and/or ``If-Modified-Since``.
+        """
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ConditionalCache:
+    """SQLite-backed store of response validators keyed by URL.
+
+    Safe to use from the resolution thread pool: every database
+    access holds one lock.
+
+    Attributes:
+        path: Location of the database file.
+        stats: Counters of revalidated and downloaded responses.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open (creating if needed) the cache database.
+
+        Parameters:
+            path: Location of the database file.
+
+        Raises:
+            OSError: If the cache directory cannot be created.
+            sqlite3.Error: If the database cannot be opened.
+        """
+        self.path = path
+        self.stats = ConditionalStats()
+        ensure_cache_dir(os.path.dirname(path))
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute(_SCHEMA)
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        """Return the stored response for *url*.
+
+        Parameters:
+            url: The request URL.
+
+        Returns:
+            The stored validators and value, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, value FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        return None if row is None else CachedResponse(*row)
+
+    def record_not_modified(self) -> None:
+        """Count a ``304 Not Modified`` answer to a lookup."""
+        with self._lock:
+            self.stats.not_modified += 1
+
+    def store(self, url: str, response: requests.Response, value: str | None) -> None:
+        """Record a successful response and the value parsed from it.
+
+        Responses without an ``ETag`` or ``Last-Modified`` header
+        cannot be revalidated and are not stored.
+
+        Parameters:
+            url: The request URL.
+            response: The ``200`` response.
+            value: What the client parsed from the body.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        with self._lock:
+            self.stats.fetched += 1
+            if not etag and not last_modified:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, value, time.time()),
+            )
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
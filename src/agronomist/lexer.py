@@ -0,0 +1,356 @@
+"""Single-pass HCL lexer that extracts module ``source`` values.
+
+Scans raw Terraform/Terragrunt bytes once, from left to right,
+and reports every ``source = "..."`` attribute together with its
+line and column. Comments (``#``, ``//``, ``/* */``), quoted
+strings, and heredocs are skipped as whole tokens, so a
+``source = "git::..."`` that only appears inside one of them is
+never reported.
+
+The lexer relies on one property of HCL: quoted strings and
+``#``/``//`` comments never span lines, so only block comments and
+heredocs carry state from one line to the next. It therefore jumps
+straight to each ``source`` keyword with one compiled regex search,
+located in C like the plain regex scan it replaced, and only lexes
+the part of that line between the last position known to be code
+and the keyword to decide whether the keyword is code or sits in a
+string or comment. ``/*`` and ``<<`` openers, found with
+``bytes.find``, are classified the same way and skipped as a whole
+when in code. The lexer state carries forward from one keyword to
+the next, so no byte is lexed twice and the cost stays linear in
+the file size, even with thousands of attributes on one line.
+"""
+
+from __future__ import annotations
+
+import mmap
+import re
+from collections.abc import Iterator
+from typing import NamedTuple
+
+Buffer = bytes | mmap.mmap
+
+# Openers of the only constructs that span lines (block comments
+# and heredocs), each located with ``bytes.find``.
+_BLOCK_COMMENT = b"/*"
+_HEREDOC = b"<<"
+
+# The ``source`` attribute name as a whole identifier (``-`` is an
+# identifier byte, so ``my-source`` and ``resource`` do not match),
+# together with the common ``= "value"`` form (no escapes,
+# interpolation or line break) in the same match. This is the hot
+# path: one C-level ``finditer`` over the buffer, as with the
+# regex the scanner used before the lexer. The boundary lookbehind
+# comes after the literal so that the search keeps its fast
+# literal-prefix scan.
+_SOURCE_RE = re.compile(rb'source(?<![\w-]source)(?![\w-])(?:[ \t]*=[ \t]*"([^"\\\n$%\']*)")?')
+
+# Tokens that change the lexing state within a single line.
+_LINE_STOP_RE = re.compile(rb'["#]|//|/\*')
+
+# ``=`` followed by the opening quote of the attribute value.
+# Single quotes are not valid HCL but were historically accepted.
+_ASSIGN_RE = re.compile(rb"[ \t]*=[ \t]*([\"'])")
+
+# Inside a quoted string: the closing quote, an escape, an
+# unterminated line, an escaped ``$${``/``%%{``, or the start of an
+# interpolation/directive.
+_STRING_STOP_RE = re.compile(rb'["\\\n]|\$\$\{|%%\{|[$%]\{')
+
+# Inside an interpolation: nesting braces, nested strings, or an
+# unterminated line.
+_TEMPLATE_STOP_RE = re.compile(rb'[{}"\n]')
+
+# ``<<EOF`` / ``<<-EOF`` heredoc opener, up to the end of its line.
+_HEREDOC_RE = re.compile(rb"<<-?([A-Za-z_][\w-]*)[ \t]*\r?\n")
+
+_QUOTE = ord('"')
+_NEWLINE = ord("\n")
+
+
+class SourceToken(NamedTuple):
+    """A ``source`` attribute value found by the lexer.
+
+    A named tuple rather than a dataclass: one is built per
+    attribute in the scanner's hot loop.
+
+    Attributes:
+        value: The undecoded attribute value, without quotes.
+        line: 1-based line of the ``source`` keyword.
+        column: 1-based byte column of the ``source`` keyword.
+    """
+
+    value: bytes
+    line: int
+    column: int
+
+
+def _skip_template(buf: Buffer, pos: int) -> int:
+    """Skip an interpolation body that starts after ``${``.
+
+    Parameters:
+        buf: The buffer being lexed.
+        pos: Offset just after the opening brace.
+
+    Returns:
+        The offset just after the matching ``}``. An unterminated
+        interpolation ends at the end of its line so that one
+        malformed value cannot hide the rest of the file.
+    """
+    depth = 1
+    while True:
+        match = _TEMPLATE_STOP_RE.search(buf, pos)
+        if match is None:
+            return len(buf)
+        char = buf[match.start()]
+        if char == _QUOTE:
+            pos = _skip_string(buf, match.end())
+            if buf[pos - 1] == _NEWLINE:
+                # The nested string ran to the end of the line.
+                return pos - 1
+        elif char == ord("{"):
+            depth += 1
+            pos = match.end()
+        elif char == ord("}"):
+            depth -= 1
+            pos = match.end()
+            if depth == 0:
+                return pos
+        else:
+            return match.start()
+
+
+def _skip_string(buf: Buffer, pos: int) -> int:
+    """Skip a quoted template that starts after its opening quote.
+
+    Parameters:
+        buf: The buffer being lexed.
+        pos: Offset just after the opening ``"``.
+
+    Returns:
+        The offset just after the closing quote. An unterminated
+        string ends at the end of its line.
+    """
+    while True:
+        match = _STRING_STOP_RE.search(buf, pos)
+        if match is None:
+            return len(buf)
+        token = match.group()
+        if token == b'"' or token == b"\n":
+            return match.end()
+        if token == b"\\":
+            # An escape never continues the string on the next line.
+            pos = match.end() + (buf[match.end() : match.end() + 1] != b"\n")
+        elif token in (b"$${", b"%%{"):
+            pos = match.end()
+        else:
+            pos = _skip_template(buf, match.end())
+
+
+def _skip_heredoc(buf: Buffer, body_start: int, marker: bytes) -> int | None:
+    """Skip a heredoc body up to its closing marker line.
+
+    Parameters:
+        buf: The buffer being lexed.
+        body_start: Offset of the first body line.
+        marker: The heredoc identifier (e.g. ``b"EOF"``).
+
+    Returns:
+        The offset just after the closing marker, or None when
+        the heredoc is never closed.
+    """
+    pos = body_start  # always a line start
+    while True:
+        found = buf.find(marker, pos)
+        if found == -1:
+            return None
+        line_start = buf.rfind(b"\n", pos - 1, found) + 1
+        line_end = buf.find(b"\n", found)
+        if line_end == -1:
+            line_end = len(buf)
+        end = found + len(marker)
+        if not buf[line_start:found].strip(b" \t") and not buf[end:line_end].strip(b" \t\r"):
+            return end
+        # The marker must be alone on its line: skip the whole line.
+        pos = line_end + 1
+
+
+def _code_until(buf: Buffer, pos: int, end: int) -> int:
+    """Lex one line from *pos* up to *end*.
+
+    Parameters:
+        buf: The buffer being lexed.
+        pos: An offset known to be in code on the same line as
+            *end*, with no string or comment open.
+        end: The offset to classify.
+
+    Returns:
+        *end* when it is in code. Otherwise the offset at which
+        code resumes after the quoted string, line comment or
+        block comment that contains *end*.
+    """
+    while True:
+        match = _LINE_STOP_RE.search(buf, pos, end)
+        if match is None:
+            return end
+        token = match.group()
+        if token == b'"':
+            pos = _skip_string(buf, match.end())
+            if pos > end:
+                return pos
+        elif token == b"/*":
+            close = buf.find(b"*/", match.end())
+            if close == -1:
+                return len(buf)
+            pos = close + 2
+            if pos > end:
+                return pos
+        else:
+            line_end = buf.find(b"\n", match.end())
+            return len(buf) if line_end == -1 else line_end + 1
+
+
+def _read_value(buf: Buffer, pos: int) -> tuple[bytes | None, int]:
+    """Read a ``source`` value that :data:`_SOURCE_RE` did not.
+
+    Parameters:
+        buf: The buffer being lexed.
+        pos: Offset just after the ``source`` keyword.
+
+    Returns:
+        A ``(value, resume)`` pair. *value* is None when the
+        keyword is not followed by ``=`` and a plain quoted value
+        (no quotes, escapes-with-quotes, or newlines inside);
+        *resume* is where lexing continues.
+    """
+    assign = _ASSIGN_RE.match(buf, pos)
+    if assign is None:
+        return None, pos
+    quote = assign.group(1)
+    value_start = assign.end()
+    if quote == b'"':
+        resume = _skip_string(buf, value_start)
+        value_end = resume - 1
+    else:
+        value_end = buf.find(quote, value_start)
+        resume = len(buf) if value_end == -1 else value_end + 1
+    if value_end <= value_start or buf[value_end] != quote[0]:
+        return None, resume
+    value = bytes(buf[value_start:value_end])
+    if b'"' in value or b"'" in value or b"\n" in value:
+        return None, resume
+    return value, resume
+
+
+def _skip_multiline(buf: Buffer, start: int) -> int | None:
+    """Skip the block comment or heredoc opened in code at *start*.
+
+    Parameters:
+        buf: The buffer being lexed.
+        start: Offset of a ``/*`` or ``<<`` opener.
+
+    Returns:
+        The offset just after the construct (just after ``<<``
+        when it does not open a heredoc), or None when it is never
+        closed and hides the rest of the buffer.
+    """
+    if buf[start : start + 2] == _BLOCK_COMMENT:
+        close = buf.find(b"*/", start + 2)
+        return None if close == -1 else close + 2
+    heredoc = _HEREDOC_RE.match(buf, start)
+    if heredoc is None:
+        return start + 2
+    return _skip_heredoc(buf, heredoc.end(), heredoc.group(1))
+
+
+def iter_source_tokens(buf: Buffer) -> Iterator[SourceToken]:
+    """Yield every ``source`` attribute value in *buf*.
+
+    Parameters:
+        buf: Raw file content (``bytes`` or a read-only mmap).
+
+    Yields:
+        One SourceToken per ``source = "..."`` attribute outside
+        comments, strings and heredocs, in file order.
+    """
+    size = len(buf)
+    code = 0  # offset in code; nothing before it is lexed again
+    line_start = 0  # start of the line containing ``code``
+    line = 1
+    counted = 0  # newlines before this offset are already in ``line``
+    # Next block comment and heredoc opener at or after ``code``;
+    # ``size`` once exhausted.
+    next_comment = buf.find(_BLOCK_COMMENT)
+    if next_comment == -1:
+        next_comment = size
+    next_heredoc = buf.find(_HEREDOC)
+    if next_heredoc == -1:
+        next_heredoc = size
+    opener = min(next_comment, next_heredoc)
+    search_from: int | None = 0
+    while search_from is not None:
+        keywords = _SOURCE_RE.finditer(buf, search_from)
+        # Set when a match may have swallowed a later keyword.
+        search_from = None
+        for keyword in keywords:
+            start = keyword.start()
+
+            # Multi-line constructs opened before the keyword.
+            while opener < start:
+                newline = buf.rfind(b"\n", code, opener)
+                if newline != -1:
+                    line_start = code = newline + 1
+                resume = _code_until(buf, code, opener)
+                if resume == opener:
+                    skipped = _skip_multiline(buf, opener)
+                    if skipped is None:
+                        return
+                    resume = skipped
+                newline = buf.rfind(b"\n", code, resume)
+                if newline != -1:
+                    line_start = newline + 1
+                code = resume
+                if next_comment < code:
+                    next_comment = buf.find(_BLOCK_COMMENT, code)
+                    if next_comment == -1:
+                        next_comment = size
+                if next_heredoc < code:
+                    next_heredoc = buf.find(_HEREDOC, code)
+                    if next_heredoc == -1:
+                        next_heredoc = size
+                opener = min(next_comment, next_heredoc)
+
+            if start >= code:
+                newline = buf.rfind(b"\n", code, start)
+                if newline != -1:
+                    line_start = code = newline + 1
+                if _LINE_STOP_RE.search(buf, code, start) is not None:
+                    resume = _code_until(buf, code, start)
+                    if resume != start:
+                        newline = buf.rfind(b"\n", code, resume)
+                        if newline != -1:
+                            line_start = newline + 1
+                        code = resume
+            if start < code:
+                # Inside a string or comment.
+                if keyword.end() > code:
+                    search_from = code
+                    break
+                continue
+
+            value = keyword.group(1)
+            if value is not None:
+                end = keyword.end()
+            else:
+                value, end = _read_value(buf, keyword.end())
+            if value:
+                line += buf[counted:start].count(b"\n")
+                counted = start
+                yield SourceToken(value, line, start - line_start + 1)
+            if end > keyword.end():
+                newline = buf.rfind(b"\n", start, end)
+                if newline != -1:
+                    line_start = newline + 1
+                code = search_from = end
+                break
+            code = end
@@ -54,6 +54,36 @@ def _group_by_module(
     return by_module
 
 
+def _tripped_hosts_section(report: dict[str, Any]) -> list[str]:
+    """Render the hosts whose circuit breaker opened.
+
+    Parameters:
+        report: Report dict, optionally containing
+            ``tripped_hosts``.
+
+    Returns:
+        Markdown lines, or an empty list when no host tripped.
+    """
+    tripped = report.get("tripped_hosts") or []
+    if not tripped:
+        return []
+    lines = [
+        "## Unreachable Hosts",
+        "",
+        "Lookups against these hosts were skipped after repeated connection",
+        "failures, so their repositories may have unreported updates.",
+        "",
+        "| Host | Trips | Still open | Last error |",
+        "| --- | --- | --- | --- |",
+    ]
+    for host in tripped:
+        error = str(host.get("last_error", "")).replace("|", "\\|").replace("\n", " ")
+        still_open = "yes" if host.get("open") else "no"
+        lines.append(f"| `{host.get('host')}` | {host.get('trips', 0)} | {still_open} | {error} |")
+    lines.append("")
+    return lines
+
+
 def generate_markdown(report: dict[str, Any]) -> str:
     """Render a full Markdown report from a report dict.
 
@@ -66,7 +96,15 @@ def generate_markdown(report: dict[str, Any]) -> str:
     """
     updates = report.get("updates", [])
     if not updates:
-        return "# Agronomist Report\n\nNo updates available.\n"
+        return "\n".join(
+            [
+                "# Agronomist Report",
+                "",
+                "No updates available.",
+                "",
+                *_tripped_hosts_section(report),
+            ]
+        )
 
     lines = [
         "# Agronomist Report",
@@ -91,6 +129,7 @@ def generate_markdown(report: dict[str, Any]) -> str:
             "",
         ]
     )
+    lines.extend(_tripped_hosts_section(report))
 
     lines.extend(
         [
@@ -5,6 +5,70 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
 
+# Hosts whose owner and repository names are case-insensitive.
+# Self-hosted GitHub and GitLab instances are added with
+# :func:`add_case_insensitive_hosts`, which replaces the set rather
+# than mutating it, so caches can key on the set in use.
+_CASE_INSENSITIVE_HOSTS = frozenset({"github.com", "gitlab.com", "bitbucket.org"})
+
+
+def add_case_insensitive_hosts(*hosts: str) -> None:
+    """Treat repository paths on *hosts* as case-insensitive.
+
+    The CLI registers the hosts of its configured GitHub and
+    GitLab base URLs before scanning, so that every spelling of
+    a repository on a self-hosted forge shares one key. Keys
+    derived earlier are not updated, but caches keyed on
+    :func:`case_insensitive_hosts` miss once it changes.
+
+    Parameters:
+        hosts: Host names, without user or port; empty names
+            are ignored.
+    """
+    global _CASE_INSENSITIVE_HOSTS
+    added = {host.lower().rstrip(".") for host in hosts if host}
+    if not added <= _CASE_INSENSITIVE_HOSTS:
+        _CASE_INSENSITIVE_HOSTS = _CASE_INSENSITIVE_HOSTS | added
+
+
+def case_insensitive_hosts() -> frozenset[str]:
+    """Return the hosts whose repository paths are case-insensitive.
+
+    Returns:
+        The known forges plus every registered host. The same
+        object is returned until hosts are added.
+    """
+    return _CASE_INSENSITIVE_HOSTS
+
+
+def canonical_repo_key(host: str, path: str) -> str:
+    """Return the identity of the repository at *host*/*path*.
+
+    Every spelling of a remote that names the same repository
+    (HTTPS or SSH, SCP-style or ``ssh://``, with or without
+    ``.git``, different letter case on github.com, gitlab.com,
+    bitbucket.org or a host added with
+    :func:`add_case_insensitive_hosts`) maps to the same key, and
+    the same path on two hosts never does. Paths on other hosts
+    keep their case, as plain git servers usually serve them
+    from a case-sensitive file system.
+
+    Parameters:
+        host: Repository host name, without user or port.
+        path: Repository path, such as ``owner/name.git``.
+
+    Returns:
+        ``host/path``, with the host lower-cased and the path
+        stripped of empty segments and a ``.git`` suffix.
+    """
+    host = host.lower().rstrip(".")
+    path = "/".join(part for part in path.split("/") if part)
+    if path.lower().endswith(".git"):
+        path = path[:-4]
+    if host in _CASE_INSENSITIVE_HOSTS:
+        path = path.lower()
+    return f"{host}/{path}"
+
 
 @dataclass(frozen=True)
 class SourceRef:
@@ -18,6 +82,13 @@ class SourceRef:
         repo_host: Hostname of the repository (e.g. ``github.com``).
         ref: Current version ref (tag or branch).
         module: Optional sub-module path inside the repository.
+        line: 1-based line of the ``source`` attribute, when known.
+        column: 1-based column of the ``source`` attribute, when
+            known.
+        repo_key: Canonical repository identity from
+            :func:`canonical_repo_key`, used to resolve each remote
+            once; derived from ``repo_host`` and ``repo`` when
+            omitted.
     """
 
     file_path: str
@@ -27,6 +98,125 @@ class SourceRef:
     repo_host: str
     ref: str
     module: str | None = None
+    line: int | None = None
+    column: int | None = None
+    repo_key: str = ""
+
+    def __post_init__(self) -> None:
+        """Derive ``repo_key`` when it was not given."""
+        if not self.repo_key:
+            object.__setattr__(self, "repo_key", canonical_repo_key(self.repo_host, self.repo))
+
+
+@dataclass
+class ScanStats:
+    """Mutable counters collected while scanning.
+
+    Attributes:
+        files_scanned: Number of files read (and parsed, unless
+            counted in ``files_reused``).
+        files_cached: Number of unchanged files served from
+            the scan index without being read.
+        dirs_pruned: Number of directories skipped without
+            being walked.
+        files_deduplicated: Number of paths whose refs were
+            copied from another path to the same physical file
+            (symlinks or hard links) instead of being parsed.
+        files_reused: Number of files whose content (by Git blob
+            ID) had already been parsed, earlier in the run or in
+            a previous run, so the cached refs were used.
+    """
+
+    files_scanned: int = 0
+    files_cached: int = 0
+    dirs_pruned: int = 0
+    files_deduplicated: int = 0
+    files_reused: int = 0
+
+
+@dataclass
+class ResolveStats:
+    """Mutable counters of the resolution cache.
+
+    Attributes:
+        hits: Lookups answered by a fresh cached ref.
+        negative_hits: Lookups answered by a fresh cached
+            failure or empty result.
+        stale: Lookups answered by an expired ref while it was
+            refreshed in the background.
+        misses: Lookups that went to the network.
+        refreshed: Background refreshes that completed.
+    """
+
+    hits: int = 0
+    negative_hits: int = 0
+    stale: int = 0
+    misses: int = 0
+    refreshed: int = 0
+
+
+@dataclass
+class ConditionalStats:
+    """Mutable counters of conditional API requests.
+
+    Attributes:
+        not_modified: Responses answered with ``304 Not
+            Modified`` and served from stored values.
+        fetched: Responses downloaded and parsed in full.
+    """
+
+    not_modified: int = 0
+    fetched: int = 0
+
+
+@dataclass
+class RateLimitStats:
+    """Mutable counters of API rate limiting.
+
+    Attributes:
+        throttled: Responses rejected by a rate limit (``429``,
+            or ``403`` with ``Retry-After`` or no quota left).
+        waited: Seconds requests spent waiting for a host's
+            rate limit, summed over all threads.
+    """
+
+    throttled: int = 0
+    waited: float = 0.0
+
+
+@dataclass(frozen=True)
+class TrippedHost:
+    """A host whose circuit breaker opened during a run.
+
+    Attributes:
+        host: Lower-case host name.
+        trips: Number of times the circuit opened.
+        failures: Consecutive connection failures or timeouts
+            at the end of the run.
+        open: True when the host had not answered again by the
+            end of the run.
+        last_error: Description of the most recent failure.
+    """
+
+    host: str
+    trips: int
+    failures: int
+    open: bool
+    last_error: str
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON-compatible dict.
+
+        Returns:
+            A dict suitable for JSON report serialization.
+        """
+        return {
+            "host": self.host,
+            "trips": self.trips,
+            "failures": self.failures,
+            "open": self.open,
+            "last_error": self.last_error,
+        }
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,104 @@
+"""Compiled glob matching for Agronomist.
+
+Merges a list of ``fnmatch``-style patterns into a single
+regular expression so that each candidate string is tested
+with one regex call instead of one ``fnmatch`` call per
+pattern.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import functools
+import os
+import re
+from collections.abc import Iterable
+
+
+class PatternSet:
+    """An ordered set of glob patterns compiled into one regex.
+
+    Each pattern is translated with :func:`fnmatch.translate`
+    and wrapped in a named group. The alternation is tried
+    left to right, so the group that matches identifies the
+    first pattern (in declaration order) accepting the path.
+    Results are identical to calling :func:`fnmatch.fnmatch`
+    for each pattern in turn.
+
+    Attributes:
+        patterns: The source patterns, in declaration order.
+    """
+
+    __slots__ = ("patterns", "_regex")
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """Compile *patterns* into a single matcher.
+
+        Parameters:
+            patterns: An iterable of ``fnmatch``-style patterns.
+                Patterns are normalized with
+                :func:`os.path.normcase`, like ``fnmatch``.
+        """
+        self.patterns: tuple[str, ...] = tuple(patterns)
+        self._regex: re.Pattern[str] | None = None
+        if self.patterns:
+            alternatives = (
+                f"(?P<p{index}>{fnmatch.translate(os.path.normcase(pattern))})"
+                for index, pattern in enumerate(self.patterns)
+            )
+            self._regex = re.compile("|".join(alternatives))
+
+    def __bool__(self) -> bool:
+        """Return True when the set contains at least one pattern."""
+        return bool(self.patterns)
+
+    def __len__(self) -> int:
+        """Return the number of patterns in the set."""
+        return len(self.patterns)
+
+    def first_match(self, path: str) -> int | None:
+        """Return the index of the first pattern matching *path*.
+
+        Parameters:
+            path: The string to test.
+
+        Returns:
+            The zero-based index into :attr:`patterns`, or None
+            when no pattern matches.
+        """
+        if self._regex is None:
+            return None
+        match = self._regex.match(os.path.normcase(path))
+        if match is None or match.lastgroup is None:
+            return None
+        return int(match.lastgroup[1:])
+
+    def matches(self, path: str) -> bool:
+        """Return True if *path* matches any pattern in the set.
+
+        Parameters:
+            path: The string to test.
+
+        Returns:
+            True when at least one pattern matches.
+        """
+        if self._regex is None:
+            return False
+        return self._regex.match(os.path.normcase(path)) is not None
+
+
+@functools.lru_cache(maxsize=256)
+def compile_patterns(patterns: tuple[str, ...]) -> PatternSet:
+    """Return a cached :class:`PatternSet` for *patterns*.
+
+    Used by call sites that receive raw pattern lists on every
+    call, so the merged regex is only compiled once per
+    distinct pattern tuple.
+
+    Parameters:
+        patterns: A tuple of ``fnmatch``-style patterns.
+
+    Returns:
+        The compiled pattern set.
+    """
+    return PatternSet(patterns)
@@ -0,0 +1,357 @@
+"""Rate-limit-aware scheduling of API requests.
+
+GitHub and GitLab report the remaining request quota in every
+response (``X-RateLimit-*`` and ``RateLimit-*`` headers), answer
+``429`` or ``403`` with ``Retry-After`` when a client is too fast,
+and enforce undocumented *secondary* limits on bursts of
+concurrent requests. :class:`RateLimitScheduler` keeps, per host,
+the last reported quota and the number of requests in flight, and
+every request of a session built by
+:func:`agronomist.http.build_session` passes through it:
+
+* Requests wait while the host is throttled, so one ``Retry-After``
+  pauses every thread instead of each one hitting the limit.
+* Once the remaining quota drops below a fraction of the limit,
+  requests are spaced evenly over the rest of the rate-limit
+  window, so a long run slows down instead of exhausting the quota
+  and failing halfway.
+* Concurrency per host grows by one slot per window of successful
+  requests and halves on every throttled response (additive
+  increase, multiplicative decrease).
+
+A request that would have to wait longer than ``max_wait`` raises
+:class:`~agronomist.exceptions.RateLimitError`, so callers can fall
+back to another resolver instead of stalling the run.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .circuit import CircuitBreaker
+from .exceptions import RateLimitError
+from .models import RateLimitStats
+
+logger = logging.getLogger(__name__)
+
+# Requests in flight at once per host before any throttling.
+DEFAULT_HOST_CONCURRENCY = 16
+
+# Longest a request waits for a host's rate limit, in seconds.
+DEFAULT_MAX_WAIT = 120.0
+
+# Wait after a secondary rate limit without ``Retry-After``; GitHub
+# asks clients to pause for at least a minute.
+SECONDARY_LIMIT_WAIT = 60.0
+
+# Remaining quota, as a fraction of the limit, below which requests
+# are spread over the rest of the rate-limit window.
+PACING_THRESHOLD = 0.2
+
+# Times a throttled request is sent again after waiting.
+THROTTLE_RETRIES = 3
+
+# Statuses of a gateway that cannot reach the host behind it; they
+# count as connection failures for the circuit breaker.
+UNAVAILABLE_STATUSES = frozenset({502, 503, 504})
+
+
+def _header_float(response: requests.Response, *names: str) -> float | None:
+    """Return the first of *names* present as a number."""
+    for name in names:
+        value = response.headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def retry_after(response: requests.Response) -> float | None:
+    """Return the delay requested by a ``Retry-After`` header.
+
+    Parameters:
+        response: Any HTTP response.
+
+    Returns:
+        Seconds to wait (delta-seconds or an HTTP date), or None
+        when the header is absent or malformed.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def throttle_delay(response: requests.Response) -> float | None:
+    """Return how long a throttled response asks clients to wait.
+
+    ``429`` responses are always throttled. A ``403`` is throttled
+    when it carries ``Retry-After``, reports an exhausted quota, or
+    mentions a rate limit in its body (GitHub's secondary limits);
+    any other ``403`` is a genuine permission error.
+
+    Parameters:
+        response: Any HTTP response.
+
+    Returns:
+        Seconds to wait before the next request to the host, or
+        None when the response is not throttled.
+    """
+    if response.status_code not in (403, 429):
+        return None
+    delay = retry_after(response)
+    if delay is not None:
+        return delay
+    remaining = _header_float(response, "X-RateLimit-Remaining", "RateLimit-Remaining")
+    if remaining == 0:
+        reset = _header_float(response, "X-RateLimit-Reset", "RateLimit-Reset")
+        if reset is not None:
+            return max(0.0, reset - time.time())
+        return SECONDARY_LIMIT_WAIT
+    if response.status_code == 429 or "rate limit" in response.text.lower():
+        return SECONDARY_LIMIT_WAIT
+    return None
+
+
+@dataclass
+class _HostState:
+    """Scheduling state of one host.
+
+    Attributes:
+        concurrency: Adaptive number of requests allowed in
+            flight; fractional so it can grow slowly.
+        max_concurrency: Ceiling of *concurrency*.
+        in_flight: Requests currently sent and not answered.
+        blocked_until: Monotonic time before which no request
+            may be sent (throttling or an exhausted quota).
+        next_slot: Monotonic time of the next paced request.
+        interval: Spacing between requests while pacing.
+    """
+
+    concurrency: float
+    max_concurrency: int
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    next_slot: float = 0.0
+    interval: float = 0.0
+
+
+class RateLimitScheduler:
+    """Per-host gate shared by every thread using the API clients.
+
+    Thread-safe; one instance should be shared by all sessions
+    talking to the same hosts.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_HOST_CONCURRENCY,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        host_limits: Mapping[str, int] | None = None,
+    ) -> None:
+        """Create the scheduler.
+
+        Parameters:
+            max_concurrency: Most requests in flight at once per
+                host; throttling lowers the effective limit.
+            max_wait: Longest a request may wait before
+                :class:`RateLimitError` is raised instead.
+            host_limits: Per-host overrides of
+                *max_concurrency*, keyed by lower-case host name.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_wait = max_wait
+        self.host_limits = {host: max(1, limit) for host, limit in (host_limits or {}).items()}
+        self.stats = RateLimitStats()
+        self._hosts: dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    def _state(self, host: str) -> _HostState:
+        """Return the state of *host*; the lock must be held."""
+        state = self._hosts.get(host)
+        if state is None:
+            limit = self.host_limits.get(host.lower(), self.max_concurrency)
+            state = self._hosts[host] = _HostState(concurrency=float(limit), max_concurrency=limit)
+        return state
+
+    def concurrency(self, host: str) -> int:
+        """Return the number of requests *host* may have in flight.
+
+        Parameters:
+            host: Host name, as in the request URL.
+
+        Returns:
+            The current adaptive limit, at least 1.
+        """
+        with self._cond:
+            return max(1, int(self._state(host).concurrency))
+
+    def acquire(self, host: str) -> None:
+        """Wait until a request to *host* may be sent.
+
+        Parameters:
+            host: Host name, as in the request URL.
+
+        Raises:
+            RateLimitError: If the host is throttled, or paced,
+                for longer than ``max_wait``.
+        """
+        with self._cond:
+            state = self._state(host)
+            waited = 0.0
+            while True:
+                now = time.monotonic()
+                ready_at = max(state.blocked_until, state.next_slot)
+                if ready_at - now > self.max_wait:
+                    raise RateLimitError(
+                        f"{host} is rate limited for another {ready_at - now:.0f}s"
+                    )
+                if state.in_flight >= max(1, int(state.concurrency)):
+                    self._cond.wait()
+                elif ready_at > now:
+                    self._cond.wait(ready_at - now)
+                    waited += time.monotonic() - now
+                else:
+                    break
+            state.in_flight += 1
+            state.next_slot = now + state.interval
+            self.stats.waited += waited
+
+    def release(self, host: str, response: requests.Response | None) -> float | None:
+        """Record the outcome of a request to *host*.
+
+        Updates the quota from the response headers and adapts
+        the concurrency of the host.
+
+        Parameters:
+            host: Host name, as in the request URL.
+            response: The response, or None if the request
+                failed before one arrived.
+
+        Returns:
+            The delay requested by a throttled response, or None.
+        """
+        delay = throttle_delay(response) if response is not None else None
+        with self._cond:
+            state = self._state(host)
+            state.in_flight -= 1
+            now = time.monotonic()
+            if delay is not None:
+                state.blocked_until = max(state.blocked_until, now + delay)
+                state.concurrency = max(1.0, state.concurrency / 2)
+                self.stats.throttled += 1
+                logger.info(
+                    "%s: rate limited (%d); pausing requests for %.0fs, concurrency %d",
+                    host,
+                    response.status_code if response is not None else 0,
+                    delay,
+                    int(state.concurrency),
+                )
+            elif response is not None:
+                state.concurrency = min(
+                    float(state.max_concurrency), state.concurrency + 1 / state.concurrency
+                )
+                self._update_quota(state, response, now)
+            self._cond.notify_all()
+        return delay
+
+    @staticmethod
+    def _update_quota(state: _HostState, response: requests.Response, now: float) -> None:
+        """Derive blocking and pacing from the quota headers."""
+        limit = _header_float(response, "X-RateLimit-Limit", "RateLimit-Limit")
+        remaining = _header_float(response, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _header_float(response, "X-RateLimit-Reset", "RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        window = max(0.0, reset - time.time())
+        if remaining <= 0:
+            state.blocked_until = max(state.blocked_until, now + window)
+            state.interval = 0.0
+        elif limit and remaining < limit * PACING_THRESHOLD:
+            state.interval = window / remaining
+        else:
+            state.interval = 0.0
+
+
+class RateLimitAdapter(HTTPAdapter):
+    """``HTTPAdapter`` sending every request through a scheduler.
+
+    Throttled responses are retried, up to ``THROTTLE_RETRIES``
+    times, once the host may be contacted again. With a circuit
+    breaker, connection errors, timeouts and gateway errors
+    (``UNAVAILABLE_STATUSES``) count as failures of the host, and
+    requests to a host whose circuit is open are not sent.
+    """
+
+    def __init__(
+        self,
+        scheduler: RateLimitScheduler,
+        breaker: CircuitBreaker | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Create the adapter.
+
+        Parameters:
+            scheduler: Scheduler shared across sessions.
+            breaker: Circuit breaker shared across sessions.
+            **kwargs: Passed to ``HTTPAdapter``.
+        """
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+        self.breaker = breaker
+
+    def send(  # type: ignore[override]
+        self, request: requests.PreparedRequest, **kwargs: Any
+    ) -> requests.Response:
+        """Send *request* once the scheduler allows it.
+
+        Raises:
+            RateLimitError: If the host stays throttled for
+                longer than the scheduler's ``max_wait``.
+            CircuitOpenError: If the breaker's circuit for the
+                host is open.
+        """
+        host = urlparse(request.url or "").hostname or ""
+        for _attempt in range(THROTTLE_RETRIES):
+            if self.breaker is not None:
+                self.breaker.before_call(host)
+            self.scheduler.acquire(host)
+            response: requests.Response | None = None
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if self.breaker is not None:
+                    self.breaker.record_failure(host, exc)
+                raise
+            finally:
+                delay = self.scheduler.release(host, response)
+            if self.breaker is not None:
+                if response.status_code in UNAVAILABLE_STATUSES:
+                    self.breaker.record_failure(host, f"HTTP {response.status_code}")
+                else:
+                    self.breaker.record_success(host)
+            if delay is None:
+                return response
+            response.close()
+        raise RateLimitError(f"{host} is still rate limited after {THROTTLE_RETRIES} attempts")
@@ -11,22 +11,29 @@ from .fileutil import atomic_write
 def build_report(
     root: str,
     updates: list[dict[str, object]],
+    tripped_hosts: list[dict[str, object]] | None = None,
 ) -> dict[str, object]:
     """Build an in-memory report dict from a list of updates.
 
     Parameters:
         root: The root directory that was scanned.
         updates: List of update dicts produced by the CLI.
+        tripped_hosts: Hosts whose circuit breaker opened, as
+            produced by ``TrippedHost.to_dict()``.
 
     Returns:
         A dict containing ``generated_at`` (ISO 8601 UTC),
-        ``root``, and ``updates``.
+        ``root``, and ``updates``, plus ``tripped_hosts`` when
+        any host was skipped.
     """
-    return {
+    report: dict[str, object] = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "root": root,
         "updates": updates,
     }
+    if tripped_hosts:
+        report["tripped_hosts"] = tripped_hosts
+    return report
 
 
 def write_report(
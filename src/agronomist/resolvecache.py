@@ -0,0 +1,454 @@
+"""Persistent cache of resolved latest refs.
+
+Stores, per resolver and repository, the latest ref returned by
+the resolver and when it was fetched, in a small SQLite database
+next to the scan index. Entries younger than the TTL are served
+without any network request. Failed lookups (unknown or private
+repositories, timeouts) and repositories without tags are cached
+too, with a shorter TTL, so they are not retried on every run.
+Lookups a circuit breaker skipped never reached the host and are
+not cached.
+
+Full tag lists (as ``git ls-remote`` and the smart HTTP lister
+return them) are stored alongside, under their own keys, with the
+same TTLs; an empty list counts as a negative entry.
+
+With stale-while-revalidate enabled, an expired successful entry is
+returned immediately and refreshed by a background thread; the
+refresh is awaited by :meth:`ResolutionCache.close`, so the next
+run sees the new value.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from .exceptions import CircuitOpenError
+from .fileutil import ensure_cache_dir
+from .models import ResolveStats
+
+logger = logging.getLogger(__name__)
+
+RESOLVE_CACHE_FILE = "resolve-cache.sqlite"
+
+# Seconds a successful resolution is served without a lookup.
+DEFAULT_TTL = 3600
+
+# Seconds an empty or failed resolution is served.
+DEFAULT_NEGATIVE_TTL = 300
+
+# Prefix of the keys holding tag lists, which are stored one tag
+# per line (ref names cannot contain newlines).
+_TAGS_PREFIX = "tags "
+
+# Threads refreshing stale entries in stale-while-revalidate mode.
+_REFRESH_WORKERS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resolutions (
+    key TEXT PRIMARY KEY,
+    latest_ref TEXT,
+    error TEXT,
+    fetched_at REAL NOT NULL
+)
+"""
+
+_T = TypeVar("_T")
+
+
+def _join_tags(tags: list[str]) -> str | None:
+    """Return *tags* as stored, None when there are none.
+
+    Parameters:
+        tags: Tag names.
+
+    Returns:
+        The tags one per line, or None so that an empty list is
+        cached with the negative TTL.
+    """
+    return "\n".join(tags) or None
+
+
+class ResolutionCache:
+    """SQLite-backed cache of latest refs keyed by resolver and URL.
+
+    Safe to use from the resolution thread pool: every database
+    access holds one lock.
+
+    Attributes:
+        path: Location of the database file.
+        ttl: Seconds a successful entry stays fresh.
+        negative_ttl: Seconds an empty or failed entry stays
+            fresh.
+        stale_while_revalidate: Serve expired successful entries
+            immediately and refresh them in the background.
+        stats: Hit, miss and refresh counters.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        stale_while_revalidate: bool = False,
+    ) -> None:
+        """Open (creating if needed) the cache database.
+
+        Parameters:
+            path: Location of the database file.
+            ttl: Seconds a successful entry stays fresh.
+            negative_ttl: Seconds an empty or failed entry stays
+                fresh.
+            stale_while_revalidate: Serve expired successful
+                entries immediately and refresh them in the
+                background.
+
+        Raises:
+            OSError: If the cache directory cannot be created.
+            sqlite3.Error: If the database cannot be opened.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stats = ResolveStats()
+        ensure_cache_dir(os.path.dirname(path))
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute(_SCHEMA)
+        self._refreshing: set[str] = set()
+        # Set on refresh threads, so that a lookup nested in a
+        # refresh (a tag list behind a latest ref) is fetched
+        # again rather than served stale.
+        self._local = threading.local()
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def _load(self, key: str) -> tuple[str | None, str | None, float] | None:
+        """Return the stored ``(latest_ref, error, fetched_at)`` row.
+
+        Parameters:
+            key: Cache key.
+
+        Returns:
+            The row, or None when *key* was never stored.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT latest_ref, error, fetched_at FROM resolutions WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else (row[0], row[1], float(row[2]))
+
+    def _save(self, key: str, latest_ref: str | None, error: str | None) -> None:
+        """Store the outcome of one lookup.
+
+        Parameters:
+            key: Cache key.
+            latest_ref: The resolved ref, or None.
+            error: Description of the failure, if the lookup
+                raised.
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO resolutions VALUES (?, ?, ?, ?)",
+                (key, latest_ref, error, time.time()),
+            )
+
+    def _fetch(self, key: str, fetch: Callable[[], str | None]) -> str | None:
+        """Run a lookup and store its outcome.
+
+        Parameters:
+            key: Cache key.
+            fetch: The uncached lookup.
+
+        Returns:
+            The resolved ref.
+
+        Raises:
+            Exception: Whatever *fetch* raised, after it was
+                cached negatively, unless the lookup was skipped
+                by a circuit breaker.
+        """
+        try:
+            latest_ref = fetch()
+        except CircuitOpenError:
+            raise
+        except Exception as exc:
+            self._save(key, None, str(exc) or type(exc).__name__)
+            raise
+        self._save(key, latest_ref, None)
+        return latest_ref
+
+    def _refresh(self, key: str, fetch: Callable[[], str | None]) -> None:
+        """Refresh a stale entry; runs on a background thread.
+
+        A failed refresh keeps the stale value so that it is
+        served again, and tried again, on the next run.
+
+        Parameters:
+            key: Cache key.
+            fetch: The uncached lookup.
+        """
+        self._local.refreshing = True
+        try:
+            latest_ref = fetch()
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("Background refresh of %s failed: %s", key, exc)
+        else:
+            self._save(key, latest_ref, None)
+            with self._lock:
+                self.stats.refreshed += 1
+        finally:
+            self._local.refreshing = False
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _is_fresh(self, latest_ref: str | None, fetched_at: float) -> bool:
+        """Return True if a stored entry is within its TTL.
+
+        Parameters:
+            latest_ref: The stored ref; None for a negative entry.
+            fetched_at: When the entry was stored.
+
+        Returns:
+            True when the entry can be served as is.
+        """
+        ttl = self.negative_ttl if latest_ref is None else self.ttl
+        return time.time() - fetched_at < ttl
+
+    def covers(self, key: str) -> bool:
+        """Return True if :meth:`resolve` can answer *key* without waiting.
+
+        Lets batching resolvers skip keys the cache will serve,
+        fresh or (in stale-while-revalidate mode) stale.
+
+        Parameters:
+            key: Cache key.
+
+        Returns:
+            True when *key* has a fresh entry, or a stale
+            successful one that would be revalidated in the
+            background.
+        """
+        row = self._load(key)
+        if row is None:
+            return False
+        latest_ref, _, fetched_at = row
+        return self._is_fresh(latest_ref, fetched_at) or (
+            self.stale_while_revalidate and latest_ref is not None
+        )
+
+    def _serve(self, key: str, refresh: Callable[[], str | None]) -> tuple[bool, str | None]:
+        """Answer *key* from the cache when possible.
+
+        Counts the hit, or the miss when a lookup is needed, and
+        schedules a background refresh for stale entries in
+        stale-while-revalidate mode.
+
+        Parameters:
+            key: Cache key.
+            refresh: Blocking lookup used to refresh a stale
+                entry.
+
+        Returns:
+            ``(True, ref)`` when served from the cache, or
+            ``(False, None)`` when the caller must look *key* up.
+        """
+        row = self._load(key)
+        if row is not None:
+            latest_ref, error, fetched_at = row
+            negative = latest_ref is None
+            if self._is_fresh(latest_ref, fetched_at):
+                with self._lock:
+                    if negative:
+                        self.stats.negative_hits += 1
+                    else:
+                        self.stats.hits += 1
+                if error:
+                    logger.debug("Cached failure for %s: %s", key, error)
+                return True, latest_ref
+            if (
+                self.stale_while_revalidate
+                and not negative
+                and not getattr(self._local, "refreshing", False)
+            ):
+                with self._lock:
+                    self.stats.stale += 1
+                    schedule = key not in self._refreshing
+                    self._refreshing.add(key)
+                if schedule:
+                    if self._executor is None:
+                        self._executor = concurrent.futures.ThreadPoolExecutor(
+                            max_workers=_REFRESH_WORKERS,
+                            thread_name_prefix="agronomist-refresh",
+                        )
+                    self._executor.submit(self._refresh, key, refresh)
+                return True, latest_ref
+        with self._lock:
+            self.stats.misses += 1
+        return False, None
+
+    def resolve(self, key: str, fetch: Callable[[], str | None]) -> str | None:
+        """Return the latest ref for *key*, looking it up if needed.
+
+        Parameters:
+            key: Cache key, e.g. resolver name and repository URL.
+            fetch: The uncached lookup, called on a miss.
+
+        Returns:
+            The cached or freshly resolved ref; None when the
+            repository has no tags or a cached lookup failed.
+
+        Raises:
+            Exception: Whatever *fetch* raised on a miss.
+        """
+        served, latest_ref = self._serve(key, fetch)
+        if served:
+            return latest_ref
+        return self._fetch(key, fetch)
+
+    async def resolve_async(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[str | None]],
+        refresh: Callable[[], str | None],
+    ) -> str | None:
+        """Coroutine version of :meth:`resolve`.
+
+        The cache itself is read and written synchronously; only
+        the lookup on a miss is awaited.
+
+        Parameters:
+            key: Cache key.
+            fetch: Coroutine function doing the uncached lookup.
+            refresh: Blocking lookup used to refresh a stale
+                entry in the background.
+
+        Returns:
+            The cached or freshly resolved ref.
+
+        Raises:
+            Exception: Whatever *fetch* raised on a miss.
+        """
+        served, latest_ref = self._serve(key, refresh)
+        if served:
+            return latest_ref
+        try:
+            latest_ref = await fetch()
+        except CircuitOpenError:
+            raise
+        except Exception as exc:
+            self._save(key, None, str(exc) or type(exc).__name__)
+            raise
+        self._save(key, latest_ref, None)
+        return latest_ref
+
+    def resolve_tags(self, key: str, fetch: Callable[[], list[str]]) -> list[str]:
+        """Return the tag list for *key*, listing it if needed.
+
+        Parameters:
+            key: Cache key, e.g. ``git`` and the repository.
+            fetch: The uncached listing, called on a miss.
+
+        Returns:
+            The cached or freshly listed tags, in *fetch*'s
+            order; empty when the repository has none or a
+            cached listing failed.
+
+        Raises:
+            Exception: Whatever *fetch* raised on a miss.
+        """
+        joined = self.resolve(_TAGS_PREFIX + key, lambda: _join_tags(fetch()))
+        return joined.split("\n") if joined else []
+
+    async def resolve_tags_async(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[list[str]]],
+        refresh: Callable[[], list[str]],
+    ) -> list[str]:
+        """Coroutine version of :meth:`resolve_tags`.
+
+        Parameters:
+            key: Cache key.
+            fetch: Coroutine function doing the uncached listing.
+            refresh: Blocking listing used to refresh a stale
+                entry in the background.
+
+        Returns:
+            The cached or freshly listed tags.
+
+        Raises:
+            Exception: Whatever *fetch* raised on a miss.
+        """
+
+        async def _fetch() -> str | None:
+            """List the tags and join them for storage."""
+            return _join_tags(await fetch())
+
+        joined = await self.resolve_async(_TAGS_PREFIX + key, _fetch, lambda: _join_tags(refresh()))
+        return joined.split("\n") if joined else []
+
+    def wrap(
+        self,
+        latest_ref_fn: Callable[[_T], str | None],
+        key_fn: Callable[[_T], str],
+    ) -> Callable[[_T], str | None]:
+        """Return a cached version of a resolver function.
+
+        Parameters:
+            latest_ref_fn: Resolver taking one argument.
+            key_fn: Maps that argument to its cache key.
+
+        Returns:
+            A function with the same signature that consults
+            the cache first.
+        """
+
+        def cached(item: _T) -> str | None:
+            """Resolve *item* through the cache."""
+            return self.resolve(key_fn(item), lambda: latest_ref_fn(item))
+
+        return cached
+
+    def wrap_async(
+        self,
+        latest_ref_async: Callable[[_T], Awaitable[str | None]],
+        latest_ref_fn: Callable[[_T], str | None],
+        key_fn: Callable[[_T], str],
+    ) -> Callable[[_T], Awaitable[str | None]]:
+        """Return a cached version of a coroutine resolver.
+
+        Parameters:
+            latest_ref_async: Coroutine function taking one
+                argument.
+            latest_ref_fn: Blocking equivalent, used for
+                background refreshes.
+            key_fn: Maps the argument to its cache key.
+
+        Returns:
+            A coroutine function with the same signature that
+            consults the cache first.
+        """
+
+        async def cached(item: _T) -> str | None:
+            """Resolve *item* through the cache."""
+            return await self.resolve_async(
+                key_fn(item), lambda: latest_ref_async(item), lambda: latest_ref_fn(item)
+            )
+
+        return cached
+
+    def close(self) -> None:
+        """Wait for background refreshes, then close the database."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,405 @@
+"""Persistent incremental scan index for Agronomist.
+
+Stores, per scanned file, the ``stat`` metadata observed when the
+file was parsed together with the Git blob ID of its content, and,
+per blob ID, the SourceRef values extracted from that content. On
+the next run the scanner only reads files whose metadata changed,
+and only parses those whose content was never parsed before: a
+fresh checkout, another branch, or a generated file that is
+byte-identical to one elsewhere in the tree all map to the same
+blob. Entries for files that disappeared from the tree are
+dropped; parse results are kept for the most recently used blobs.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from .fileutil import atomic_write, ensure_cache_dir
+from .models import SourceRef, canonical_repo_key
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the on-disk layout or the parser output changes,
+# so stale indexes are discarded instead of misread.
+SCAN_INDEX_VERSION = 3
+
+DEFAULT_CACHE_DIR = ".agronomist"
+SCAN_INDEX_FILE = "scan-index"
+
+# Files modified this recently are not indexed: a later write in
+# the same timestamp granule would leave mtime/size unchanged and
+# the stale entry would be trusted ("racy clean" files).
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Parse results kept for blobs that no indexed file uses any more
+# (other branches, older versions), least recently used first.
+BLOB_CACHE_SIZE = 50_000
+
+_StatKey = tuple[int, int, int]
+
+
+def _stat_key(stat: os.stat_result) -> _StatKey:
+    """Return the metadata that identifies one file version.
+
+    Parameters:
+        stat: Result of :func:`os.stat` for the file.
+
+    Returns:
+        A ``(mtime_ns, size, inode)`` tuple.
+    """
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _ref_to_row(ref: SourceRef) -> list[str | int | None]:
+    """Serialize a SourceRef without its file path.
+
+    Parameters:
+        ref: The reference to serialize.
+
+    Returns:
+        A compact JSON-compatible list of field values.
+    """
+    return [
+        ref.raw,
+        ref.repo,
+        ref.repo_url,
+        ref.repo_host,
+        ref.ref,
+        ref.module,
+        ref.line,
+        ref.column,
+    ]
+
+
+def _is_valid_row(row: Any) -> bool:
+    """Return True if *row* has the layout written by :func:`_ref_to_row`.
+
+    Parameters:
+        row: A decoded JSON value.
+
+    Returns:
+        True when the row can be passed to :func:`_row_to_ref`.
+    """
+    if not isinstance(row, list) or len(row) != 8:
+        return False
+    strings, module, positions = row[:5], row[5], row[6:]
+    return (
+        all(isinstance(value, str) for value in strings)
+        and (module is None or isinstance(module, str))
+        and all(value is None or isinstance(value, int) for value in positions)
+    )
+
+
+def _row_to_ref(rel_path: str, row: list[Any]) -> SourceRef:
+    """Rebuild a SourceRef from a serialized row.
+
+    Strings are interned: the same source usually appears in many
+    rows, and JSON decoding allocates a new string for each. The
+    ``repo_key`` is derived again rather than stored, so that it
+    follows the hosts registered for this run.
+
+    Parameters:
+        rel_path: File path to attach to the reference.
+        row: A list produced by :func:`_ref_to_row`.
+
+    Returns:
+        The reconstructed SourceRef.
+    """
+    raw, repo, repo_url, repo_host, ref, module, line, column = row
+    return SourceRef(
+        file_path=rel_path,
+        raw=sys.intern(raw),
+        repo=sys.intern(repo),
+        repo_url=sys.intern(repo_url),
+        repo_host=sys.intern(repo_host),
+        ref=sys.intern(ref),
+        module=None if module is None else sys.intern(module),
+        line=line,
+        column=column,
+        repo_key=sys.intern(canonical_repo_key(repo_host, repo)),
+    )
+
+
+class BlobCache:
+    """Parse results keyed by Git blob ID.
+
+    Rows are stored without a file path, so one entry serves every
+    file with the same content. Entries are kept in least recently
+    used order.
+
+    Attributes:
+        dirty: True when entries were added since the last save.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty cache."""
+        self._rows: dict[str, list[list[Any]]] = {}
+        self.dirty = False
+
+    def __contains__(self, blob_id: object) -> bool:
+        """Return True if the parse result of *blob_id* is cached."""
+        return blob_id in self._rows
+
+    def __len__(self) -> int:
+        """Return the number of cached blobs."""
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield the cached blob IDs, least recently used first."""
+        return iter(self._rows)
+
+    def refs(self, blob_id: str, rel_path: str) -> list[SourceRef]:
+        """Return the cached refs of a blob, attributed to a file.
+
+        Parameters:
+            blob_id: A blob ID for which ``blob_id in cache``.
+            rel_path: File path to attach to the references.
+
+        Returns:
+            The SourceRef list parsed from the blob.
+
+        Raises:
+            KeyError: If *blob_id* is not cached.
+        """
+        rows = self._rows.pop(blob_id)
+        self._rows[blob_id] = rows
+        return [_row_to_ref(rel_path, row) for row in rows]
+
+    def store(self, blob_id: str, refs: list[SourceRef]) -> None:
+        """Record the refs parsed from a blob.
+
+        Parameters:
+            blob_id: Git blob ID of the parsed content.
+            refs: The unfiltered refs extracted from it.
+        """
+        self._rows.pop(blob_id, None)
+        self._rows[blob_id] = [_ref_to_row(ref) for ref in refs]
+        self.dirty = True
+
+    def trim(self, keep: set[str], limit: int = BLOB_CACHE_SIZE) -> None:
+        """Drop the least recently used blobs beyond *limit*.
+
+        Parameters:
+            keep: Blob IDs that must stay (used by indexed files).
+            limit: Maximum number of blobs to keep, unless *keep*
+                alone is larger.
+        """
+        excess = len(self._rows) - limit
+        for blob_id in list(self._rows):
+            if excess <= 0:
+                break
+            if blob_id not in keep:
+                del self._rows[blob_id]
+                excess -= 1
+                self.dirty = True
+
+    def to_dict(self) -> dict[str, list[list[Any]]]:
+        """Return the cache in its on-disk form, oldest first."""
+        return self._rows
+
+    def load_dict(self, data: Any) -> None:
+        """Fill the cache from :meth:`to_dict` output.
+
+        Malformed entries are skipped.
+
+        Parameters:
+            data: The decoded ``blobs`` object of an index file.
+        """
+        if not isinstance(data, dict):
+            return
+        for blob_id, rows in data.items():
+            if isinstance(rows, list) and all(_is_valid_row(row) for row in rows):
+                self._rows[blob_id] = rows
+
+
+class ScanIndex:
+    """On-disk map of file path to stat metadata and parsed refs.
+
+    Attributes:
+        path: Location of the index file.
+        blobs: Parse results by Git blob ID, shared by files with
+            identical content.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Create an empty index bound to *path*.
+
+        Parameters:
+            path: Location of the index file.
+        """
+        self.path = path
+        self.blobs = BlobCache()
+        self._entries: dict[str, tuple[_StatKey, str | None]] = {}
+        self._observed: dict[str, _StatKey] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> ScanIndex:
+        """Load an index, discarding it when unusable.
+
+        A missing, unreadable, corrupt, or version-mismatched
+        file yields an empty index, and malformed entries (or
+        files whose blob entry is missing) are dropped; both
+        will be rewritten on :meth:`save`.
+
+        Parameters:
+            path: Location of the index file.
+
+        Returns:
+            The loaded (or empty) index.
+        """
+        index = cls(path)
+        try:
+            with open(path, encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return index
+        except (OSError, ValueError) as exc:
+            logger.debug("Ignoring unreadable scan index %s: %s", path, exc)
+            return index
+
+        if not isinstance(data, dict) or data.get("version") != SCAN_INDEX_VERSION:
+            logger.debug("Ignoring scan index %s with another schema version", path)
+            return index
+
+        index.blobs.load_dict(data.get("blobs"))
+        files = data.get("files")
+        if isinstance(files, dict):
+            for rel_path, entry in files.items():
+                try:
+                    mtime_ns, size, inode = entry["stat"]
+                    stat_key = (int(mtime_ns), int(size), int(inode))
+                    blob_id = entry["blob"]
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if blob_id is not None and blob_id not in index.blobs:
+                    continue
+                index._entries[rel_path] = (stat_key, blob_id)
+        return index
+
+    def __len__(self) -> int:
+        """Return the number of indexed files."""
+        return len(self._entries)
+
+    def is_fresh(self, root: str, rel_path: str) -> bool:
+        """Return True if the indexed entry for a file is current.
+
+        The file's current metadata is remembered so that a
+        subsequent :meth:`store` records the version that was
+        actually read.
+
+        Parameters:
+            root: Scan root directory.
+            rel_path: File path relative to *root*.
+
+        Returns:
+            False when the file is new, changed, or cannot be
+            stat'ed.
+        """
+        try:
+            stat_key = _stat_key(os.stat(os.path.join(root, rel_path)))
+        except OSError:
+            return False
+        self._observed[rel_path] = stat_key
+
+        entry = self._entries.get(rel_path)
+        return entry is not None and entry[0] == stat_key
+
+    def refs(self, rel_path: str) -> list[SourceRef]:
+        """Return the indexed refs of a file without checking it.
+
+        Parameters:
+            rel_path: File path relative to the scan root.
+
+        Returns:
+            The stored SourceRef list (empty when not indexed).
+        """
+        entry = self._entries.get(rel_path)
+        if entry is None or entry[1] is None:
+            return []
+        return self.blobs.refs(entry[1], rel_path)
+
+    def lookup(self, root: str, rel_path: str) -> list[SourceRef] | None:
+        """Return cached refs for a file if it is unchanged.
+
+        Parameters:
+            root: Scan root directory.
+            rel_path: File path relative to *root*.
+
+        Returns:
+            The cached SourceRef list, or None when
+            :meth:`is_fresh` is False.
+        """
+        if not self.is_fresh(root, rel_path):
+            return None
+        return self.refs(rel_path)
+
+    def store(self, rel_path: str, refs: list[SourceRef], blob_id: str | None = None) -> None:
+        """Record the refs parsed from a file.
+
+        The refs are cached under *blob_id* in any case. The file
+        entry is skipped when the file was not stat'ed by
+        :meth:`is_fresh`, was modified too recently to be
+        trusted, or has refs but no blob ID.
+
+        Parameters:
+            rel_path: File path relative to the scan root.
+            refs: The unfiltered refs extracted from the file.
+            blob_id: Git blob ID of the content that was read;
+                None for files without ``?ref=`` (and no refs).
+        """
+        if blob_id is not None and blob_id not in self.blobs:
+            self.blobs.store(blob_id, refs)
+        stat_key = self._observed.get(rel_path)
+        if (
+            stat_key is None
+            or time.time_ns() - stat_key[0] < _RACY_WINDOW_NS
+            or (blob_id is None and refs)
+        ):
+            if self._entries.pop(rel_path, None) is not None:
+                self._dirty = True
+            return
+        if self._entries.get(rel_path) != (stat_key, blob_id):
+            self._entries[rel_path] = (stat_key, blob_id)
+            self._dirty = True
+
+    def retain(self, rel_paths: list[str]) -> None:
+        """Drop entries for files that are no longer scanned.
+
+        Parameters:
+            rel_paths: Every candidate file of the current walk.
+        """
+        keep = set(rel_paths)
+        for rel_path in [p for p in self._entries if p not in keep]:
+            del self._entries[rel_path]
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the index to disk when it changed.
+
+        Raises:
+            OSError: If the cache directory or file cannot be
+                written.
+        """
+        self.blobs.trim({blob_id for _, blob_id in self._entries.values() if blob_id})
+        if not self._dirty and not self.blobs.dirty:
+            return
+        ensure_cache_dir(os.path.dirname(self.path))
+        data = {
+            "version": SCAN_INDEX_VERSION,
+            "files": {
+                rel_path: {"stat": list(stat_key), "blob": blob_id}
+                for rel_path, (stat_key, blob_id) in sorted(self._entries.items())
+            },
+            "blobs": self.blobs.to_dict(),
+        }
+        atomic_write(self.path, json.dumps(data, separators=(",", ":")) + "\n")
+        self._dirty = False
+        self.blobs.dirty = False
@@ -1,49 +1,110 @@
 """File scanner that discovers Git-sourced Terraform modules.
 
-Walks a directory tree, matches Terraform/HCL files, and
-extracts ``source = "git::..."`` references along with their
-version refs.
+Walks a directory tree, matches Terraform/HCL files, lexes them
+for ``source = "..."`` attributes (see :mod:`agronomist.lexer`),
+and parses Git references along with their version refs.
 """
 
 from __future__ import annotations
 
-import fnmatch
+import collections
+import concurrent.futures
+import dataclasses
+import functools
+import hashlib
+import logging
+import mmap
 import os
-import re
-from collections.abc import Iterable
+import sys
+from collections.abc import Collection, Iterable, Iterator
+from typing import BinaryIO, Literal, NamedTuple, overload
 from urllib.parse import urlparse
 
-from .models import SourceRef
+from .archive import is_archive, iter_archive_members
+from .exceptions import ScanError
+from .git import grep_files, iter_blobs, list_tree, untracked_paths
+from .lexer import SourceToken, iter_source_tokens
+from .models import (
+    ScanStats,
+    SourceRef,
+    add_case_insensitive_hosts,
+    canonical_repo_key,
+    case_insensitive_hosts,
+)
+from .patterns import PatternSet
+from .scanindex import DEFAULT_CACHE_DIR, BlobCache, ScanIndex
+from .sourcetable import SourceTable
 
-_SOURCE_RE = re.compile(r"source\s*=\s*(['\"])(?P<source>[^'\"]+)\1")
+logger = logging.getLogger(__name__)
 
-# Matches HTTPS and ssh:// scheme URLs
-_GIT_SOURCE_RE = re.compile(
-    r"(?:git::)?(?P<url>(?:https?|ssh)://[^?]+?)"
-    r"(?:\.git)?(?P<module>//[^?]+)?"
-    r"\?ref=(?P<ref>[^&]+)"
-)
+# Every Git source the parser accepts contains this marker.
+_REF_MARKER = b"?ref="
 
-# Matches SCP-style SSH URLs (git@host:owner/repo)
-_SSH_SCP_RE = re.compile(
-    r"(?:git::)?git@(?P<host>[^:]+):"
-    r"(?P<path>[^?]+?)"
-    r"(?:\.git)?(?P<module>//[^?]+)?"
-    r"\?ref=(?P<ref>[^&]+)"
+# Files at least this large are memory-mapped instead of read.
+MMAP_MIN_BYTES = 64 * 1024
+
+# Directories that never contain first-party module sources:
+# VCS metadata, Terraform/Terragrunt download caches, and the
+# Agronomist cache directory itself.
+DEFAULT_PRUNE_DIRS: tuple[str, ...] = (
+    ".git",
+    ".terraform",
+    ".terragrunt-cache",
+    DEFAULT_CACHE_DIR,
 )
 
+# Distinct raw source values whose parse result is memoized. Terragrunt
+# layouts repeat a few hundred sources across thousands of files.
+SOURCE_CACHE_SIZE = 4096
+
+# File discovery strategies accepted by ``scan_sources(backend=...)``.
+SCAN_BACKENDS: tuple[str, ...] = ("walk", "git-grep")
+
+# Below this many candidate files a parallel scan is slower than a
+# serial one, so ``workers`` is ignored.
+PARALLEL_SCAN_MIN_FILES = 256
+
+# URL schemes accepted in front of ``://`` for Git module sources,
+# longest first so ``https`` wins over ``http`` at the same offset.
+_URL_SCHEMES = ("https", "http", "ssh")
+
+_REF_QUERY = "?ref="
+
 
-def _match_any(path: str, patterns: Iterable[str]) -> bool:
-    """Return True if *path* matches any of the glob *patterns*.
+def _split_repo_path(source: str, body_start: int) -> tuple[int, str | None, str] | None:
+    """Split the repository part of a source from its module and ref.
+
+    Scans the text after the host (or scheme) for the
+    ``[.git][//module]?ref=<ref>`` suffix. The repository path
+    ends at the first ``//`` that is followed by a module path,
+    otherwise at the ``?ref=`` query, and an optional ``.git``
+    directly before either is dropped.
 
     Parameters:
-        path: The file path string to test.
-        patterns: An iterable of ``fnmatch``-style patterns.
+        source: Raw source value.
+        body_start: Offset where the repository path begins.
 
     Returns:
-        True when at least one pattern matches.
+        ``(path_end, module, ref)`` or None when there is no
+        non-empty path followed by a non-empty ``?ref=`` value.
     """
-    return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+    query = source.find("?", body_start)
+    if query <= body_start or not source.startswith(_REF_QUERY, query):
+        return None
+    ref = source[query + len(_REF_QUERY) :].partition("&")[0]
+    if not ref:
+        return None
+
+    module = None
+    slashes = source.find("//", body_start + 1, query)
+    if slashes != -1 and slashes + 2 < query:
+        path_end = slashes
+        module = source[slashes + 2 : query]
+    else:
+        path_end = query
+    if path_end - 4 > body_start and source.startswith(".git", path_end - 4):
+        path_end -= 4
+    return path_end, module, ref
 
 
 def _parse_git_source(source: str) -> SourceRef | None:
@@ -51,7 +112,8 @@ def _parse_git_source(source: str) -> SourceRef | None:
 
     Handles HTTPS, ``ssh://``, and SCP-style SSH URLs, with
     or without the ``git::`` prefix and optional ``//module``
-    sub-paths.
+    sub-paths. The first URL-style match wins; SCP-style
+    sources are only tried when there is none.
 
     Parameters:
         source: Raw source value from a Terraform file.
@@ -62,36 +124,48 @@ def _parse_git_source(source: str) -> SourceRef | None:
         Git source.
     """
     # Try HTTPS / ssh:// scheme first
-    match = _GIT_SOURCE_RE.search(source)
-    if match:
-        return _build_ref_from_url(source, match)
+    separator = source.find("://")
+    while separator != -1:
+        for scheme in _URL_SCHEMES:
+            if source.endswith(scheme, 0, separator):
+                split = _split_repo_path(source, separator + 3)
+                if split is not None:
+                    url_start = separator - len(scheme)
+                    return _build_ref_from_url(source, source[url_start : split[0]], *split[1:])
+                break
+        separator = source.find("://", separator + 1)
 
     # Try SCP-style SSH (git@host:path)
-    match = _SSH_SCP_RE.search(source)
-    if match:
-        return _build_ref_from_scp(source, match)
+    user = source.find("git@")
+    while user != -1:
+        colon = source.find(":", user + 4)
+        if colon > user + 4:
+            split = _split_repo_path(source, colon + 1)
+            if split is not None:
+                host = source[user + 4 : colon]
+                return _build_ref_from_scp(source, host, source[colon + 1 : split[0]], *split[1:])
+        user = source.find("git@", user + 1)
 
     return None
 
 
 def _build_ref_from_url(
     source: str,
-    match: re.Match,
+    url: str,
+    module: str | None,
+    ref: str,
 ) -> SourceRef | None:
-    """Build a SourceRef from an HTTPS or ssh:// regex match.
+    """Build a SourceRef from an HTTPS or ssh:// source.
 
     Parameters:
         source: Original raw source string.
-        match: A regex match with ``url``, ``module``, and
-            ``ref`` named groups.
+        url: The repository URL, including the scheme.
+        module: Module sub-path without the leading ``//``.
+        ref: The ``?ref=`` value.
 
     Returns:
         A SourceRef or None when the URL cannot be parsed.
     """
-    url = match.group("url")
-    module = match.group("module")
-    ref = match.group("ref")
-
     parsed = urlparse(url)
     if not parsed.netloc or not parsed.path:
         return None
@@ -108,56 +182,796 @@ def _build_ref_from_url(
     else:
         repo_url = url
 
-    module_clean = module[2:] if module else None
-    return SourceRef(
-        file_path="",
-        raw=source,
-        repo=repo_path,
-        repo_url=repo_url,
-        repo_host=repo_host,
-        ref=ref,
-        module=module_clean,
-    )
+    return _template(source, repo_path, repo_url, repo_host, ref, module)
 
 
 def _build_ref_from_scp(
     source: str,
-    match: re.Match,
+    host: str,
+    path: str,
+    module: str | None,
+    ref: str,
 ) -> SourceRef:
-    """Build a SourceRef from an SCP-style SSH regex match.
+    """Build a SourceRef from an SCP-style SSH source.
 
     Converts ``git@host:owner/repo`` to an HTTPS ``repo_url``
     for downstream API compatibility.
 
     Parameters:
         source: Original raw source string.
-        match: A regex match with ``host``, ``path``,
-            ``module``, and ``ref`` named groups.
+        host: Host name between ``git@`` and ``:``.
+        path: Repository path after ``:``.
+        module: Module sub-path without the leading ``//``.
+        ref: The ``?ref=`` value.
 
     Returns:
         A SourceRef with HTTPS-normalized ``repo_url``.
     """
-    host = match.group("host")
-    path = match.group("path")
-    module = match.group("module")
-    ref = match.group("ref")
-
     if path.endswith(".git"):
         path = path[:-4]
 
-    repo_url = f"https://{host}/{path}"
-    module_clean = module[2:] if module else None
+    return _template(source, path, f"https://{host}/{path}", host, ref, module)
+
+
+def _template(
+    source: str,
+    repo: str,
+    repo_url: str,
+    repo_host: str,
+    ref: str,
+    module: str | None,
+) -> SourceRef:
+    """Build the SourceRef template of a parsed source.
+
+    Its strings are interned, so that refs parsed from different
+    values (e.g. other sub-modules of the same repository) share
+    their repo, URL, host and ref strings.
+
+    Parameters:
+        source: Original raw source string.
+        repo: Repository path.
+        repo_url: HTTPS URL of the repository.
+        repo_host: Host name of the repository.
+        ref: The ``?ref=`` value.
+        module: Module sub-path, if any.
+
+    Returns:
+        A SourceRef with an empty ``file_path``.
+    """
+    intern = sys.intern
     return SourceRef(
         file_path="",
-        raw=source,
-        repo=path,
-        repo_url=repo_url,
-        repo_host=host,
-        ref=ref,
-        module=module_clean,
+        raw=intern(source),
+        repo=intern(repo),
+        repo_url=intern(repo_url),
+        repo_host=intern(repo_host),
+        ref=intern(ref),
+        module=None if module is None else intern(module),
+        repo_key=intern(canonical_repo_key(repo_host, repo)),
     )
 
 
+@functools.lru_cache(maxsize=SOURCE_CACHE_SIZE)
+def _parse_source_value(value: bytes, hosts: frozenset[str]) -> SourceRef | None:
+    """Decode and parse one lexed ``source`` value, memoized.
+
+    The returned template is shared by every occurrence of the
+    same value.
+
+    Parameters:
+        value: Raw attribute value as produced by the lexer.
+        hosts: The current :func:`case_insensitive_hosts`. The
+            template's ``repo_key`` depends on it, so it is part
+            of the cache key: registering a host never serves a
+            key derived before.
+
+    Returns:
+        A SourceRef template with an empty ``file_path``, or None
+        when the value is not a Git source.
+
+    Raises:
+        UnicodeDecodeError: If *value* is not valid UTF-8.
+    """
+    return _parse_git_source(value.decode("utf-8"))
+
+
+def _dir_prune_patterns(patterns: Iterable[str]) -> list[str]:
+    """Derive directory patterns from file exclusion globs.
+
+    A file glob of the form ``<prefix>/*`` (any number of
+    trailing ``*``) matches every path below a directory that
+    matches ``<prefix>``, because ``fnmatch`` lets ``*`` cross
+    ``/``. Such directories can be pruned from the walk without
+    changing which files are excluded. Any other pattern may
+    match only some files in a directory and is ignored here.
+
+    Parameters:
+        patterns: File-path glob patterns (exclude/blacklist).
+
+    Returns:
+        The ``<prefix>`` part of every pattern that can only
+        match whole directory trees.
+    """
+    prefixes: list[str] = []
+    for pattern in patterns:
+        head, sep, tail = pattern.rpartition("/")
+        if sep and head and tail and tail.strip("*") == "":
+            prefixes.append(head)
+    return prefixes
+
+
+_FileKey = tuple[int, int]
+
+
+def _file_key(path: str) -> _FileKey | None:
+    """Return the physical identity of *path*, following symlinks.
+
+    Parameters:
+        path: File or directory path.
+
+    Returns:
+        ``(st_dev, st_ino)``, or None when *path* cannot be
+        stat'ed (e.g. a dangling symlink).
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+def _iter_candidate_files(
+    root: str,
+    include_set: PatternSet,
+    skip_sets: tuple[PatternSet, ...],
+    prune_set: PatternSet,
+    prune_names: frozenset[str],
+    stats: ScanStats | None,
+    follow_symlinks: bool = False,
+) -> Iterator[str]:
+    """Walk *root* and yield relative paths of files to scan.
+
+    Directories whose name is in *prune_names*, or whose
+    relative path matches *prune_set*, are removed from the
+    walk in place so their contents are never listed.
+
+    When *follow_symlinks* is set, symlinked directories are
+    descended into, so a directory linked from several places
+    is listed under each of its logical paths. A directory
+    whose ``(st_dev, st_ino)`` already appears among its own
+    ancestors is a symlink cycle and is pruned.
+
+    Parameters:
+        root: Directory to walk.
+        include_set: Files must match this set to be yielded.
+        skip_sets: Files matching any of these sets are skipped.
+        prune_set: Relative directory paths to prune.
+        prune_names: Directory base names to prune.
+        stats: Optional counters updated with pruned dirs.
+        follow_symlinks: Descend into symlinked directories.
+
+    Yields:
+        File paths relative to *root*, in ``os.walk`` order.
+    """
+    # Physical identities of each walked directory and its
+    # ancestors, keyed by path; only tracked when following links.
+    lineage: dict[str, frozenset[_FileKey]] = {}
+    if follow_symlinks:
+        root_key = _file_key(root)
+        lineage[root] = frozenset() if root_key is None else frozenset((root_key,))
+
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=follow_symlinks):
+        rel_dir = os.path.relpath(dirpath, root)
+        prefix = "" if rel_dir == os.curdir else rel_dir + os.sep
+
+        if dirnames and (prune_names or prune_set):
+            kept: list[str] = []
+            for dirname in dirnames:
+                if dirname in prune_names or prune_set.matches(prefix + dirname):
+                    if stats is not None:
+                        stats.dirs_pruned += 1
+                    continue
+                kept.append(dirname)
+            dirnames[:] = kept
+
+        if follow_symlinks:
+            ancestors = lineage.pop(dirpath, frozenset())
+            walked: list[str] = []
+            for dirname in dirnames:
+                child = os.path.join(dirpath, dirname)
+                key = _file_key(child)
+                if key is not None and key in ancestors:
+                    logger.debug("Skipping symlink cycle at %s", child)
+                    continue
+                lineage[child] = ancestors if key is None else ancestors | {key}
+                walked.append(dirname)
+            dirnames[:] = walked
+
+        for filename in filenames:
+            rel_path = prefix + filename
+            if not include_set.matches(rel_path):
+                continue
+            if any(skip_set.matches(rel_path) for skip_set in skip_sets):
+                continue
+            yield rel_path
+
+
+def _normalize_listed_path(root: str, path: str) -> str | None:
+    """Convert a caller-supplied path to a clean relative path.
+
+    Parameters:
+        root: Scan root directory.
+        path: Absolute path, or path relative to *root*.
+
+    Returns:
+        The normalized relative path, or None when the path
+        points outside *root*.
+    """
+    if os.path.isabs(path):
+        path = os.path.relpath(path, root)
+    path = os.path.normpath(path)
+    if path == os.curdir or path == os.pardir or path.startswith(os.pardir + os.sep):
+        return None
+    return path
+
+
+def _iter_listed_files(
+    root: str,
+    paths: Iterable[str],
+    include_set: PatternSet,
+    skip_sets: tuple[PatternSet, ...],
+    prune_names: frozenset[str],
+) -> Iterator[str]:
+    """Filter an explicit file list the way a walk would.
+
+    Applies the same include, exclude and blacklist filters as
+    :func:`_iter_candidate_files` and skips files inside pruned
+    directories, so an explicit list never scans more than a
+    full walk would. Duplicates are dropped, first one wins.
+
+    Parameters:
+        root: Scan root directory.
+        paths: File paths, absolute or relative to *root*.
+        include_set: Files must match this set to be yielded.
+        skip_sets: Files matching any of these sets are skipped.
+        prune_names: Directory base names to prune.
+
+    Yields:
+        File paths relative to *root*, in input order.
+    """
+    seen: set[str] = set()
+    for path in paths:
+        rel_path = _normalize_listed_path(root, path)
+        if rel_path is None or rel_path in seen:
+            continue
+        seen.add(rel_path)
+        if _is_listed_candidate(rel_path, include_set, skip_sets, prune_names):
+            yield rel_path
+
+
+def _is_listed_candidate(
+    rel_path: str,
+    include_set: PatternSet,
+    skip_sets: tuple[PatternSet, ...],
+    prune_names: frozenset[str],
+) -> bool:
+    """Return True if a listed file passes the walk's filters.
+
+    Parameters:
+        rel_path: Normalized path relative to the scan root.
+        include_set: Files must match this set to be scanned.
+        skip_sets: Files matching any of these sets are skipped.
+        prune_names: Directory base names to prune.
+
+    Returns:
+        False when the file is outside the include set, matches
+        a skip set, or sits inside a pruned directory.
+    """
+    if prune_names and not prune_names.isdisjoint(rel_path.split(os.sep)[:-1]):
+        return False
+    if not include_set.matches(rel_path):
+        return False
+    return not any(skip_set.matches(rel_path) for skip_set in skip_sets)
+
+
+def _git_grep_candidates(
+    root: str,
+    include_set: PatternSet,
+    skip_sets: tuple[PatternSet, ...],
+    prune_names: frozenset[str],
+) -> list[str] | None:
+    """Find the files worth scanning with ``git grep``.
+
+    Only tracked files that contain ``?ref=`` can hold a pinned
+    Git source, and ``git grep`` finds them from the index with
+    several threads, without Python opening every file. Matches
+    are filtered like an explicit file list and then lexed as
+    usual, so results equal those of a walk over tracked files.
+
+    Ignored files are never considered. Untracked (non-ignored)
+    files that pass the filters would be missed, so their
+    presence, like *root* not being in a Git worktree, makes
+    this return None and the caller walks the tree instead.
+
+    Parameters:
+        root: Scan root directory.
+        include_set: Files must match this set to be scanned.
+        skip_sets: Files matching any of these sets are skipped.
+        prune_names: Directory base names to prune.
+
+    Returns:
+        Candidate paths relative to *root* in path order, or
+        None when the walker must be used.
+    """
+    try:
+        untracked = untracked_paths(root)
+    except ScanError as exc:
+        logger.info("git-grep backend unavailable, walking %s instead: %s", root, exc)
+        return None
+    relevant = list(_iter_listed_files(root, untracked, include_set, skip_sets, prune_names))
+    if relevant:
+        logger.info(
+            "%d untracked file(s) to scan (e.g. %s); walking %s instead of using git grep.",
+            len(relevant),
+            relevant[0],
+            root,
+        )
+        return None
+    try:
+        matches = grep_files(root, _REF_MARKER.decode("ascii"))
+    except ScanError as exc:
+        logger.info("git grep failed, walking %s instead: %s", root, exc)
+        return None
+    return list(_iter_listed_files(root, matches, include_set, skip_sets, prune_names))
+
+
+class _FileScan(NamedTuple):
+    """What reading one file produced.
+
+    Attributes:
+        refs: The refs parsed from the file; None when it could
+            not be read, or when its content was not parsed
+            because *blob_id* is already cached.
+        blob_id: Git blob ID of the content; None when the file
+            could not be read or holds no ``?ref=`` at all.
+    """
+
+    refs: list[SourceRef] | None
+    blob_id: str | None
+
+
+def blob_id(data: bytes | mmap.mmap) -> str:
+    """Return the Git blob ID (SHA-1 object name) of file content.
+
+    Identical to what ``git hash-object`` prints, so content read
+    from a working tree and blobs listed by ``git ls-tree`` share
+    parse cache entries.
+
+    Parameters:
+        data: The complete file content.
+
+    Returns:
+        The hexadecimal blob ID.
+    """
+    digest = hashlib.sha1(b"blob %d\0" % len(data), usedforsecurity=False)
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _read_source_tokens(
+    handle: BinaryIO,
+    known: Collection[str] = (),
+) -> tuple[list[SourceToken] | None, str | None]:
+    """Return the ``source`` attribute values in an open file.
+
+    Files of at least :data:`MMAP_MIN_BYTES` are memory-mapped
+    instead of read, so the kernel pages them in on demand and
+    no Python copy of the whole file is made. Any file that does
+    not contain ``?ref=`` cannot hold a pinned Git source and is
+    rejected by a substring search before the lexer runs; other
+    files are hashed, and not lexed when their blob ID is in
+    *known*.
+
+    Parameters:
+        handle: A file opened in binary mode.
+        known: Blob IDs whose parse result the caller already has.
+
+    Returns:
+        A ``(tokens, blob_id)`` pair: the lexed source tokens in
+        file order (None when the blob is in *known*) and the
+        content's blob ID (None without ``?ref=``).
+    """
+    size = os.fstat(handle.fileno()).st_size
+    if size == 0:
+        return [], None
+    if size >= MMAP_MIN_BYTES:
+        try:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped.find(_REF_MARKER) == -1:
+                    return [], None
+                mapped_id = blob_id(mapped)
+                if mapped_id in known:
+                    return None, mapped_id
+                # Tokens hold copies of their values, so nothing refers
+                # to the mapping once it is closed.
+                return list(iter_source_tokens(mapped)), mapped_id
+        except (OSError, ValueError):
+            handle.seek(0)
+    data = handle.read()
+    if _REF_MARKER not in data:
+        return [], None
+    data_id = blob_id(data)
+    if data_id in known:
+        return None, data_id
+    return list(iter_source_tokens(data)), data_id
+
+
+def _scan_file(root: str, rel_path: str, known: Collection[str] = ()) -> _FileScan:
+    """Read one file and extract every Git source ref in it.
+
+    The file is lexed as bytes; only the ``source`` values are
+    decoded, so files in other encodings are still scanned and a
+    value that is not valid UTF-8 is skipped. Blacklist filters
+    are not applied here so that the result depends only on the
+    file content.
+
+    Parameters:
+        root: Scan root directory.
+        rel_path: File path relative to *root*.
+        known: Blob IDs whose parse result the caller already
+            has; such files are hashed but not lexed.
+
+    Returns:
+        The SourceRef objects found in the file (with
+        ``file_path``, ``line`` and ``column`` set) and the
+        content's blob ID.
+    """
+    full_path = os.path.join(root, rel_path)
+    try:
+        with open(full_path, "rb") as handle:
+            tokens, content_id = _read_source_tokens(handle, known)
+    except OSError:
+        return _FileScan(None, None)
+    if tokens is None:
+        return _FileScan(None, content_id)
+    return _FileScan(_tokens_to_refs(rel_path, tokens), content_id)
+
+
+def _scan_blob(
+    rel_path: str,
+    data: bytes,
+    blobs: BlobCache | None = None,
+) -> list[SourceRef]:
+    """Extract every Git source ref from in-memory file content.
+
+    Parameters:
+        rel_path: Path to attribute the refs to.
+        data: Raw file content, e.g. a blob read from Git.
+        blobs: Optional parse cache, consulted and updated by
+            the content's blob ID.
+
+    Returns:
+        The SourceRef objects found in *data*.
+    """
+    if _REF_MARKER not in data:
+        return []
+    if blobs is None:
+        return _tokens_to_refs(rel_path, iter_source_tokens(data))
+    data_id = blob_id(data)
+    if data_id in blobs:
+        return blobs.refs(data_id, rel_path)
+    refs = _tokens_to_refs(rel_path, iter_source_tokens(data))
+    blobs.store(data_id, refs)
+    return refs
+
+
+def _tokens_to_refs(rel_path: str, tokens: Iterable[SourceToken]) -> list[SourceRef]:
+    """Parse lexed ``source`` values into SourceRef objects.
+
+    Values that are not valid UTF-8 are skipped with a debug
+    log, and values that are not Git sources are dropped.
+
+    Parameters:
+        rel_path: Path to attribute the refs to.
+        tokens: Tokens produced by the lexer.
+
+    Returns:
+        One SourceRef per Git source, with ``file_path``,
+        ``line`` and ``column`` set.
+    """
+    refs: list[SourceRef] = []
+    hosts = case_insensitive_hosts()
+    for token in tokens:
+        try:
+            parsed = _parse_source_value(token.value, hosts)
+        except UnicodeDecodeError:
+            logger.debug("Skipping non UTF-8 source value in %s", rel_path)
+            continue
+        if not parsed:
+            continue
+        refs.append(
+            SourceRef(
+                file_path=rel_path,
+                raw=parsed.raw,
+                repo=parsed.repo,
+                repo_url=parsed.repo_url,
+                repo_host=parsed.repo_host,
+                ref=parsed.ref,
+                module=parsed.module,
+                line=token.line,
+                column=token.column,
+                repo_key=parsed.repo_key,
+            )
+        )
+    return refs
+
+
+def _scan_chunk(
+    root: str,
+    rel_paths: list[str],
+    known: frozenset[str] = frozenset(),
+) -> list[_FileScan]:
+    """Scan a batch of files; the unit of work for worker processes.
+
+    Parameters:
+        root: Scan root directory.
+        rel_paths: File paths relative to *root*.
+        known: Blob IDs that need not be parsed.
+
+    Returns:
+        One :func:`_scan_file` result per path, in input order.
+    """
+    return [_scan_file(root, rel_path, known) for rel_path in rel_paths]
+
+
+def _scan_files(
+    root: str,
+    rel_paths: list[str],
+    workers: int,
+    known: Collection[str] = (),
+) -> Iterator[_FileScan]:
+    """Scan *rel_paths*, optionally across a process pool.
+
+    Files are split into contiguous chunks and mapped over a
+    ``ProcessPoolExecutor``; ``map`` yields chunk results in
+    submission order, so the merged output is identical to a
+    serial scan. Trees smaller than
+    :data:`PARALLEL_SCAN_MIN_FILES` are always scanned serially
+    because process start-up would dominate.
+
+    Parameters:
+        root: Scan root directory.
+        rel_paths: File paths relative to *root*.
+        workers: Maximum number of worker processes.
+        known: Blob IDs that need not be parsed. Checked live in
+            a serial scan, so it may grow while results are
+            consumed; worker processes get a snapshot.
+
+    Yields:
+        One :func:`_scan_file` result per path, in input order.
+    """
+    if workers <= 1 or len(rel_paths) < PARALLEL_SCAN_MIN_FILES:
+        for rel_path in rel_paths:
+            yield _scan_file(root, rel_path, known)
+        return
+
+    # Several chunks per worker keeps the pool busy when file
+    # sizes are uneven, without paying per-file IPC overhead.
+    chunk_size = max(1, -(-len(rel_paths) // (workers * 4)))
+    chunks = [rel_paths[i : i + chunk_size] for i in range(0, len(rel_paths), chunk_size)]
+    # Workers may not inherit the parent's registered forge hosts.
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=add_case_insensitive_hosts,
+        initargs=tuple(case_insensitive_hosts()),
+    ) as executor:
+        snapshot = frozenset(known)
+        for chunk_result in executor.map(
+            _scan_chunk, [root] * len(chunks), chunks, [snapshot] * len(chunks)
+        ):
+            yield from chunk_result
+
+
+def _iter_blob_refs(
+    root: str,
+    rel_paths: list[str],
+    blob_ids: dict[str, str],
+    stats: ScanStats | None,
+    cache: BlobCache | None = None,
+) -> Iterator[list[SourceRef] | None]:
+    """Yield the refs of every file of a Git tree, in order.
+
+    Blob contents are streamed from a single ``git cat-file
+    --batch`` process. Paths that share a blob (identical files)
+    are read and parsed once, and blobs found in *cache* are not
+    read at all.
+
+    Parameters:
+        root: The Git repository.
+        rel_paths: Paths to scan, relative to the repository root.
+        blob_ids: Blob ID of every path in the tree.
+        stats: Optional counters updated during the scan.
+        cache: Optional parse cache keyed by blob ID, updated
+            with the blobs parsed here.
+
+    Yields:
+        One entry per path in *rel_paths* order: the file's
+        refs, or None when its blob is missing.
+    """
+    if cache is None:
+        cache = BlobCache()
+    counts = collections.Counter(blob_ids[rel_path] for rel_path in rel_paths)
+    blobs = iter_blobs(root, [object_id for object_id in counts if object_id not in cache])
+    # Refs of blobs used by more than one path, for the later paths.
+    shared: dict[str, list[SourceRef] | None] = {}
+    for rel_path in rel_paths:
+        object_id = blob_ids[rel_path]
+        if object_id in cache and object_id not in shared:
+            if stats is not None:
+                stats.files_reused += 1
+            yield cache.refs(object_id, rel_path)
+            continue
+        if object_id in shared:
+            original = shared[object_id]
+            refs = None
+            if original is not None:
+                refs = [dataclasses.replace(ref, file_path=rel_path) for ref in original]
+                if stats is not None:
+                    stats.files_deduplicated += 1
+            yield refs
+            continue
+        _, data = next(blobs)
+        refs = None
+        if data is not None:
+            refs = _scan_blob(rel_path, data)
+            cache.store(object_id, refs)
+        if counts[object_id] > 1:
+            shared[object_id] = refs
+        if refs is not None and stats is not None:
+            stats.files_scanned += 1
+        yield refs
+
+
+def _iter_archive_refs(
+    archive: str,
+    include_set: PatternSet,
+    skip_sets: tuple[PatternSet, ...],
+    prune_names: frozenset[str],
+    listed: set[str | None] | None,
+    stats: ScanStats | None,
+) -> Iterator[list[SourceRef]]:
+    """Yield the refs of every matching member of an archive.
+
+    Member names are filtered like an explicit file list before
+    any content is read, and each selected member is parsed from
+    memory and released before the next one is read.
+
+    Parameters:
+        archive: Path of the tar or zip archive.
+        include_set: Members must match this set to be scanned.
+        skip_sets: Members matching any of these sets are skipped.
+        prune_names: Directory base names to prune.
+        listed: When set, only these normalized paths are read.
+        stats: Optional counters updated during the scan.
+
+    Yields:
+        The refs of each selected member, in archive order.
+        Members stored more than once are read the first time.
+    """
+    seen: set[str] = set()
+    cache = BlobCache()
+
+    def wanted(name: str) -> bool:
+        rel_path = _normalize_listed_path("", name.lstrip("/"))
+        if rel_path is None or rel_path in seen:
+            return False
+        if listed is not None and rel_path not in listed:
+            return False
+        seen.add(rel_path)
+        return _is_listed_candidate(rel_path, include_set, skip_sets, prune_names)
+
+    for name, data in iter_archive_members(archive, wanted):
+        if stats is not None:
+            stats.files_scanned += 1
+        yield _scan_blob(os.path.normpath(name.lstrip("/")), data, cache)
+
+
+def _iter_file_refs(
+    root: str,
+    rel_paths: list[str],
+    workers: int,
+    index: ScanIndex | None,
+    stats: ScanStats | None,
+    partial: bool = False,
+    dedupe: bool = False,
+) -> Iterator[list[SourceRef] | None]:
+    """Yield the refs of every file, reusing indexed results.
+
+    Files whose stat metadata still matches *index* are served
+    from it; only the remaining files are read and parsed. The
+    index is updated with the fresh results and, once every file
+    has been yielded, pruned of files that are no longer part of
+    the tree. Results are produced one file at a time, so only
+    the refs of files not yet consumed are held in memory.
+
+    Parameters:
+        root: Scan root directory.
+        rel_paths: Candidate file paths relative to *root*.
+        workers: Number of processes used to parse files.
+        index: Optional persistent scan index.
+        stats: Optional counters updated during the scan.
+        partial: True when *rel_paths* is a subset of the tree,
+            in which case entries for other files are kept.
+        dedupe: Parse each physical file (by ``st_dev`` and
+            ``st_ino``) once, and attribute its refs to every
+            path that reaches it.
+
+    Yields:
+        One entry per path in *rel_paths* order: the file's
+        refs, or None when it could not be read.
+    """
+    cache = BlobCache() if index is None else index.blobs
+    fresh = [index is not None and index.is_fresh(root, rel_path) for rel_path in rel_paths]
+    pending_paths = [
+        rel_path for rel_path, is_fresh in zip(rel_paths, fresh, strict=True) if not is_fresh
+    ]
+
+    # Pending paths that reach the same physical file as an earlier
+    # one ("aliases") copy the refs parsed for that first path.
+    aliases: dict[str, _FileKey] = {}
+    owners: dict[str, _FileKey] = {}
+    shared: dict[_FileKey, _FileScan] = {}
+    if dedupe:
+        first_paths: dict[_FileKey, str] = {}
+        for rel_path in pending_paths:
+            key = _file_key(os.path.join(root, rel_path))
+            if key is None:
+                continue
+            if key in first_paths:
+                aliases[rel_path] = key
+                owners[first_paths[key]] = key
+            else:
+                first_paths[key] = rel_path
+        pending_paths = [rel_path for rel_path in pending_paths if rel_path not in aliases]
+
+    scanned = _scan_files(root, pending_paths, workers, cache)
+    for rel_path, is_fresh in zip(rel_paths, fresh, strict=True):
+        if is_fresh and index is not None:
+            if stats is not None:
+                stats.files_cached += 1
+            yield index.refs(rel_path)
+            continue
+
+        if rel_path in aliases:
+            original, content_id = shared.get(aliases[rel_path], _FileScan(None, None))
+            refs = None
+            if original is not None:
+                refs = [dataclasses.replace(ref, file_path=rel_path) for ref in original]
+                if stats is not None:
+                    stats.files_deduplicated += 1
+        else:
+            refs, content_id = next(scanned)
+            if content_id is not None:
+                if refs is None:
+                    refs = cache.refs(content_id, rel_path)
+                    if stats is not None:
+                        stats.files_reused += 1
+                elif content_id not in cache:
+                    cache.store(content_id, refs)
+            if rel_path in owners:
+                shared[owners[rel_path]] = _FileScan(refs, content_id)
+            if refs is not None and stats is not None:
+                stats.files_scanned += 1
+
+        if refs is not None and index is not None:
+            index.store(rel_path, refs, content_id)
+        yield refs
+
+    if index is not None and not partial:
+        index.retain(rel_paths)
+
+
+@overload
 def scan_sources(
     root: str,
     include: list[str] | None = None,
@@ -165,71 +979,187 @@ def scan_sources(
     blacklist_repos: list[str] | None = None,
     blacklist_modules: list[str] | None = None,
     blacklist_files: list[str] | None = None,
-) -> list[SourceRef]:
+    prune_defaults: bool = True,
+    stats: ScanStats | None = None,
+    workers: int = 1,
+    index: ScanIndex | None = None,
+    files: Iterable[str] | None = None,
+    follow_symlinks: bool = False,
+    git_rev: str | None = None,
+    backend: str = "walk",
+    as_table: Literal[False] = False,
+) -> list[SourceRef]: ...
+
+
+@overload
+def scan_sources(
+    root: str,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    blacklist_repos: list[str] | None = None,
+    blacklist_modules: list[str] | None = None,
+    blacklist_files: list[str] | None = None,
+    prune_defaults: bool = True,
+    stats: ScanStats | None = None,
+    workers: int = 1,
+    index: ScanIndex | None = None,
+    files: Iterable[str] | None = None,
+    follow_symlinks: bool = False,
+    git_rev: str | None = None,
+    backend: str = "walk",
+    *,
+    as_table: Literal[True],
+) -> SourceTable: ...
+
+
+def scan_sources(
+    root: str,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    blacklist_repos: list[str] | None = None,
+    blacklist_modules: list[str] | None = None,
+    blacklist_files: list[str] | None = None,
+    prune_defaults: bool = True,
+    stats: ScanStats | None = None,
+    workers: int = 1,
+    index: ScanIndex | None = None,
+    files: Iterable[str] | None = None,
+    follow_symlinks: bool = False,
+    git_rev: str | None = None,
+    backend: str = "walk",
+    as_table: bool = False,
+) -> list[SourceRef] | SourceTable:
     """Walk *root* and collect all Git module source refs.
 
     Parameters:
-        root: Directory to scan recursively.
+        root: Directory to scan recursively, or a tar/zip
+            archive (see :func:`~agronomist.archive.is_archive`)
+            whose members are streamed and parsed in memory,
+            in archive order. *index*, *workers*,
+            *follow_symlinks* and *backend* do not apply to
+            archives, and *files* names members.
         include: Glob patterns for files to include
             (defaults to ``["**/*.hcl", "**/*.tf"]``).
         exclude: Glob patterns for files to skip.
         blacklist_repos: Repo patterns to ignore.
         blacklist_modules: Module patterns to ignore.
         blacklist_files: File-path patterns to ignore.
+        prune_defaults: Skip the directories listed in
+            :data:`DEFAULT_PRUNE_DIRS` without walking them.
+        stats: Optional counters updated during the scan.
+        workers: Number of processes used to parse files.
+            Values above 1 enable parallel scanning for trees
+            of at least :data:`PARALLEL_SCAN_MIN_FILES` files.
+        index: Optional persistent scan index; unchanged files
+            are served from it, files whose content was parsed
+            before are not parsed again, and it is updated in
+            memory (the caller is responsible for saving it).
+            Without an index, identical contents are still
+            parsed once per call.
+        files: Explicit file paths (absolute or relative to
+            *root*) to scan instead of walking *root*. The
+            include, exclude and blacklist filters still apply.
+        follow_symlinks: Descend into symlinked directories
+            (symlink cycles are skipped) and parse each physical
+            file once, reporting its refs under every path that
+            reaches it.
+        git_rev: Scan the files of this Git revision in the
+            repository at *root* (which may be bare) instead of
+            the working tree. Blobs are read through one
+            ``git cat-file --batch`` process, except those whose
+            parse result is in the blob cache of *index*;
+            *workers* and *follow_symlinks* do not apply, and
+            *files* further restricts the tree's paths.
+        backend: How files are discovered when neither *files*
+            nor *git_rev* is given: ``"walk"`` lists the tree
+            with ``os.walk``; ``"git-grep"`` asks ``git grep``
+            for tracked files containing ``?ref=`` (see
+            :func:`_git_grep_candidates`) and falls back to the
+            walk when it cannot be used.
+        as_table: Collect the refs into a columnar
+            :class:`~agronomist.sourcetable.SourceTable` instead
+            of a list, for scans with millions of references.
 
     Returns:
-        A list of SourceRef objects found in matching files.
-    """
-    include = include or ["**/*.hcl", "**/*.tf"]
-    exclude = exclude or []
-    blacklist_repos = blacklist_repos or []
-    blacklist_modules = blacklist_modules or []
-    blacklist_files = blacklist_files or []
+        The SourceRef objects found in matching files (as a list,
+        or a SourceTable when *as_table* is set), in walk order
+        regardless of *workers*.
 
-    results: list[SourceRef] = []
-    for dirpath, _, filenames in os.walk(root):
-        for filename in filenames:
-            rel_path = os.path.relpath(os.path.join(dirpath, filename), root)
-            if include and not _match_any(rel_path, include):
-                continue
-            if exclude and _match_any(rel_path, exclude):
-                continue
-            if blacklist_files and _match_any(rel_path, blacklist_files):
-                continue
-
-            full_path = os.path.join(root, rel_path)
-            try:
-                with open(full_path, encoding="utf-8", newline="") as handle:
-                    content = handle.read()
-            except OSError:
-                continue
+    Raises:
+        ScanError: When *git_rev* is set and the revision's
+            tree cannot be read, or when *root* is an archive
+            that cannot be read.
+    """
+    # Compile every pattern list once up front; each file is then
+    # tested with a single regex call per list.
+    include_set = PatternSet(include or ["**/*.hcl", "**/*.tf"])
+    exclude_set = PatternSet(exclude or [])
+    repo_set = PatternSet(blacklist_repos or [])
+    module_set = PatternSet(blacklist_modules or [])
+    file_set = PatternSet(blacklist_files or [])
+    prune_set = PatternSet(_dir_prune_patterns([*exclude_set.patterns, *file_set.patterns]))
+    prune_names = frozenset(DEFAULT_PRUNE_DIRS) if prune_defaults else frozenset()
 
-            for match in _SOURCE_RE.finditer(content):
-                source = match.group("source")
-                parsed = _parse_git_source(source)
-                if not parsed:
-                    continue
+    skip_sets = (exclude_set, file_set)
+    file_refs: Iterator[list[SourceRef] | None]
+    if git_rev is not None:
+        blob_ids = {
+            os.path.normpath(path): object_id for path, object_id in list_tree(root, git_rev)
+        }
+        rel_paths = list(_iter_listed_files(root, blob_ids, include_set, skip_sets, prune_names))
+        if files is not None:
+            listed = {_normalize_listed_path(root, path) for path in files}
+            rel_paths = [rel_path for rel_path in rel_paths if rel_path in listed]
+        cache = None if index is None else index.blobs
+        file_refs = _iter_blob_refs(root, rel_paths, blob_ids, stats, cache)
+    elif is_archive(root):
+        listed = None
+        if files is not None:
+            listed = {_normalize_listed_path("", path) for path in files}
+        file_refs = _iter_archive_refs(root, include_set, skip_sets, prune_names, listed, stats)
+    else:
+        grep_paths = None
+        if backend == "git-grep" and files is None and not follow_symlinks:
+            grep_paths = _git_grep_candidates(root, include_set, skip_sets, prune_names)
+        if grep_paths is not None:
+            rel_paths = grep_paths
+        elif files is not None:
+            rel_paths = list(_iter_listed_files(root, files, include_set, skip_sets, prune_names))
+        else:
+            rel_paths = list(
+                _iter_candidate_files(
+                    root,
+                    include_set,
+                    skip_sets,
+                    prune_set,
+                    prune_names,
+                    stats,
+                    follow_symlinks=follow_symlinks,
+                )
+            )
+        file_refs = _iter_file_refs(
+            root,
+            rel_paths,
+            workers,
+            index,
+            stats,
+            # git grep lists only files containing ``?ref=``, so the
+            # index keeps the entries of the others.
+            partial=files is not None or grep_paths is not None,
+            dedupe=follow_symlinks,
+        )
 
-                # Apply blacklist filters
-                if blacklist_repos and _match_any(parsed.repo, blacklist_repos):
-                    continue
-                if (
-                    parsed.module
-                    and blacklist_modules
-                    and _match_any(parsed.module, blacklist_modules)
-                ):
-                    continue
+    results: list[SourceRef] | SourceTable = SourceTable() if as_table else []
+    for refs in file_refs:
+        if refs is None:
+            continue
 
-                results.append(
-                    SourceRef(
-                        file_path=rel_path,
-                        raw=parsed.raw,
-                        repo=parsed.repo,
-                        repo_url=parsed.repo_url,
-                        repo_host=parsed.repo_host,
-                        ref=parsed.ref,
-                        module=parsed.module,
-                    )
-                )
+        for ref in refs:
+            # Apply blacklist filters
+            if repo_set.matches(ref.repo):
+                continue
+            if ref.module and module_set.matches(ref.module):
+                continue
+            results.append(ref)
 
     return results
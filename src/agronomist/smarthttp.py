@@ -0,0 +1,342 @@
+"""In-process tag listing over git's smart HTTP protocol v2.
+
+:class:`SmartHttpClient` lists the tags of an ``http(s)://``
+repository with the protocol v2 ``ls-refs`` command, asking the
+server for ``refs/tags/`` only, so a repository with tens of
+thousands of branches and pull-request refs answers with its tags
+alone. Requests go through one keep-alive ``requests`` session,
+so resolving many repositories on the same host reuses its
+connections instead of forking ``git ls-remote`` for each.
+
+:func:`versioncmp` ports git's ``versioncmp()``, the comparison
+behind ``--sort=v:refname``, so the tag picked is the one
+``git ls-remote --tags --sort=-v:refname`` would list first.
+"""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import requests
+
+from . import __version__
+from .circuit import CircuitBreaker
+from .exceptions import NetworkError, ResolverError
+from .http import build_session
+from .ratelimit import RateLimitScheduler
+
+FLUSH_PKT = b"0000"
+DELIM_PKT = b"0001"
+
+_TAG_PREFIX = "refs/tags/"
+_ADVERTISEMENT_TYPE = "application/x-git-upload-pack-advertisement"
+_RESULT_TYPE = "application/x-git-upload-pack-result"
+
+# States and results of git's versioncmp() state machine: normal,
+# integral part, fractional part (after a leading zero), leading
+# zeros; compare the differing bytes, or the length of digit runs.
+_S_N, _S_I, _S_F, _S_Z = 0, 3, 6, 9
+_CMP, _LEN = 2, 3
+_NEXT_STATE = (
+    # x    d     0
+    _S_N, _S_I, _S_Z,  # S_N
+    _S_N, _S_I, _S_I,  # S_I
+    _S_N, _S_F, _S_F,  # S_F
+    _S_N, _S_F, _S_Z,  # S_Z
+)  # fmt: skip
+_RESULT_TYPE_TABLE = (
+    # x/x  x/d  x/0  d/x  d/d   d/0   0/x  0/d   0/0
+    _CMP, _CMP, _CMP, _CMP, _LEN, _CMP, _CMP, _CMP, _CMP,  # S_N
+    _CMP, -1, -1, +1, _LEN, _LEN, +1, _LEN, _LEN,  # S_I
+    _CMP, _CMP, _CMP, _CMP, _CMP, _CMP, _CMP, _CMP, _CMP,  # S_F
+    _CMP, +1, +1, -1, _CMP, _CMP, -1, _CMP, _CMP,  # S_Z
+)  # fmt: skip
+
+
+def _char_class(c: int) -> int:
+    """Return 0 for a non-digit, 1 for 1-9 and 2 for ``0``."""
+    return (c == 0x30) + (0x30 <= c <= 0x39)
+
+
+def versioncmp(a: str, b: str) -> int:
+    """Compare two ref names the way ``git --sort=v:refname`` does.
+
+    Digit runs compare numerically (``v1.10`` > ``v1.9``), and a
+    run with leading zeros sorts as a fraction (``1.01`` <
+    ``1.1``). ``versionsort.suffix`` is not consulted.
+
+    Parameters:
+        a: First ref or tag name.
+        b: Second ref or tag name.
+
+    Returns:
+        A negative number, zero, or a positive number when *a*
+        sorts before, equal to, or after *b*.
+    """
+    s1 = a.encode() + b"\0"
+    s2 = b.encode() + b"\0"
+    i = 0
+    c1, c2 = s1[0], s2[0]
+    state = _S_N + _char_class(c1)
+    while c1 == c2:
+        if c1 == 0:
+            return 0
+        state = _NEXT_STATE[state]
+        i += 1
+        c1, c2 = s1[i], s2[i]
+        state += _char_class(c1)
+    diff = c1 - c2
+    result = _RESULT_TYPE_TABLE[state * 3 + _char_class(c2)]
+    if result == _CMP:
+        return diff
+    if result != _LEN:
+        return result
+    # Both differing bytes are digits: the longer digit run wins.
+    j = i + 1
+    while _char_class(s1[j]):
+        if not _char_class(s2[j]):
+            return 1
+        j += 1
+    return -1 if _char_class(s2[j]) else diff
+
+
+def latest_version_tag(refs: Iterable[str]) -> str | None:
+    """Return the tag ``git ls-remote --sort=-v:refname`` lists first.
+
+    Parameters:
+        refs: Full ref names; refs outside ``refs/tags/`` and
+            peeled ``^{}`` entries are ignored.
+
+    Returns:
+        The tag name without ``refs/tags/``, or None.
+    """
+    tags = [ref for ref in refs if ref.startswith(_TAG_PREFIX) and not ref.endswith("^{}")]
+    if not tags:
+        return None
+    return max(tags, key=functools.cmp_to_key(versioncmp))[len(_TAG_PREFIX) :]
+
+
+def version_sorted_tags(refs: Iterable[str]) -> list[str]:
+    """Return the tags in the order ``git ls-remote --sort=-v:refname`` lists them.
+
+    Parameters:
+        refs: Full ref names; refs outside ``refs/tags/`` and
+            peeled ``^{}`` entries are ignored.
+
+    Returns:
+        Tag names without ``refs/tags/``, latest first.
+    """
+    tags = [ref for ref in refs if ref.startswith(_TAG_PREFIX) and not ref.endswith("^{}")]
+    tags.sort(key=functools.cmp_to_key(versioncmp), reverse=True)
+    return [tag[len(_TAG_PREFIX) :] for tag in tags]
+
+
+def pkt_line(payload: bytes) -> bytes:
+    """Frame *payload* as a pkt-line (four hex digits of length).
+
+    Parameters:
+        payload: At most 65516 bytes.
+
+    Returns:
+        The framed line.
+    """
+    return b"%04x" % (len(payload) + 4) + payload
+
+
+def iter_pkt_lines(data: bytes) -> Iterator[bytes | None]:
+    """Split a pkt-line stream.
+
+    Parameters:
+        data: A complete response body.
+
+    Yields:
+        Each payload, without a trailing newline; None for the
+        flush, delimiter and response-end packets.
+
+    Raises:
+        ResolverError: If the stream is truncated or malformed.
+    """
+    pos = 0
+    while pos < len(data):
+        try:
+            length = int(data[pos : pos + 4], 16)
+        except ValueError as exc:
+            raise ResolverError(f"Malformed pkt-line at byte {pos}") from exc
+        if length < 4:
+            yield None
+            pos += 4
+            continue
+        if pos + length > len(data):
+            raise ResolverError("Truncated pkt-line stream")
+        yield data[pos + 4 : pos + length].rstrip(b"\n")
+        pos += length
+
+
+@dataclass
+class SmartHttpClient:
+    """Lists tags of HTTP(S) remotes with protocol v2 ``ls-refs``.
+
+    Attributes:
+        timeout: HTTP request timeout in seconds.
+        retries: Number of automatic retries on transient errors.
+        backoff_factor: Exponential backoff multiplier.
+        scheduler: Rate-limit scheduler shared with other
+            clients; a new one is created when omitted.
+        breaker: Circuit breaker shared with other clients;
+            unreachable hosts are never skipped when omitted.
+    """
+
+    timeout: int = 20
+    retries: int = 3
+    backoff_factor: float = 0.5
+    scheduler: RateLimitScheduler | None = field(default=None, repr=False)
+    breaker: CircuitBreaker | None = field(default=None, repr=False)
+    _session: requests.Session = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Initialize the keep-alive HTTP session."""
+        self._session = build_session(
+            self.retries, self.backoff_factor, self.scheduler, self.breaker
+        )
+        self._session.headers.update(
+            {"Git-Protocol": "version=2", "User-Agent": f"git/agronomist-{__version__}"}
+        )
+
+    @staticmethod
+    def supports(repo_url: str) -> bool:
+        """Return True if *repo_url* can be listed over HTTP.
+
+        Parameters:
+            repo_url: Repository URL from a module source.
+
+        Returns:
+            True for ``http://`` and ``https://`` URLs.
+        """
+        return urlparse(repo_url).scheme in ("http", "https")
+
+    def _capabilities(self, base: str) -> list[str]:
+        """Fetch the v2 capability advertisement of *base*.
+
+        Raises:
+            NetworkError: If the host cannot be reached or times out.
+            ResolverError: If the request fails otherwise or the
+                server does not speak protocol v2 with ``ls-refs``.
+        """
+        try:
+            response = self._session.get(
+                f"{base}/info/refs",
+                params={"service": "git-upload-pack"},
+                timeout=self.timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            raise NetworkError(f"Git HTTP: cannot reach {base}: {exc}") from exc
+        except requests.RequestException as exc:
+            raise ResolverError(f"Git HTTP: request to {base} failed: {exc}") from exc
+        if response.status_code in (401, 403, 404):
+            raise ResolverError(
+                f"Git: repository {base} not found or no access ({response.status_code})"
+            )
+        if response.status_code != 200:
+            raise ResolverError(f"Git HTTP: {base} answered {response.status_code}")
+        if not response.headers.get("Content-Type", "").startswith(_ADVERTISEMENT_TYPE):
+            raise ResolverError(f"Git HTTP: {base} is not a smart HTTP remote")
+        lines = [
+            line.decode("utf-8", "replace") for line in iter_pkt_lines(response.content) if line
+        ]
+        if lines and lines[0].startswith("# service="):
+            lines = lines[1:]
+        if not lines or lines[0] != "version 2":
+            raise ResolverError(f"Git HTTP: {base} does not support protocol v2")
+        capabilities = lines[1:]
+        if not any(cap == "ls-refs" or cap.startswith("ls-refs=") for cap in capabilities):
+            raise ResolverError(f"Git HTTP: {base} does not support ls-refs")
+        return capabilities
+
+    def list_refs(self, repo_url: str, prefix: str = _TAG_PREFIX) -> list[str]:
+        """List the refs of *repo_url* starting with *prefix*.
+
+        Parameters:
+            repo_url: ``http(s)://`` URL of the repository.
+            prefix: Ref prefix the server filters on.
+
+        Returns:
+            Full ref names, in the server's order.
+
+        Raises:
+            NetworkError: If the server cannot be reached or
+                times out.
+            ResolverError: If the repository is missing or
+                private, or the server does not speak protocol v2.
+            CircuitOpenError: If the breaker skips the host.
+        """
+        base = repo_url.rstrip("/")
+        capabilities = self._capabilities(base)
+        request = pkt_line(b"command=ls-refs\n")
+        if any(cap.startswith("agent=") for cap in capabilities):
+            request += pkt_line(f"agent=agronomist-{__version__}\n".encode())
+        for cap in capabilities:
+            if cap.startswith("object-format="):
+                request += pkt_line(f"{cap}\n".encode())
+        request += DELIM_PKT + pkt_line(f"ref-prefix {prefix}\n".encode()) + FLUSH_PKT
+        try:
+            response = self._session.post(
+                f"{base}/git-upload-pack",
+                data=request,
+                headers={
+                    "Content-Type": "application/x-git-upload-pack-request",
+                    "Accept": _RESULT_TYPE,
+                },
+                timeout=self.timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            raise NetworkError(f"Git HTTP: ls-refs on {base} failed: {exc}") from exc
+        except requests.RequestException as exc:
+            raise ResolverError(f"Git HTTP: ls-refs on {base} failed: {exc}") from exc
+        if response.status_code != 200:
+            raise ResolverError(f"Git HTTP: ls-refs on {base} answered {response.status_code}")
+        refs: list[str] = []
+        for line in iter_pkt_lines(response.content):
+            if line is None:
+                break
+            if line.startswith(b"ERR "):
+                raise ResolverError(f"Git HTTP: {base}: {line[4:].decode('utf-8', 'replace')}")
+            fields = line.decode("utf-8", "replace").split(" ")
+            if len(fields) >= 2 and fields[1].startswith(prefix):
+                refs.append(fields[1])
+        return refs
+
+    def latest_ref(self, repo_url: str) -> str | None:
+        """Return the latest version-sorted tag of *repo_url*.
+
+        Parameters:
+            repo_url: ``http(s)://`` URL of the repository.
+
+        Returns:
+            The tag ``git ls-remote --tags --sort=-v:refname``
+            would list first, without ``refs/tags/``, or None
+            when the repository has no tags.
+
+        Raises:
+            NetworkError: See :meth:`list_refs`.
+            ResolverError: See :meth:`list_refs`.
+        """
+        return latest_version_tag(self.list_refs(repo_url))
+
+    def list_tags(self, repo_url: str) -> list[str]:
+        """Return every tag of *repo_url*, latest first.
+
+        Parameters:
+            repo_url: ``http(s)://`` URL of the repository.
+
+        Returns:
+            Tag names without ``refs/tags/``, in the order
+            ``git ls-remote --tags --sort=-v:refname`` lists them.
+
+        Raises:
+            NetworkError: See :meth:`list_refs`.
+            ResolverError: See :meth:`list_refs`.
+        """
+        return version_sorted_tags(self.list_refs(repo_url))
@@ -0,0 +1,164 @@
+"""Columnar storage for large numbers of source references.
+
+A ``list[SourceRef]`` costs one object (and its attribute storage)
+per reference, plus one pointer per field. Organisation-wide scans
+produce millions of references that mostly repeat a few thousand
+distinct strings, so :class:`SourceTable` stores every distinct
+string once and keeps one compact integer column per field.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator
+
+from .models import SourceRef
+
+# Column value meaning "field is None". Lines and columns are
+# 1-based, and ``module`` indices start at 0, so 0 cannot be used
+# for the latter.
+_NO_MODULE = -1
+_NO_POSITION = 0
+
+
+class SourceTable:
+    """Array-backed, append-only collection of SourceRef rows.
+
+    Rows are stored as indices into a shared string table, one
+    ``array`` per field. Iterating or indexing the table yields
+    SourceRef objects built on demand, so it can be passed to
+    code written for ``list[SourceRef]``; only the rows in use
+    are ever materialized.
+    """
+
+    __slots__ = (
+        "_strings",
+        "_string_ids",
+        "_file",
+        "_raw",
+        "_repo",
+        "_repo_url",
+        "_repo_host",
+        "_ref",
+        "_module",
+        "_line",
+        "_column",
+        "_repo_key",
+    )
+
+    def __init__(self, refs: Iterable[SourceRef] = ()) -> None:
+        """Create a table, optionally filled from *refs*.
+
+        Parameters:
+            refs: SourceRef objects to append, in order.
+        """
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        self._file = array("I")
+        self._raw = array("I")
+        self._repo = array("I")
+        self._repo_url = array("I")
+        self._repo_host = array("I")
+        self._ref = array("I")
+        self._module = array("i")
+        self._line = array("I")
+        self._column = array("I")
+        self._repo_key = array("I")
+        self.extend(refs)
+
+    def _intern(self, value: str) -> int:
+        """Return the string-table index of *value*, adding it if new.
+
+        Parameters:
+            value: The string to store.
+
+        Returns:
+            Its index in the string table.
+        """
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def append(self, ref: SourceRef) -> None:
+        """Append one reference as a new row.
+
+        Parameters:
+            ref: The reference to store.
+        """
+        intern = self._intern
+        self._file.append(intern(ref.file_path))
+        self._raw.append(intern(ref.raw))
+        self._repo.append(intern(ref.repo))
+        self._repo_url.append(intern(ref.repo_url))
+        self._repo_host.append(intern(ref.repo_host))
+        self._ref.append(intern(ref.ref))
+        self._module.append(_NO_MODULE if ref.module is None else intern(ref.module))
+        self._line.append(ref.line or _NO_POSITION)
+        self._column.append(ref.column or _NO_POSITION)
+        self._repo_key.append(intern(ref.repo_key))
+
+    def extend(self, refs: Iterable[SourceRef]) -> None:
+        """Append every reference in *refs*, in order.
+
+        Parameters:
+            refs: The references to store.
+        """
+        for ref in refs:
+            self.append(ref)
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self._file)
+
+    def __getitem__(self, row: int) -> SourceRef:
+        """Return row *row* as a SourceRef.
+
+        Parameters:
+            row: Row number; negative values count from the end.
+
+        Returns:
+            A SourceRef built from the stored columns.
+
+        Raises:
+            IndexError: If *row* is out of range.
+        """
+        strings = self._strings
+        module = self._module[row]
+        line = self._line[row]
+        column = self._column[row]
+        return SourceRef(
+            file_path=strings[self._file[row]],
+            raw=strings[self._raw[row]],
+            repo=strings[self._repo[row]],
+            repo_url=strings[self._repo_url[row]],
+            repo_host=strings[self._repo_host[row]],
+            ref=strings[self._ref[row]],
+            module=None if module == _NO_MODULE else strings[module],
+            line=line or None,
+            column=column or None,
+            repo_key=strings[self._repo_key[row]],
+        )
+
+    def __iter__(self) -> Iterator[SourceRef]:
+        """Yield every row as a SourceRef, in insertion order."""
+        for row in range(len(self)):
+            yield self[row]
+
+    def first_by_repo(self) -> dict[str, SourceRef]:
+        """Return the first row of each distinct repository.
+
+        Reads only the ``repo_key`` column, so a SourceRef is
+        built for one row per repository rather than for every
+        row.
+
+        Returns:
+            A mapping of canonical repository key to its first
+            SourceRef, in order of first appearance.
+        """
+        first_rows: dict[int, int] = {}
+        for row, repo_id in enumerate(self._repo_key):
+            first_rows.setdefault(repo_id, row)
+        return {self._strings[repo_id]: self[row] for repo_id, row in first_rows.items()}
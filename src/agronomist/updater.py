@@ -72,6 +72,9 @@ def apply_updates(
                 content = handle.read()
         except OSError:
             continue
+        except UnicodeDecodeError:
+            logger.warning("Skipping %s: file is not valid UTF-8", file_path)
+            continue
 
         new_content = content
         for update in file_updates:
@@ -0,0 +1,385 @@
+"""File-system watching for ``agronomist watch``.
+
+Wraps the Linux inotify API (through :mod:`ctypes`, so no extra
+dependency is needed) to learn which files under the scan root
+were modified, created, deleted or moved, and keeps the scanned
+refs of every file in memory so that only those files are parsed
+again. Bursts of events, such as an editor saving several times
+in a row, are coalesced into one batch.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+from .exceptions import WatchError
+from .models import SourceRef
+
+logger = logging.getLogger(__name__)
+
+# inotify event bits, from <sys/inotify.h>.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+# Events that can change which sources a directory holds. Files
+# are reported once they are closed after writing rather than on
+# every IN_MODIFY, so a half-written file is not parsed.
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_EXCL_UNLINK
+)
+
+# ``struct inotify_event`` header: wd, mask, cookie, name length.
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class InotifyEvent(NamedTuple):
+    """One decoded ``struct inotify_event``.
+
+    Attributes:
+        wd: Watch descriptor the event belongs to.
+        mask: Event bits.
+        name: Entry name inside the watched directory, or an
+            empty string for events on the directory itself.
+    """
+
+    wd: int
+    mask: int
+    name: str
+
+
+def parse_events(data: bytes) -> list[InotifyEvent]:
+    """Decode a buffer returned by reading an inotify descriptor.
+
+    Parameters:
+        data: Raw bytes holding whole ``inotify_event`` records.
+
+    Returns:
+        The events, in order.
+    """
+    events: list[InotifyEvent] = []
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset : offset + length].rstrip(b"\0")
+        offset += length
+        events.append(InotifyEvent(wd, mask, os.fsdecode(name)))
+    return events
+
+
+class Inotify:
+    """Minimal inotify instance driven through libc.
+
+    Attributes:
+        fd: The non-blocking inotify file descriptor.
+    """
+
+    def __init__(self) -> None:
+        """Create an inotify instance.
+
+        Raises:
+            WatchError: If inotify is not available on this
+                platform or the instance cannot be created.
+        """
+        if not sys.platform.startswith("linux"):
+            raise WatchError("Watching files requires Linux inotify")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise WatchError(f"inotify_init1 failed: {os.strerror(code)}")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """Watch a directory.
+
+        Parameters:
+            path: Directory to watch.
+            mask: Event bits to report.
+
+        Returns:
+            The watch descriptor (the same one when *path* is
+            already watched).
+
+        Raises:
+            OSError: If the watch cannot be added, e.g. because
+                *path* vanished or the watch limit was reached.
+        """
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return int(wd)
+
+    def remove_watch(self, wd: int) -> None:
+        """Stop watching a descriptor; errors are ignored.
+
+        Parameters:
+            wd: Watch descriptor returned by :meth:`add_watch`.
+        """
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float | None) -> list[InotifyEvent]:
+        """Wait for and return the pending events.
+
+        Parameters:
+            timeout: Seconds to wait for the first event; None
+                waits forever.
+
+        Returns:
+            The events read, or an empty list on timeout.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            return parse_events(os.read(self.fd, _READ_SIZE))
+        except BlockingIOError:
+            return []
+
+    def close(self) -> None:
+        """Close the descriptor, dropping every watch."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class TreeWatcher:
+    """Recursive inotify watch over a scan root.
+
+    Every directory below the root is watched, except those whose
+    base name is in *prune_names*; directories created later are
+    added as their events arrive.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        prune_names: frozenset[str] = frozenset(),
+        inotify: Inotify | None = None,
+    ) -> None:
+        """Start watching *root*.
+
+        Parameters:
+            root: The scan root directory.
+            prune_names: Directory base names not to watch.
+            inotify: Instance to use; a new one by default.
+
+        Raises:
+            WatchError: If inotify is unavailable or *root*
+                cannot be watched.
+        """
+        self.root = root
+        self.prune_names = prune_names
+        self._inotify = inotify or Inotify()
+        self._dirs: dict[int, str] = {}
+        try:
+            self._inotify.add_watch(root)
+        except OSError as exc:
+            self._inotify.close()
+            raise WatchError(f"Cannot watch {root}: {exc.strerror}") from exc
+        self._watch_tree(os.curdir)
+
+    def _watch_tree(self, rel_dir: str) -> None:
+        """Watch *rel_dir* and every directory below it.
+
+        Parameters:
+            rel_dir: Directory relative to the root.
+        """
+        top = os.path.join(self.root, rel_dir)
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [name for name in dirnames if name not in self.prune_names]
+            rel_path = os.path.normpath(os.path.relpath(dirpath, self.root))
+            try:
+                wd = self._inotify.add_watch(dirpath)
+            except OSError as exc:
+                if exc.errno == errno.ENOSPC:
+                    logger.warning(
+                        "inotify watch limit reached; changes below %s are not seen.", rel_path
+                    )
+                dirnames[:] = []
+                continue
+            self._dirs[wd] = rel_path
+
+    def _forget_tree(self, rel_dir: str) -> None:
+        """Drop the watches of *rel_dir* and its subdirectories.
+
+        Parameters:
+            rel_dir: Directory relative to the root.
+        """
+        prefix = rel_dir + os.sep
+        for wd, path in list(self._dirs.items()):
+            if path == rel_dir or path.startswith(prefix):
+                self._inotify.remove_watch(wd)
+                del self._dirs[wd]
+
+    def wait(self, debounce: float, timeout: float | None = None) -> set[str] | None:
+        """Block until files change and return what changed.
+
+        After the first event, events keep being collected until
+        none arrives for *debounce* seconds, so a burst of saves
+        becomes one batch.
+
+        Parameters:
+            debounce: Quiet period, in seconds, that ends a batch.
+            timeout: Seconds to wait for the first event; None
+                waits forever.
+
+        Returns:
+            Paths relative to the root that were modified,
+            created, deleted or moved (files or whole
+            directories), an empty set on timeout, or None when
+            the kernel queue overflowed and everything must be
+            rescanned.
+        """
+        events = self._inotify.read_events(timeout)
+        if not events:
+            return set()
+        while True:
+            more = self._inotify.read_events(debounce)
+            if not more:
+                break
+            events.extend(more)
+
+        changed: set[str] = set()
+        overflowed = False
+        for event in events:
+            if event.mask & IN_Q_OVERFLOW:
+                overflowed = True
+                continue
+            parent = self._dirs.get(event.wd)
+            if parent is None:
+                continue
+            if event.mask & IN_IGNORED:
+                del self._dirs[event.wd]
+                continue
+            if not event.name:
+                continue
+            rel_path = os.path.normpath(os.path.join(parent, event.name))
+            if event.mask & IN_ISDIR:
+                if event.name in self.prune_names:
+                    continue
+                if event.mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(rel_path)
+                elif event.mask & IN_MOVED_FROM:
+                    self._forget_tree(rel_path)
+            changed.add(rel_path)
+
+        if overflowed:
+            logger.warning("inotify queue overflowed; rescanning %s.", self.root)
+            self._watch_tree(os.curdir)
+            return None
+        return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+        self._inotify.close()
+        self._dirs.clear()
+
+
+def expand_changed(root: str, changed: Iterable[str], prune_names: frozenset[str]) -> list[str]:
+    """List the files to re-parse for a batch of changes.
+
+    Parameters:
+        root: The scan root directory.
+        changed: Changed paths relative to *root*.
+        prune_names: Directory base names not to descend into.
+
+    Returns:
+        Every existing file among *changed*, plus the files below
+        changed directories, relative to *root*.
+    """
+    files: list[str] = []
+    for rel_path in sorted(changed):
+        full_path = os.path.join(root, rel_path)
+        if os.path.isdir(full_path):
+            for dirpath, dirnames, filenames in os.walk(full_path):
+                dirnames[:] = sorted(name for name in dirnames if name not in prune_names)
+                rel_dir = os.path.relpath(dirpath, root)
+                files.extend(os.path.join(rel_dir, name) for name in sorted(filenames))
+        elif os.path.isfile(full_path):
+            files.append(rel_path)
+    return files
+
+
+class WatchState:
+    """The refs of every scanned file, kept between rescans."""
+
+    def __init__(self, refs: Iterable[SourceRef] = ()) -> None:
+        """Create the state from an initial scan.
+
+        Parameters:
+            refs: Refs of a full scan.
+        """
+        self._by_file: dict[str, list[SourceRef]] = {}
+        self.add(refs)
+
+    def add(self, refs: Iterable[SourceRef]) -> None:
+        """Record freshly scanned refs.
+
+        Parameters:
+            refs: Refs to attribute to their ``file_path``.
+        """
+        for ref in refs:
+            self._by_file.setdefault(ref.file_path, []).append(ref)
+
+    def discard(self, changed: Iterable[str]) -> int:
+        """Forget the refs of changed files and directories.
+
+        Parameters:
+            changed: Paths relative to the root; a directory
+                drops every file below it.
+
+        Returns:
+            The number of files forgotten.
+        """
+        paths = set(changed)
+        prefixes = tuple(path + os.sep for path in paths)
+        stale = [
+            file_path
+            for file_path in self._by_file
+            if file_path in paths or file_path.startswith(prefixes)
+        ]
+        for file_path in stale:
+            del self._by_file[file_path]
+        return len(stale)
+
+    def __iter__(self) -> Iterator[SourceRef]:
+        """Yield every ref, grouped by file in path order."""
+        for file_path in sorted(self._by_file):
+            yield from self._by_file[file_path]
+
+    def __len__(self) -> int:
+        """Return the number of refs held."""
+        return sum(len(refs) for refs in self._by_file.values())
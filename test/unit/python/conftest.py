@@ -1,5 +1,7 @@
 """Pytest configuration and shared fixtures."""
 
+import shutil
+import subprocess
 import tempfile
 from pathlib import Path
 
@@ -13,6 +15,42 @@ def temp_dir():
         yield tmp_dir
 
 
+@pytest.fixture
+def make_git_repo(temp_dir):
+    """Return a factory that commits files into a new Git repository.
+
+    The factory takes a ``{relative path: content}`` mapping and
+    returns the repository path. Tests using it are skipped when
+    ``git`` is not installed.
+    """
+    if shutil.which("git") is None:
+        pytest.skip("git is not installed")
+
+    def _make(files: dict[str, str], name: str = "repo") -> Path:
+        repo = Path(temp_dir) / name
+        repo.mkdir()
+        for rel_path, content in files.items():
+            path = repo / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+        def git(*args: str) -> None:
+            subprocess.run(
+                ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                cwd=repo,
+                check=True,
+                capture_output=True,
+            )
+
+        git("init", "-q")
+        git("add", "-A")
+        git("commit", "-q", "-m", "initial")
+        git("tag", "v1")
+        return repo
+
+    return _make
+
+
 @pytest.fixture
 def sample_config():
     """Sample configuration for testing."""
@@ -0,0 +1,86 @@
+"""Tests for archive module."""
+
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from agronomist.archive import is_archive, iter_archive_members
+from agronomist.exceptions import ScanError
+
+
+def _write_tar(path: str, members: dict[str, bytes], mode: str = "w:gz") -> None:
+    """Write *members* to a tar archive, adding a directory entry."""
+    with tarfile.open(path, mode) as archive:
+        directory = tarfile.TarInfo("./live")
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+        link = tarfile.TarInfo("./live/link.tf")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "main.tf"
+        archive.addfile(link)
+
+
+class TestIsArchive:
+    """Test archive detection."""
+
+    def test_is_archive_by_suffix(self, temp_dir):
+        """Test that existing files with archive suffixes are detected."""
+        for name in ("a.tar", "b.TAR.GZ", "c.tgz", "d.zip", "e.txt"):
+            with open(os.path.join(temp_dir, name), "wb"):
+                pass
+        assert is_archive(os.path.join(temp_dir, "a.tar"))
+        assert is_archive(os.path.join(temp_dir, "b.TAR.GZ"))
+        assert is_archive(os.path.join(temp_dir, "c.tgz"))
+        assert is_archive(os.path.join(temp_dir, "d.zip"))
+        assert not is_archive(os.path.join(temp_dir, "e.txt"))
+        assert not is_archive(os.path.join(temp_dir, "missing.zip"))
+
+    def test_directory_is_not_archive(self, temp_dir):
+        """Test that a directory named like an archive is walked."""
+        os.mkdir(os.path.join(temp_dir, "bundle.tar"))
+        assert not is_archive(os.path.join(temp_dir, "bundle.tar"))
+
+
+class TestIterArchiveMembers:
+    """Test reading selected archive members."""
+
+    def test_tar_yields_wanted_regular_files(self, temp_dir):
+        """Test that only wanted regular files are returned."""
+        path = os.path.join(temp_dir, "bundle.tar.gz")
+        _write_tar(path, {"./live/main.tf": b"a", "./live/README.md": b"b"})
+        seen = []
+
+        def wanted(name):
+            seen.append(name)
+            return name.endswith(".tf")
+
+        assert list(iter_archive_members(path, wanted)) == [("./live/main.tf", b"a")]
+        assert seen == ["./live/main.tf", "./live/README.md"]
+
+    def test_zip_yields_wanted_regular_files(self, temp_dir):
+        """Test that zip directories are skipped."""
+        path = os.path.join(temp_dir, "bundle.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("live/", b"")
+            archive.writestr("live/main.tf", b"a")
+            archive.writestr("live/notes.txt", b"b")
+
+        result = list(iter_archive_members(path, lambda name: name != "live/notes.txt"))
+
+        assert result == [("live/main.tf", b"a")]
+
+    def test_corrupt_archive_raises_scan_error(self, temp_dir):
+        """Test that unreadable archives raise ScanError."""
+        for name in ("bad.tar.gz", "bad.zip"):
+            path = os.path.join(temp_dir, name)
+            with open(path, "wb") as handle:
+                handle.write(b"not an archive")
+            with pytest.raises(ScanError, match="Cannot read archive"):
+                list(iter_archive_members(path, lambda name: True))
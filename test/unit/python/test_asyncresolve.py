@@ -0,0 +1,92 @@
+"""Tests for the asyncio resolution engine."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from agronomist.asyncresolve import resolve_repos
+from agronomist.exceptions import ResolverError
+from agronomist.models import SourceRef
+
+
+def _source(repo: str, host: str = "example.com") -> SourceRef:
+    return SourceRef(
+        file_path="main.tf",
+        raw=f"git::https://{host}/{repo}?ref=v1",
+        repo=repo,
+        repo_url=f"https://{host}/{repo}",
+        repo_host=host,
+        ref="v1",
+    )
+
+
+class _Tracker:
+    """Fake resolver recording how many lookups overlap."""
+
+    def __init__(self) -> None:
+        self.active: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self.total = 0
+        self.peak_total = 0
+
+    async def __call__(self, source: SourceRef) -> str:
+        host = source.repo_host
+        self.active[host] = self.active.get(host, 0) + 1
+        self.total += 1
+        self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        self.peak_total = max(self.peak_total, self.total)
+        await asyncio.sleep(0.01)
+        self.active[host] -= 1
+        self.total -= 1
+        return f"{source.repo}@v2"
+
+
+class TestResolveRepos:
+    def test_resolves_every_repository(self):
+        sources = {f"org/r{i}": _source(f"org/r{i}") for i in range(20)}
+
+        refs = resolve_repos(sources, _Tracker())
+
+        assert refs == {repo: f"{repo}@v2" for repo in sources}
+
+    def test_limits_lookups_per_host_and_in_total(self):
+        sources = {f"a/r{i}": _source(f"a/r{i}", "a.example") for i in range(30)}
+        sources.update({f"b/r{i}": _source(f"b/r{i}", "b.example") for i in range(30)})
+        tracker = _Tracker()
+
+        resolve_repos(sources, tracker, max_in_flight=12, host_concurrency=8)
+
+        assert tracker.peak == {"a.example": 8, "b.example": 8}
+        assert tracker.peak_total == 12
+
+    def test_runs_many_lookups_concurrently(self):
+        sources = {f"org/r{i}": _source(f"org/r{i}") for i in range(200)}
+        tracker = _Tracker()
+
+        resolve_repos(sources, tracker, max_in_flight=200, host_concurrency=200)
+
+        assert tracker.peak_total == 200
+
+    def test_failures_resolve_to_none(self, caplog):
+        async def flaky(source: SourceRef) -> str | None:
+            if source.repo == "org/bad":
+                raise ResolverError("unreachable")
+            return await asyncio.to_thread(lambda: "v3")
+
+        with caplog.at_level(logging.WARNING):
+            refs = resolve_repos(
+                {"org/ok": _source("org/ok"), "org/bad": _source("org/bad")}, flaky
+            )
+
+        assert refs == {"org/ok": "v3", "org/bad": None}
+        assert "Failed to resolve latest ref for org/bad: unreachable" in caplog.text
+
+    def test_configured_hosts_override_the_default_limit(self):
+        sources = {f"a/r{i}": _source(f"a/r{i}", "a.example") for i in range(20)}
+        sources.update({f"b/r{i}": _source(f"b/r{i}", "B.example") for i in range(20)})
+        tracker = _Tracker()
+
+        resolve_repos(sources, tracker, host_concurrency=8, host_limits={"b.example": 2})
+
+        assert tracker.peak == {"a.example": 8, "B.example": 2}
@@ -1,29 +1,132 @@
 """Performance benchmarks for Agronomist modules."""
 
+import fnmatch
+import re
 import tempfile
 from pathlib import Path
+from urllib.parse import urlparse
 
+from agronomist.lexer import iter_source_tokens
 from agronomist.markdown import generate_markdown, write_markdown
-from agronomist.models import Replacement, UpdateEntry
+from agronomist.models import Replacement, SourceRef, UpdateEntry
+from agronomist.patterns import PatternSet, compile_patterns
 from agronomist.report import build_report, write_report
-from agronomist.scanner import _match_any, _parse_git_source, scan_sources
+from agronomist.scanner import (
+    _parse_git_source,
+    _parse_source_value,
+    _tokens_to_refs,
+    scan_sources,
+)
 from agronomist.updater import apply_updates
 
 
+# The per-pattern fnmatch loop the scanner used before PatternSet,
+# kept as a baseline for the pattern benchmarks.
+def _legacy_match_any(path: str, patterns: list[str]) -> bool:
+    """Return True if *path* matches any of *patterns*."""
+    return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+
+
+# The single regex the scanner used before the lexer, kept as a
+# baseline for the extraction benchmarks.
+_LEGACY_SOURCE_RE = re.compile(rb"source\s*=\s*(['\"])(?P<source>[^'\"]+)\1")
+
+# The same regex over decoded text plus the parsing regexes, as the
+# scanner applied them.
+_LEGACY_SOURCE_TEXT_RE = re.compile(_LEGACY_SOURCE_RE.pattern.decode())
+_LEGACY_GIT_SOURCE_RE = re.compile(
+    r"(?:git::)?(?P<url>(?:https?|ssh)://[^?]+?)(?:\.git)?(?P<module>//[^?]+)?\?ref=(?P<ref>[^&]+)"
+)
+_LEGACY_SSH_SCP_RE = re.compile(
+    r"(?:git::)?git@(?P<host>[^:]+):(?P<path>[^?]+?)(?:\.git)?(?P<module>//[^?]+)?\?ref=(?P<ref>[^&]+)"
+)
+
+
+def _legacy_parse(source):
+    """Parse *source* the way the scanner did before the lexer."""
+    match = _LEGACY_GIT_SOURCE_RE.search(source)
+    if match:
+        url, module, ref = match.group("url", "module", "ref")
+        parsed = urlparse(url)
+        if not parsed.netloc or not parsed.path:
+            return None
+        repo_host = parsed.hostname or parsed.netloc
+        repo_path = parsed.path.lstrip("/")
+        if repo_path.endswith(".git"):
+            repo_path = repo_path[:-4]
+        repo_url = f"https://{repo_host}/{repo_path}" if parsed.scheme == "ssh" else url
+        return SourceRef(
+            file_path="",
+            raw=source,
+            repo=repo_path,
+            repo_url=repo_url,
+            repo_host=repo_host,
+            ref=ref,
+            module=module[2:] if module else None,
+        )
+    match = _LEGACY_SSH_SCP_RE.search(source)
+    if match:
+        host, path, module, ref = match.group("host", "path", "module", "ref")
+        if path.endswith(".git"):
+            path = path[:-4]
+        return SourceRef(
+            file_path="",
+            raw=source,
+            repo=path,
+            repo_url=f"https://{host}/{path}",
+            repo_host=host,
+            ref=ref,
+            module=module[2:] if module else None,
+        )
+    return None
+
+
+def _legacy_scan(rel_path, data):
+    """Extract SourceRef objects from *data* the way the scanner did."""
+    refs = []
+    for match in _LEGACY_SOURCE_TEXT_RE.finditer(data.decode("utf-8")):
+        parsed = _legacy_parse(match.group("source"))
+        if parsed:
+            refs.append(
+                SourceRef(
+                    file_path=rel_path,
+                    raw=parsed.raw,
+                    repo=parsed.repo,
+                    repo_url=parsed.repo_url,
+                    repo_host=parsed.repo_host,
+                    ref=parsed.ref,
+                    module=parsed.module,
+                )
+            )
+    return refs
+
+
+_HCL_BLOCK = b"""
+# Network module for the shared VPC
+module "vpc_%d" {
+  source = "git::https://github.com/terraform-aws-modules/terraform-aws-vpc.git//modules/vpc?ref=v5.%d.0"
+
+  name = "main-${var.environment}"
+  cidr = "10.0.0.0/16"
+  tags = {
+    Environment = var.environment // inline comment
+  }
+}
+"""
+_HCL_CORPUS = b"".join(_HCL_BLOCK % (i, i) for i in range(200))
+
+
 class TestScannerBenchmarks:
     """Benchmarks for scanner module."""
 
-    def test_benchmark_match_any_single_pattern(self, benchmark):
-        """Benchmark _match_any with single pattern."""
-        result = benchmark(
-            _match_any,
-            "terraform/aws/ec2/main.tf",
-            ["**/*.tf"],
-        )
+    def test_benchmark_pattern_set_single_pattern(self, benchmark):
+        """Benchmark a pre-compiled PatternSet with a single pattern."""
+        patterns = compile_patterns(("**/*.tf",))
+        result = benchmark(patterns.matches, "terraform/aws/ec2/main.tf")
         assert result is True
 
-    def test_benchmark_match_any_multiple_patterns(self, benchmark):
-        """Benchmark _match_any with multiple patterns."""
+    def test_benchmark_legacy_match_any_multiple_patterns(self, benchmark):
+        """Benchmark per-pattern fnmatch calls as a baseline."""
         patterns = [
             "**/*.tf",
             "**/*.hcl",
@@ -32,12 +135,29 @@ class TestScannerBenchmarks:
             "**/examples/**",
         ]
         result = benchmark(
-            _match_any,
+            _legacy_match_any,
             "terraform/aws/vpc/outputs.tf",
             patterns,
         )
         assert result is True
 
+    def test_benchmark_pattern_set_multiple_patterns(self, benchmark):
+        """Benchmark a pre-compiled PatternSet with multiple patterns."""
+        patterns = PatternSet(
+            [
+                "**/test/**",
+                "**/fixtures/**",
+                "**/examples/**",
+                "**/*.hcl",
+                "**/*.tf",
+            ]
+        )
+        result = benchmark(
+            patterns.first_match,
+            "terraform/aws/vpc/outputs.tf",
+        )
+        assert result == 4
+
     def test_benchmark_parse_git_source_https(self, benchmark):
         """Benchmark _parse_git_source with HTTPS URL."""
         source = "git::https://github.com/terraform-aws-modules/terraform-aws-vpc.git//modules/vpc?ref=v5.0.0"
@@ -52,6 +172,54 @@ class TestScannerBenchmarks:
         assert result.repo == ("terraform-aws-modules/terraform-aws-vpc")
         assert result.repo_host == "github.com"
 
+    def test_benchmark_lexer_source_tokens(self, benchmark):
+        """Benchmark iter_source_tokens over a 200-module file."""
+        result = benchmark(lambda: list(iter_source_tokens(_HCL_CORPUS)))
+        assert len(result) == 200
+
+    def test_benchmark_legacy_source_regex(self, benchmark):
+        """Benchmark the former single-regex extraction as a baseline."""
+        result = benchmark(lambda: list(_LEGACY_SOURCE_RE.finditer(_HCL_CORPUS)))
+        assert len(result) == 200
+
+    def test_benchmark_lexer_long_line(self, benchmark):
+        """Benchmark iter_source_tokens with every source on one line."""
+        data = (
+            _HCL_CORPUS.replace(b"# Network", b"/* Network")
+            .replace(b"shared VPC", b"shared VPC */")
+            .replace(b"// inline comment", b"/* inline comment */")
+            .replace(b"\n", b" ")
+        )
+        result = benchmark(lambda: list(iter_source_tokens(data)))
+        assert len(result) == 200
+
+    def test_benchmark_lexer_to_source_refs(self, benchmark):
+        """Benchmark lexing plus parsing into SourceRef objects."""
+
+        def extract():
+            return [_parse_git_source(t.value.decode()) for t in iter_source_tokens(_HCL_CORPUS)]
+
+        result = benchmark(extract)
+        assert all(ref is not None for ref in result)
+
+    def test_benchmark_legacy_scan_and_parse(self, benchmark):
+        """Benchmark the former extract-and-parse path end to end."""
+        result = benchmark(lambda: _legacy_scan("main.tf", _HCL_CORPUS))
+        assert len(result) == 200
+
+    def test_benchmark_lexer_scan_and_parse(self, benchmark):
+        """Benchmark lexing and parsing end to end with a cold memo."""
+
+        def extract():
+            _parse_source_value.cache_clear()
+            return _tokens_to_refs("main.tf", iter_source_tokens(_HCL_CORPUS))
+
+        result = benchmark(extract)
+        assert len(result) == 200
+        assert [ref.raw for ref in result] == [
+            ref.raw for ref in _legacy_scan("main.tf", _HCL_CORPUS)
+        ]
+
     def test_benchmark_scan_sources_small_repo(self, benchmark):
         """Benchmark scan_sources with small repository."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -70,6 +238,44 @@ class TestScannerBenchmarks:
             )
             assert isinstance(result, list)
 
+    @staticmethod
+    def _duplicated_sources_tree(tmpdir):
+        """Write 500 distinct files repeating the same 100 sources."""
+        modules = "".join(
+            f'module "m{j}" {{\n'
+            f'  source = "git::https://github.com/org/mod{j % 20}.git//modules/x?ref=v1.{j % 5}.0"\n'
+            "}\n"
+            for j in range(100)
+        )
+        for i in range(500):
+            service_dir = Path(tmpdir, "live", f"env{i % 10}", f"svc{i}")
+            service_dir.mkdir(parents=True)
+            # A per-file header keeps every blob distinct, so only the
+            # source-string memo can share work between files.
+            (service_dir / "main.tf").write_text(f"# svc{i}\n{modules}")
+
+    def test_benchmark_scan_sources_duplicated_sources(self, benchmark):
+        """Benchmark scan_sources over 50k sources drawn from 20 repos."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._duplicated_sources_tree(tmpdir)
+
+            result = benchmark.pedantic(
+                scan_sources, args=(tmpdir,), setup=_parse_source_value.cache_clear, rounds=3
+            )
+            assert len(result) == 50_000
+            assert len({id(ref.repo) for ref in result}) == 20
+
+    def test_benchmark_scan_sources_duplicated_sources_unmemoized(self, benchmark, monkeypatch):
+        """Benchmark the same scan with the source-string memo bypassed."""
+        monkeypatch.setattr(
+            "agronomist.scanner._parse_source_value", _parse_source_value.__wrapped__
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._duplicated_sources_tree(tmpdir)
+
+            result = benchmark.pedantic(scan_sources, args=(tmpdir,), rounds=3)
+            assert len(result) == 50_000
+
 
 class TestReportBenchmarks:
     """Benchmarks for report module."""
@@ -0,0 +1,158 @@
+"""Tests for the per-host circuit breaker."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import subprocess
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import requests
+
+from agronomist.circuit import CircuitBreaker
+from agronomist.exceptions import CircuitOpenError, ResolverError
+from agronomist.git import GitClient
+from agronomist.http import build_session
+
+REFUSED = (
+    "fatal: unable to access 'https://gitlab.internal/acme/vpc.git/': "
+    "Failed to connect to gitlab.internal port 443: Connection refused\n"
+)
+
+
+def _response(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = b""
+    response.raw = io.BytesIO()
+    return response
+
+
+def _trip(breaker: CircuitBreaker, host: str) -> None:
+    for _ in range(breaker.threshold):
+        breaker.before_call(host)
+        breaker.record_failure(host, "Connection refused")
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(threshold=3)
+        breaker.record_failure("gitlab.internal", "timeout")
+        breaker.record_failure("gitlab.internal", "timeout")
+        breaker.record_success("gitlab.internal")
+        breaker.record_failure("gitlab.internal", "timeout")
+        breaker.record_failure("gitlab.internal", "timeout")
+        breaker.before_call("gitlab.internal")
+
+        breaker.record_failure("GitLab.internal", "Connection refused")
+
+        with pytest.raises(CircuitOpenError, match="Connection refused"):
+            breaker.before_call("gitlab.internal")
+        breaker.before_call("github.com")
+        assert [h.host for h in breaker.tripped()] == ["gitlab.internal"]
+
+    def test_half_open_trial_closes_or_reopens(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+        _trip(breaker, "h")
+        time.sleep(0.06)
+
+        breaker.before_call("h")
+        with pytest.raises(CircuitOpenError, match="trial"):
+            breaker.before_call("h")
+        breaker.record_failure("h", "timeout")
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("h")
+
+        time.sleep(0.06)
+        breaker.before_call("h")
+        breaker.record_success("h")
+        breaker.before_call("h")
+        assert breaker.tripped()[0].trips == 2
+        assert not breaker.tripped()[0].open
+
+    def test_zero_threshold_disables_the_breaker(self):
+        breaker = CircuitBreaker(threshold=0)
+        for _ in range(10):
+            breaker.record_failure("h", "timeout")
+        breaker.before_call("h")
+        assert breaker.tripped() == []
+
+
+class TestAdapterBreaker:
+    def test_connection_errors_short_circuit_the_host(self):
+        breaker = CircuitBreaker(threshold=2)
+        session = build_session(retries=0, breaker=breaker)
+        refused = requests.ConnectionError("Connection refused")
+
+        with patch("requests.adapters.HTTPAdapter.send", side_effect=refused) as send:
+            for _ in range(2):
+                with pytest.raises(requests.ConnectionError):
+                    session.get("https://gitlab.internal/api/v4/projects/1")
+            with pytest.raises(CircuitOpenError):
+                session.get("https://gitlab.internal/api/v4/projects/2")
+
+        assert send.call_count == 2
+
+    def test_gateway_errors_count_and_other_answers_reset(self):
+        breaker = CircuitBreaker(threshold=2)
+        session = build_session(retries=0, breaker=breaker)
+        replies = [_response(503), _response(404), _response(502), _response(504)]
+
+        with patch("requests.adapters.HTTPAdapter.send", side_effect=replies):
+            for _ in range(4):
+                session.get("https://gitlab.internal/api/v4/projects/1")
+
+        assert breaker.is_open("gitlab.internal")
+
+
+class TestGitClientBreaker:
+    def test_unreachable_remote_is_skipped(self):
+        breaker = CircuitBreaker(threshold=2)
+        client = GitClient(timeout=5, breaker=breaker)
+        error = subprocess.CalledProcessError(128, "git", stderr=REFUSED)
+
+        with patch("agronomist.git.subprocess.run", side_effect=error) as run:
+            for i in range(2):
+                with pytest.raises(ResolverError):
+                    client.latest_ref(f"https://gitlab.internal/acme/r{i}.git")
+            with pytest.raises(CircuitOpenError):
+                client.latest_ref("https://gitlab.internal/acme/r2.git")
+            with pytest.raises(ResolverError):
+                client.latest_ref("https://github.com/acme/r3.git")
+
+        assert run.call_count == 3
+
+    def test_missing_repository_keeps_the_circuit_closed(self):
+        breaker = CircuitBreaker(threshold=1)
+        client = GitClient(timeout=5, breaker=breaker)
+        error = subprocess.CalledProcessError(
+            128, "git", stderr="fatal: repository 'https://h/x.git/' not found\n"
+        )
+
+        with patch("agronomist.git.subprocess.run", side_effect=error):
+            for _ in range(3):
+                with pytest.raises(ResolverError, match="not found"):
+                    client.latest_ref("https://h/x.git")
+
+        assert breaker.tripped() == []
+
+    def test_async_timeouts_open_the_circuit(self):
+        breaker = CircuitBreaker(threshold=1)
+        client = GitClient(timeout=5, breaker=breaker)
+        process = MagicMock(returncode=None)
+        process.communicate = AsyncMock(side_effect=asyncio.TimeoutError)
+        process.wait = AsyncMock()
+
+        async def run() -> None:
+            with pytest.raises(ResolverError, match="timed out"):
+                await client.latest_ref_async("https://gitlab.internal/acme/vpc.git")
+            with pytest.raises(CircuitOpenError):
+                await client.latest_ref_async("https://gitlab.internal/acme/eks.git")
+
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)) as spawn:
+            asyncio.run(run())
+
+        assert spawn.await_count == 1
+        assert breaker.tripped()[0].last_error == "git ls-remote timed out"
@@ -2,12 +2,33 @@
 
 from __future__ import annotations
 
-from unittest.mock import MagicMock, patch
-
-from agronomist.cli import _categorize, _collect_updates, _print_category_summary, main
+import asyncio
+import concurrent.futures
+import json
+import os
+import subprocess
+import tarfile
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import requests
+
+from agronomist import models
+from agronomist.cli import (
+    _api_host_limits,
+    _categorize,
+    _collect_updates,
+    _print_category_summary,
+    main,
+)
 from agronomist.config import Blacklist, CategoryRule, Config
-from agronomist.exceptions import AuthenticationError
+from agronomist.exceptions import AuthenticationError, ScanError
+from agronomist.github import GitHubClient
 from agronomist.models import SourceRef, UpdateEntry
+from agronomist.ratelimit import RateLimitScheduler
+from agronomist.sourcetable import SourceTable
 
 
 def _mk_source(
@@ -59,6 +80,14 @@ class TestCliHelpers:
         result = _categorize(rules, "org/repo", "module")
         assert result == "uncategorized"
 
+    def test_categorize_earliest_rule_wins_across_repo_and_module(self):
+        rules = [
+            CategoryRule(name="first", repo_patterns=[], module_patterns=["modules/*"]),
+            CategoryRule(name="second", repo_patterns=["org/*"], module_patterns=[]),
+        ]
+        assert _categorize(rules, "org/repo", "modules/vpc") == "first"
+        assert _categorize(rules, "org/repo", None) == "second"
+
     def test_collect_updates_skips_when_latest_equal(self):
         source = _mk_source(
             repo="org/repo",
@@ -98,6 +127,261 @@ class TestCliHelpers:
         assert updates[0].module == "root@a.tf"
         assert updates[1].module == "root@b.tf"
 
+    def test_collect_updates_resolves_same_path_on_each_host(self):
+        github = _mk_source(
+            repo="acme/vpc",
+            repo_url="https://github.com/acme/vpc.git",
+            repo_host="github.com",
+            ref="v1.0.0",
+            file_path="a.tf",
+        )
+        internal = _mk_source(
+            repo="acme/vpc",
+            repo_url="https://gitlab.internal/acme/vpc.git",
+            repo_host="gitlab.internal",
+            ref="v1.0.0",
+            file_path="b.tf",
+        )
+        latest = {"github.com": "v2.0.0", "gitlab.internal": "v7.0.0"}
+
+        updates = _collect_updates(lambda s: latest[s.repo_host], [github, internal], [])
+
+        assert [(u.file, u.latest_ref) for u in updates] == [("a.tf", "v2.0.0"), ("b.tf", "v7.0.0")]
+
+    def test_collect_updates_resolves_spellings_of_one_remote_once(self):
+        sources = [
+            _mk_source(
+                repo=repo,
+                repo_url=f"https://github.com/{repo}",
+                repo_host="github.com",
+                ref="v1.0.0",
+                file_path=f"{i}.tf",
+            )
+            for i, repo in enumerate(["Acme/VPC", "acme/vpc", "acme/vpc.git"])
+        ]
+        latest_ref_fn = MagicMock(return_value="v2.0.0")
+
+        updates = _collect_updates(latest_ref_fn, sources, [])
+
+        latest_ref_fn.assert_called_once_with(sources[0])
+        assert len(updates) == 3
+
+    def test_collect_updates_accepts_source_table(self):
+        sources = [
+            _mk_source(
+                repo="org/repo",
+                repo_url="https://github.com/org/repo.git",
+                repo_host="github.com",
+                ref=ref,
+                file_path=file_path,
+            )
+            for ref, file_path in (("v1.0.0", "a.tf"), ("v2.0.0", "b.tf"), ("v1.1.0", "c.tf"))
+        ]
+        calls: list[str] = []
+
+        def latest_ref_fn(source: SourceRef) -> str | None:
+            calls.append(source.file_path)
+            return "v2.0.0"
+
+        updates = _collect_updates(latest_ref_fn, SourceTable(sources), [])
+
+        assert calls == ["a.tf"]
+        assert [u.file for u in updates] == ["a.tf", "c.tf"]
+        assert updates == _collect_updates(latest_ref_fn, sources, [])
+
+    def test_collect_updates_asyncio_engine_matches_threads(self):
+        sources = [
+            _mk_source(
+                repo=f"org/r{i % 7}",
+                repo_url=f"https://host{i % 3}.example/org/r{i % 7}.git",
+                repo_host=f"host{i % 3}.example",
+                ref=f"v1.{i % 4}.0",
+                file_path=f"m{i}.tf",
+            )
+            for i in range(40)
+        ]
+        latest = {"org/r0": "v1.3.0", "org/r1": None, "org/r4": "v9.0.0"}
+
+        def latest_ref_fn(source: SourceRef) -> str | None:
+            if source.repo == "org/r5":
+                raise RuntimeError("unreachable")
+            return latest.get(source.repo, "v2.0.0")
+
+        async def latest_ref_async(source: SourceRef) -> str | None:
+            await asyncio.sleep(0)
+            return latest_ref_fn(source)
+
+        threaded = _collect_updates(latest_ref_fn, sources, [])
+        with_asyncio = _collect_updates(
+            latest_ref_fn, SourceTable(sources), [], latest_ref_async=latest_ref_async
+        )
+
+        assert with_asyncio == threaded
+        assert {u.repo for u in threaded} == {"org/r0", "org/r2", "org/r3", "org/r4", "org/r6"}
+
+    def test_collect_updates_asyncio_api_calls_not_capped_by_workers(self):
+        sources = [
+            _mk_source(
+                repo=f"org/r{i}",
+                repo_url=f"https://github.com/org/r{i}.git",
+                repo_host="github.com",
+                ref="v1.0.0",
+                file_path=f"m{i}.tf",
+            )
+            for i in range(40)
+        ]
+        lock = threading.Lock()
+        active = peak = 0
+
+        def api_lookup() -> str:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return "v2.0.0"
+
+        async def latest_ref_async(source: SourceRef) -> str | None:
+            return await asyncio.to_thread(api_lookup)
+
+        updates = _collect_updates(
+            lambda source: None, sources, [], max_workers=4, latest_ref_async=latest_ref_async
+        )
+
+        assert len(updates) == 40
+        assert peak > 4
+
+    def test_api_host_limits_follow_the_repository_host(self):
+        limits = _api_host_limits(
+            {"github.com": 2, "gitlab.internal": 3},
+            ["https://api.github.com", "https://gitlab.internal/api/v4"],
+        )
+
+        assert limits == {"github.com": 2, "api.github.com": 2, "gitlab.internal": 3}
+        assert _api_host_limits(
+            {"github.com": 2, "api.github.com": 5}, ["https://api.github.com"]
+        ) == {"github.com": 2, "api.github.com": 5}
+
+    def test_configured_limit_throttles_github_api_requests(self):
+        scheduler = RateLimitScheduler(
+            host_limits=_api_host_limits({"github.com": 2}, ["https://api.github.com"])
+        )
+        client = GitHubClient(base_url="https://api.github.com", scheduler=scheduler)
+        lock = threading.Lock()
+        active: dict[str, int] = {}
+        peak: dict[str, int] = {}
+
+        def send(adapter, request, **kwargs):
+            host = request.url.split("/")[2]
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.02)
+            with lock:
+                active[host] -= 1
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'{"tag_name": "v2.0.0"}'
+            response.url = request.url
+            response.request = request
+            return response
+
+        with (
+            patch("requests.adapters.HTTPAdapter.send", send),
+            concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool,
+        ):
+            refs = list(pool.map(client.latest_ref, [f"org/r{i}" for i in range(12)]))
+
+        assert refs == ["v2.0.0"] * 12
+        assert peak == {"api.github.com": 2}
+
+    def test_collect_updates_slow_host_does_not_starve_others(self):
+        slow = [
+            _mk_source(
+                repo=f"team/s{i}",
+                repo_url=f"https://gitlab.internal/team/s{i}.git",
+                repo_host="gitlab.internal",
+                ref="v1",
+            )
+            for i in range(3)
+        ]
+        fast = [
+            _mk_source(
+                repo=f"org/f{i}",
+                repo_url=f"https://github.com/org/f{i}.git",
+                repo_host="github.com",
+                ref="v1",
+            )
+            for i in range(10)
+        ]
+        fast_done = threading.Event()
+        lock = threading.Lock()
+        counts = {"fast": 0, "slow": 0, "slow_peak": 0}
+
+        def latest_ref_fn(source: SourceRef) -> str | None:
+            if source.repo_host == "github.com":
+                with lock:
+                    counts["fast"] += 1
+                    if counts["fast"] == len(fast):
+                        fast_done.set()
+                return "v2"
+            with lock:
+                counts["slow"] += 1
+                counts["slow_peak"] = max(counts["slow_peak"], counts["slow"])
+            fast_done.wait(5)
+            with lock:
+                counts["slow"] -= 1
+            return "v2"
+
+        updates = _collect_updates(
+            latest_ref_fn,
+            slow + fast,
+            [],
+            max_workers=2,
+            host_limits={"gitlab.internal": 1},
+        )
+
+        assert fast_done.is_set()
+        assert counts["slow_peak"] == 1
+        assert len(updates) == 13
+
+    def test_collect_updates_uses_one_pool_per_backend(self):
+        sources = [
+            _mk_source(
+                repo=f"org/{backend}{i}",
+                repo_url=f"https://{backend}.example/org/r{i}.git",
+                repo_host=f"{backend}.example",
+                ref="v1",
+            )
+            for backend in ("git", "api")
+            for i in range(4)
+        ]
+        barrier = threading.Barrier(4, timeout=2)
+        api_done = threading.Event()
+
+        def latest_ref_fn(source: SourceRef) -> str | None:
+            if source.repo_host == "api.example":
+                barrier.wait()
+                api_done.set()
+                return "v2"
+            return "v2" if api_done.wait(2) else None
+
+        # The git lookups, queued first, block until the API lookups are
+        # done; the four API lookups meet only if they have threads of
+        # their own.
+        updates = _collect_updates(
+            latest_ref_fn,
+            sources,
+            [],
+            max_workers=4,
+            pool_key=lambda source: source.repo_host.split(".")[0],
+        )
+
+        assert api_done.is_set()
+        assert len(updates) == 8
+
     def test_collect_updates_applies_category(self):
         source = _mk_source(
             repo="terraform-aws-modules/vpc",
@@ -166,6 +450,11 @@ class TestCliHelpers:
 
 
 class TestCliMain:
+    @pytest.fixture(autouse=True)
+    def _isolated_cwd(self, tmp_path, monkeypatch):
+        """Keep the default cache directory of each run out of the checkout."""
+        monkeypatch.chdir(tmp_path)
+
     def _config(self) -> Config:
         return Config(categories=[], blacklist=Blacklist(repos=[], modules=[], files=[]))
 
@@ -418,6 +707,216 @@ class TestCliMain:
         assert result == 0
         git_client.latest_ref.assert_called_once()
 
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_resolver_github_graphql_batches_github_repos(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        mock_gh_cls,
+        mock_gl_cls,
+        mock_git_cls,
+    ):
+        """Test GitHub repos are resolved in one batch, with REST and git fallbacks."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = [
+            _mk_source(
+                repo=f"org/{name}",
+                repo_url=f"https://github.com/org/{name}",
+                repo_host="github.com",
+                ref="v1.0.0",
+                file_path=f"{name}.tf",
+            )
+            for name in ("a", "b", "c")
+        ] + [
+            _mk_source(
+                repo="team/mod",
+                repo_url="https://git.example.com/team/mod",
+                repo_host="git.example.com",
+                ref="v1.0.0",
+            )
+        ]
+        gh_client = MagicMock()
+        # org/c was in a failed batch; org/b has neither releases nor tags.
+        gh_client.latest_refs.return_value = {"org/a": "v2.0.0", "org/b": None}
+        gh_client.latest_ref.return_value = "v1.5.0"
+        mock_gh_cls.return_value = gh_client
+        mock_gl_cls.detect_gitlab_host.return_value = None
+        git_client = MagicMock()
+        git_client.latest_ref.return_value = "v3.0.0"
+        mock_git_cls.return_value = git_client
+
+        assert main(["report", "--resolver", "github-graphql", "--graphql-batch-size", "80"]) == 0
+
+        gh_client.latest_refs.assert_called_once()
+        repos = gh_client.latest_refs.call_args[0][0]
+        assert sorted(repos) == ["org/a", "org/b", "org/c"]
+        assert gh_client.latest_refs.call_args[1]["batch_size"] == 80
+        gh_client.latest_ref.assert_called_once_with("org/c")
+        assert sorted(call[0][0] for call in git_client.latest_ref.call_args_list) == [
+            "https://git.example.com/team/mod",
+            "https://github.com/org/b",
+        ]
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_resolver_auto_uses_graphql_only_when_enabled(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        mock_gh_cls,
+        mock_gl_cls,
+        _mock_git_cls,
+    ):
+        """Test --github-graphql opts the auto resolver into batching."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = [
+            _mk_source(
+                repo="org/a",
+                repo_url="https://github.com/org/a",
+                repo_host="github.com",
+                ref="v1.0.0",
+            )
+        ]
+        gh_client = MagicMock()
+        gh_client.latest_refs.return_value = {"org/a": "v2.0.0"}
+        mock_gh_cls.return_value = gh_client
+        mock_gl_cls.detect_gitlab_host.return_value = None
+
+        assert main(["report", "--resolver", "auto", "--no-resolve-cache"]) == 0
+        gh_client.latest_refs.assert_not_called()
+        gh_client.latest_ref.assert_called_once()
+
+        gh_client.latest_ref.reset_mock()
+        args = ["report", "--resolver", "auto", "--github-graphql", "--no-resolve-cache"]
+        assert main(args) == 0
+        gh_client.latest_refs.assert_called_once()
+        gh_client.latest_ref.assert_not_called()
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_resolution_cache_skips_repeated_lookups(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        mock_git_cls,
+        tmp_path,
+        caplog,
+    ):
+        """Test a second run reuses cached refs and --no-resolve-cache bypasses them."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = [
+            _mk_source(
+                repo="org/repo",
+                repo_url="https://example.com/org/repo.git",
+                repo_host="example.com",
+                ref="v1.0.0",
+            )
+        ]
+        git_client = MagicMock()
+        git_client.latest_ref.return_value = "v2.0.0"
+        mock_git_cls.return_value = git_client
+        args = ["report", "--cache-dir", str(tmp_path / "cache")]
+
+        assert main(args) == 0
+        caplog.set_level("INFO", logger="agronomist.cli")
+        assert main(args) == 0
+        assert git_client.latest_ref.call_count == 1
+        assert "Resolution cache: 1 hit(s)" in caplog.text
+        assert (tmp_path / "cache" / "resolve-cache.sqlite").is_file()
+
+        assert main([*args, "--no-resolve-cache"]) == 0
+        assert git_client.latest_ref.call_count == 2
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_engine_asyncio_uses_async_git_lookups(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        mock_git_cls,
+        tmp_path,
+    ):
+        """Test --engine asyncio resolves git repositories with latest_ref_async."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = [
+            _mk_source(
+                repo=f"org/r{i}",
+                repo_url=f"https://example.com/org/r{i}.git",
+                repo_host="example.com",
+                ref="v1.0.0",
+            )
+            for i in range(3)
+        ]
+        git_client = MagicMock()
+        git_client.latest_ref_async = AsyncMock(return_value="v2.0.0")
+        mock_git_cls.return_value = git_client
+        report = tmp_path / "report.json"
+
+        args = ["report", "--engine", "asyncio", "--no-resolve-cache", "--json", str(report)]
+        assert main(args) == 0
+
+        git_client.latest_ref.assert_not_called()
+        assert git_client.latest_ref_async.await_count == 3
+        updates = json.loads(report.read_text())["updates"]
+        assert sorted(u["repo"] for u in updates) == ["org/r0", "org/r1", "org/r2"]
+
+    @patch("agronomist.git.subprocess.run")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_skips_unreachable_host_and_reports_it(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        mock_run,
+        tmp_path,
+    ):
+        """Test that a down host is skipped after --breaker-threshold failures."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = [
+            _mk_source(
+                repo=f"acme/r{i}",
+                repo_url=f"https://gitlab.internal/acme/r{i}.git",
+                repo_host="gitlab.internal",
+                ref="v1.0.0",
+            )
+            for i in range(10)
+        ]
+        mock_run.side_effect = subprocess.CalledProcessError(
+            128, "git", stderr="fatal: Failed to connect to gitlab.internal: Connection refused"
+        )
+        report = tmp_path / "report.json"
+
+        args = ["report", "--workers", "1", "--breaker-threshold", "2", "--no-resolve-cache"]
+        assert main([*args, "--json", str(report)]) == 0
+
+        assert mock_run.call_count == 2
+        data = json.loads(report.read_text())
+        assert data["updates"] == []
+        assert [(h["host"], h["open"]) for h in data["tripped_hosts"]] == [
+            ("gitlab.internal", True)
+        ]
+
     @patch("agronomist.cli.GitClient")
     @patch("agronomist.cli.GitLabClient")
     @patch("agronomist.cli.GitHubClient")
@@ -528,6 +1027,447 @@ class TestCliMain:
         call_kwargs = mock_gh_cls.call_args
         assert call_kwargs[1]["timeout"] == 60
 
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_no_default_prune_flag(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        _mock_git_cls,
+    ):
+        """Test that --no-default-prune disables built-in pruning."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+
+        assert main(["report"]) == 0
+        assert mock_scan_sources.call_args[1]["prune_defaults"] is True
+        assert mock_scan_sources.call_args[1]["as_table"] is True
+        assert mock_scan_sources.call_args[1]["follow_symlinks"] is False
+        assert mock_scan_sources.call_args[1]["backend"] == "walk"
+
+        assert main(["report", "--no-default-prune"]) == 0
+        assert mock_scan_sources.call_args[1]["prune_defaults"] is False
+
+        assert main(["report", "--follow-symlinks"]) == 0
+        assert mock_scan_sources.call_args[1]["follow_symlinks"] is True
+
+        assert main(["report", "--scan-backend", "git-grep"]) == 0
+        assert mock_scan_sources.call_args[1]["backend"] == "git-grep"
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_scan_workers_flag(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        _mock_git_cls,
+    ):
+        """Test that --scan-workers is forwarded to the scanner."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+
+        assert main(["report", "--scan-workers", "4"]) == 0
+        assert mock_scan_sources.call_args[1]["workers"] == 4
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_scan_cache_flags(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        _mock_git_cls,
+        tmp_path,
+    ):
+        """Test --cache-dir selects the index and --no-scan-cache disables it."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+
+        assert main(["report", "--cache-dir", str(tmp_path)]) == 0
+        index = mock_scan_sources.call_args[1]["index"]
+        assert index.path == str(tmp_path / "scan-index")
+
+        assert main(["report", "--no-scan-cache"]) == 0
+        assert mock_scan_sources.call_args[1]["index"] is None
+
+    @patch("agronomist.cli.changed_paths")
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_changed_since_scans_only_changed_files(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        _mock_git_cls,
+        mock_changed_paths,
+    ):
+        """Test that --changed-since feeds git diff paths to the scanner."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+        mock_changed_paths.return_value = ["env/main.tf"]
+
+        assert main(["report", "--changed-since", "origin/main"]) == 0
+        mock_changed_paths.assert_called_once_with(".", "origin/main", timeout=20)
+        assert mock_scan_sources.call_args[1]["files"] == ["env/main.tf"]
+
+        assert main(["report"]) == 0
+        assert mock_scan_sources.call_args[1]["files"] is None
+
+    @patch("agronomist.cli.changed_paths")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_changed_since_git_failure(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        mock_changed_paths,
+    ):
+        """Test that an unknown revision exits with code 1."""
+        mock_load_config.return_value = self._config()
+        mock_changed_paths.side_effect = ScanError("bad revision")
+
+        assert main(["report", "--changed-since", "nope"]) == 1
+        mock_scan_sources.assert_not_called()
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_files_from_feeds_listed_paths(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        _mock_git_cls,
+        temp_dir,
+    ):
+        """Test that --files-from reads newline and NUL separated lists."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+        by_line = os.path.join(temp_dir, "files.txt")
+        with open(by_line, "wb") as handle:
+            handle.write(b"env/main.tf\r\n\nmodules/a b/x.hcl\n")
+        by_nul = os.path.join(temp_dir, "files.nul")
+        with open(by_nul, "wb") as handle:
+            handle.write(b"env/main.tf\0odd\nname.tf\0")
+
+        assert main(["report", "--files-from", by_line]) == 0
+        assert mock_scan_sources.call_args[1]["files"] == ["env/main.tf", "modules/a b/x.hcl"]
+
+        assert main(["report", "--files-from", by_nul]) == 0
+        assert mock_scan_sources.call_args[1]["files"] == ["env/main.tf", "odd\nname.tf"]
+
+        stdin = MagicMock()
+        stdin.buffer.read.return_value = b"live/terragrunt.hcl\n"
+        with patch("agronomist.cli.sys.stdin", stdin):
+            assert main(["update", "--files-from", "-"]) == 0
+        assert mock_scan_sources.call_args[1]["files"] == ["live/terragrunt.hcl"]
+
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_files_from_errors(self, mock_load_config, mock_scan_sources, temp_dir):
+        """Test that unreadable lists and --changed-since are rejected."""
+        mock_load_config.return_value = self._config()
+
+        assert main(["report", "--files-from", os.path.join(temp_dir, "missing")]) == 1
+        assert main(["report", "--files-from", "-", "--changed-since", "HEAD~1"]) == 1
+        mock_scan_sources.assert_not_called()
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.GitLabClient")
+    @patch("agronomist.cli.GitHubClient")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_git_rev_scans_revision_with_blob_cache(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+        _mock_gh_cls,
+        _mock_gl_cls,
+        _mock_git_cls,
+        tmp_path,
+    ):
+        """Test that --git-rev is passed through with the scan index."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+        cache_dir = str(tmp_path)
+
+        args = ["report", "--root", "/mirrors/infra.git", "--git-rev", "v2.0.0"]
+        assert main([*args, "--cache-dir", cache_dir]) == 0
+        assert mock_scan_sources.call_args[1]["git_rev"] == "v2.0.0"
+        assert mock_scan_sources.call_args[1]["index"] is not None
+
+        assert main([*args, "--no-scan-cache"]) == 0
+        assert mock_scan_sources.call_args[1]["index"] is None
+
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_git_rev_rejected_for_update_and_changed_since(
+        self,
+        mock_load_config,
+        mock_scan_sources,
+    ):
+        """Test that --git-rev cannot be combined with file updates."""
+        mock_load_config.return_value = self._config()
+
+        assert main(["update", "--git-rev", "main"]) == 1
+        assert main(["report", "--git-rev", "main", "--changed-since", "HEAD~1"]) == 1
+        mock_scan_sources.assert_not_called()
+
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_archive_root_is_report_only(self, mock_load_config, mock_scan_sources, temp_dir):
+        """Test that archive roots are scanned without index and never updated."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+        bundle = os.path.join(temp_dir, "bundle.tar.gz")
+        with open(bundle, "wb"):
+            pass
+
+        assert main(["update", "--root", bundle]) == 1
+        assert main(["report", "--root", bundle, "--changed-since", "HEAD~1"]) == 1
+        mock_scan_sources.assert_not_called()
+
+        assert main(["report", "--root", bundle]) == 0
+        assert mock_scan_sources.call_args[0][0] == bundle
+        assert mock_scan_sources.call_args[1]["index"] is None
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.load_config")
+    def test_main_archive_root_caches_next_to_archive(
+        self, mock_load_config, mock_git_cls, tmp_path
+    ):
+        """Test that an archive scan keeps its resolution cache beside the archive."""
+        mock_load_config.return_value = self._config()
+        mock_git_cls.return_value.latest_ref.return_value = "v2.0.0"
+        main_tf = tmp_path / "main.tf"
+        main_tf.write_text(
+            'module "m" { source = "git::https://example.com/org/r.git?ref=v1.0.0" }\n'
+        )
+        bundle = tmp_path / "bundle.tar.gz"
+        with tarfile.open(bundle, "w:gz") as archive:
+            archive.add(main_tf, arcname="live/main.tf")
+
+        assert main(["report", "--root", str(bundle), "--json", str(tmp_path / "r.json")]) == 0
+        mock_git_cls.return_value.latest_ref.assert_called_once()
+        assert (tmp_path / ".agronomist" / "resolve-cache.sqlite").is_file()
+        assert (tmp_path / ".agronomist" / "http-cache.sqlite").is_file()
+
+    @patch("agronomist.cli.ConditionalCache")
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_http_cache_skipped_under_a_file(
+        self, mock_load_config, mock_scan_sources, mock_cache_cls, tmp_path, caplog
+    ):
+        """Test that no HTTP cache is opened below a path that is a file."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+        bundle = tmp_path / "bundle.zip"
+        bundle.write_bytes(b"")
+        cache_dir = str(bundle / "cache")
+
+        assert main(["report", "--cache-dir", cache_dir, "--no-resolve-cache"]) == 0
+        mock_cache_cls.assert_not_called()
+        assert f"HTTP cache disabled: {cache_dir} is not a directory" in caplog.text
+
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_bare_repository_caches_in_working_directory(
+        self, mock_load_config, mock_scan_sources, tmp_path, monkeypatch
+    ):
+        """Test that --git-rev on a bare mirror writes nothing into it."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.return_value = []
+        mirror = tmp_path / "infra.git"
+        subprocess.run(["git", "init", "-q", "--bare", str(mirror)], check=True)
+        work = tmp_path / "work"
+        work.mkdir()
+        monkeypatch.chdir(work)
+
+        assert main(["report", "--root", str(mirror), "--git-rev", "main"]) == 0
+        assert mock_scan_sources.call_args[1]["index"].path == os.path.join(
+            ".agronomist", "scan-index"
+        )
+        assert not (mirror / ".agronomist").exists()
+        assert (work / ".agronomist" / "resolve-cache.sqlite").is_file()
+
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.load_config")
+    def test_main_scan_leaves_git_status_clean(self, mock_load_config, mock_git_cls, tmp_path):
+        """Test that the caches under <root>/.agronomist are ignored by Git."""
+        mock_load_config.return_value = self._config()
+        mock_git_cls.return_value.latest_ref.return_value = "v2.0.0"
+        repo = tmp_path / "infra"
+        (repo / "live").mkdir(parents=True)
+        (repo / "live" / "main.tf").write_text(
+            'module "m" { source = "git::https://example.com/org/r.git?ref=v1.0.0" }\n'
+        )
+        git = ["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@example.com"]
+        subprocess.run([*git, "init", "-q"], check=True)
+        subprocess.run([*git, "add", "-A"], check=True)
+        subprocess.run([*git, "commit", "-q", "-m", "init"], check=True)
+        os.utime(repo / "live" / "main.tf", (0, 0))
+
+        assert main(["report", "--root", str(repo), "--json", str(tmp_path / "r.json")]) == 0
+        assert (repo / ".agronomist" / "scan-index").is_file()
+        status = subprocess.run(
+            [*git, "status", "--porcelain", "--untracked-files=all"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        assert status.stdout == ""
+
+    @patch("agronomist.cli.TreeWatcher")
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.load_config")
+    def test_main_watch_rescans_changed_files_only(
+        self, mock_load_config, mock_git_cls, mock_watcher_cls, temp_dir
+    ):
+        """Test that watch re-parses changes and resolves new repos once."""
+        mock_load_config.return_value = self._config()
+        mock_git_cls.return_value.latest_ref.return_value = "v2.0.0"
+        source = 'module "m" {{ source = "git::https://github.com/org/{name}.git?ref=v1.0.0" }}\n'
+        os.makedirs(os.path.join(temp_dir, "live"))
+        main_tf = os.path.join(temp_dir, "live", "main.tf")
+        with open(main_tf, "w", encoding="utf-8") as handle:
+            handle.write(source.format(name="vpc"))
+        report_path = os.path.join(temp_dir, "report.json")
+
+        def _edit_then_stop(debounce):
+            """Simulate an edit, a report rewrite, then Ctrl-C."""
+            if mock_watcher.wait.call_count == 1:
+                with open(main_tf, "a", encoding="utf-8") as handle:
+                    handle.write(source.format(name="eks"))
+                return {os.path.join("live", "main.tf")}
+            if mock_watcher.wait.call_count == 2:
+                return {"report.json"}
+            raise KeyboardInterrupt
+
+        mock_watcher = mock_watcher_cls.return_value
+        mock_watcher.wait.side_effect = _edit_then_stop
+
+        result = main(
+            [
+                "watch",
+                "--root",
+                temp_dir,
+                "--json",
+                report_path,
+                "--no-scan-cache",
+                "--debounce",
+                "50",
+            ]
+        )
+
+        assert result == 0
+        mock_watcher.close.assert_called_once()
+        resolved = [c.args[0] for c in mock_git_cls.return_value.latest_ref.call_args_list]
+        assert resolved == [
+            "https://github.com/org/vpc",
+            "https://github.com/org/eks",
+        ]
+        with open(report_path, encoding="utf-8") as handle:
+            report = json.load(handle)
+        assert sorted(u["repo"] for u in report["updates"]) == ["org/eks", "org/vpc"]
+
+    @patch("agronomist.cli.TreeWatcher")
+    @patch("agronomist.cli.GitClient")
+    @patch("agronomist.cli.load_config")
+    def test_main_watch_retries_repos_without_a_ref(
+        self, mock_load_config, mock_git_cls, mock_watcher_cls, temp_dir
+    ):
+        """Test that a repository that had no ref is looked up with the next batch."""
+        mock_load_config.return_value = self._config()
+        latest = {"https://github.com/org/vpc": [None, "v2.0.0"]}
+        mock_git_cls.return_value.latest_ref.side_effect = lambda url: latest[url].pop(0)
+        os.makedirs(os.path.join(temp_dir, "live"))
+        main_tf = os.path.join(temp_dir, "live", "main.tf")
+        with open(main_tf, "w", encoding="utf-8") as handle:
+            handle.write(
+                'module "m" { source = "git::https://github.com/org/vpc.git?ref=v1.0.0" }\n'
+            )
+        report_path = os.path.join(temp_dir, "report.json")
+        reports = []
+
+        def _touch_then_stop(debounce):
+            """Record the report, touch main.tf once, then Ctrl-C."""
+            with open(report_path, encoding="utf-8") as handle:
+                reports.append(json.load(handle))
+            if len(reports) == 1:
+                return {os.path.join("live", "main.tf")}
+            raise KeyboardInterrupt
+
+        mock_watcher_cls.return_value.wait.side_effect = _touch_then_stop
+        args = ["watch", "--root", temp_dir, "--json", report_path]
+
+        assert main([*args, "--no-scan-cache", "--no-resolve-cache"]) == 0
+        assert mock_git_cls.return_value.latest_ref.call_count == 2
+        assert reports[0]["updates"] == []
+        assert [u["latest_ref"] for u in reports[1]["updates"]] == ["v2.0.0"]
+
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_registers_configured_forge_hosts(
+        self, mock_load_config, mock_scan_sources, monkeypatch
+    ):
+        """Test that base URL hosts get case-insensitive repo keys before the scan."""
+        mock_load_config.return_value = self._config()
+        monkeypatch.setattr(models, "_CASE_INSENSITIVE_HOSTS", models._CASE_INSENSITIVE_HOSTS)
+        mock_scan_sources.side_effect = lambda *a, **kw: [
+            _mk_source(
+                repo=repo,
+                repo_url=f"https://gitlab.corp.example/{repo}.git",
+                repo_host="gitlab.corp.example",
+                ref="v1.0.0",
+            )
+            for repo in ("Infra/VPC", "infra/vpc")
+        ]
+        args = ["report", "--no-resolve-cache", "--no-scan-cache"]
+
+        assert main([*args, "--gitlab-base-url", "https://gitlab.corp.example"]) == 0
+        keys = {source.repo_key for source in mock_scan_sources.side_effect()}
+        assert keys == {"gitlab.corp.example/infra/vpc"}
+
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_watch_rejects_non_worktree_scans(self, mock_load_config, mock_scan_sources):
+        """Test that watch refuses revision and changed-file scans."""
+        mock_load_config.return_value = self._config()
+
+        assert main(["watch", "--git-rev", "main"]) == 1
+        assert main(["watch", "--changed-since", "HEAD~1"]) == 1
+        mock_scan_sources.assert_not_called()
+
+    @patch("agronomist.cli.scan_sources")
+    @patch("agronomist.cli.load_config")
+    def test_main_git_rev_scan_failure(self, mock_load_config, mock_scan_sources):
+        """Test that an unreadable revision exits with code 1."""
+        mock_load_config.return_value = self._config()
+        mock_scan_sources.side_effect = ScanError("git ls-tree nope failed")
+
+        assert main(["report", "--git-rev", "nope"]) == 1
+
     @patch("agronomist.cli.GitClient")
     @patch("agronomist.cli.GitLabClient")
     @patch("agronomist.cli.GitHubClient")
@@ -7,7 +7,7 @@ from pathlib import Path
 import pytest
 import yaml
 
-from agronomist.config import Blacklist, CategoryRule, load_config
+from agronomist.config import Blacklist, CategoryRule, HostSettings, load_config
 from agronomist.exceptions import ConfigError
 
 
@@ -237,3 +237,43 @@ class TestLoadConfigEdgeCases:
 
             with pytest.raises(ConfigError, match="mapping"):
                 load_config("config.yaml", temp_dir)
+
+
+class TestLoadConfigHosts:
+    """Test per-host settings."""
+
+    def test_load_host_concurrency_limits(self, tmp_path):
+        """Test hosts are parsed, lower-cased and exposed as limits."""
+        (tmp_path / "config.yaml").write_text(
+            "hosts:\n  GitLab.Internal:\n    max_concurrency: 4\n  github.com: {}\n"
+        )
+
+        config = load_config("config.yaml", str(tmp_path))
+
+        assert config.hosts == {
+            "gitlab.internal": HostSettings(max_concurrency=4),
+            "github.com": HostSettings(),
+        }
+        assert config.host_limits() == {"gitlab.internal": 4}
+
+    def test_hosts_default_to_empty(self, tmp_path):
+        """Test configurations without hosts have no limits."""
+        (tmp_path / "config.yaml").write_text("categories: []\n")
+
+        assert load_config("config.yaml", str(tmp_path)).host_limits() == {}
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "hosts: [gitlab.internal]\n",
+            "hosts:\n  gitlab.internal: 4\n",
+            "hosts:\n  gitlab.internal:\n    max_concurrency: 0\n",
+            "hosts:\n  gitlab.internal:\n    max_concurrency: four\n",
+        ],
+    )
+    def test_malformed_hosts_raise_config_error(self, tmp_path, content):
+        """Test invalid host settings are rejected."""
+        (tmp_path / "config.yaml").write_text(content)
+
+        with pytest.raises(ConfigError):
+            load_config("config.yaml", str(tmp_path))
@@ -6,7 +6,7 @@ import os
 
 import pytest
 
-from agronomist.fileutil import atomic_write
+from agronomist.fileutil import atomic_write, ensure_cache_dir
 
 
 class TestAtomicWrite:
@@ -53,3 +53,19 @@ class TestAtomicWrite:
         remaining = os.listdir(str(tmp_path))
         assert not any(f.endswith(".tmp") for f in remaining)
         monkeypatch.setattr(os, "replace", original_replace)
+
+
+class TestEnsureCacheDir:
+    """Tests for the ``ensure_cache_dir`` helper."""
+
+    def test_new_directory_ignores_everything(self, tmp_path: object) -> None:
+        """Verify that a created directory gets a catch-all .gitignore."""
+        path = os.path.join(str(tmp_path), "a", ".agronomist")
+        ensure_cache_dir(path)
+        with open(os.path.join(path, ".gitignore"), encoding="utf-8") as fh:
+            assert fh.read() == "*\n"
+
+    def test_existing_directory_left_alone(self, tmp_path: object) -> None:
+        """Verify that an existing directory gets no .gitignore."""
+        ensure_cache_dir(str(tmp_path))
+        assert not os.path.exists(os.path.join(str(tmp_path), ".gitignore"))
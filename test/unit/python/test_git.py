@@ -1,11 +1,21 @@
 """Tests for git resolver."""
 
+import asyncio
+import subprocess
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from agronomist.exceptions import ResolverError
-from agronomist.git import GitClient
+from agronomist.exceptions import ResolverError, ScanError
+from agronomist.git import (
+    GitClient,
+    changed_paths,
+    grep_files,
+    iter_blobs,
+    list_tree,
+    untracked_paths,
+)
+from agronomist.resolvecache import ResolutionCache
 
 
 class TestGitClient:
@@ -167,3 +177,201 @@ class TestGitClient:
 
         with pytest.raises(ResolverError):
             client.latest_ref("https://github.com/example/repo.git")
+
+
+class TestLatestRefAsync:
+    """Test the asyncio variant of ls-remote resolution."""
+
+    def test_latest_ref_async_matches_blocking_lookup(self, make_git_repo):
+        """Test both lookups agree on a real repository."""
+        repo = make_git_repo({"main.tf": "x"})
+        subprocess.run(["git", "-C", str(repo), "tag", "v1.10.0"], check=True)
+        subprocess.run(["git", "-C", str(repo), "tag", "v1.9.0"], check=True)
+        client = GitClient()
+
+        assert asyncio.run(client.latest_ref_async(str(repo))) == "v1.10.0"
+        assert client.latest_ref(str(repo)) == "v1.10.0"
+
+    def test_latest_ref_async_missing_repository(self, make_git_repo, temp_dir):
+        """Test a missing repository raises ResolverError."""
+        with pytest.raises(ResolverError, match="not found or no access"):
+            asyncio.run(GitClient().latest_ref_async(f"{temp_dir}/missing"))
+
+    @patch("agronomist.git.asyncio.create_subprocess_exec")
+    def test_latest_ref_async_git_not_installed(self, mock_exec):
+        """Test a missing git binary raises ResolverError."""
+        mock_exec.side_effect = FileNotFoundError()
+
+        with pytest.raises(ResolverError, match="not installed"):
+            asyncio.run(GitClient().latest_ref_async("https://example.com/repo.git"))
+
+
+class TestListTags:
+    """Test listing every tag of a remote."""
+
+    def test_list_tags_matches_latest_ref(self, make_git_repo):
+        """Test the tag list is version-sorted, latest first."""
+        repo = make_git_repo({"main.tf": "x"})
+        for tag in ("v1.9.0", "v1.10.0", "v1.2.0"):
+            subprocess.run(["git", "-C", str(repo), "tag", tag], check=True)
+        client = GitClient()
+
+        assert client.list_tags(str(repo)) == ["v1.10.0", "v1.9.0", "v1.2.0", "v1"]
+        assert asyncio.run(client.list_tags_async(str(repo))) == client.list_tags(str(repo))
+
+    def test_latest_ref_reads_the_cached_tag_list(self, make_git_repo, tmp_path):
+        """Test that a tag cache answers later lookups without git."""
+        repo = make_git_repo({"main.tf": "x"})
+        subprocess.run(["git", "-C", str(repo), "tag", "v2.0.0"], check=True)
+        cache = ResolutionCache(str(tmp_path / "cache" / "resolve.sqlite"))
+        client = GitClient(tag_cache=cache)
+
+        assert client.latest_ref(str(repo)) == "v2.0.0"
+        with patch("agronomist.git.subprocess.run") as run:
+            assert client.latest_ref(str(repo)) == "v2.0.0"
+            assert asyncio.run(client.latest_ref_async(str(repo))) == "v2.0.0"
+        run.assert_not_called()
+        assert cache.resolve_tags(f"git {repo}", MagicMock()) == ["v2.0.0", "v1"]
+        cache.close()
+
+
+class TestChangedPaths:
+    """Test listing files changed since a revision."""
+
+    @patch("agronomist.git.subprocess.run")
+    def test_changed_paths_parses_nul_separated_output(self, mock_run):
+        """Test that NUL-separated git output is split into paths."""
+        mock_run.return_value = MagicMock(stdout="a/main.tf\0b dir/terragrunt.hcl\0")
+
+        result = changed_paths("/repo", "origin/main")
+
+        assert result == ["a/main.tf", "b dir/terragrunt.hcl"]
+        cmd = mock_run.call_args[0][0]
+        assert cmd[:3] == ["git", "-C", "/repo"]
+        assert "--relative" in cmd
+        assert "--diff-filter=d" in cmd
+        assert cmd[-2:] == ["origin/main", "--"]
+
+    @patch("agronomist.git.subprocess.run")
+    def test_changed_paths_no_changes(self, mock_run):
+        """Test that empty output yields no paths."""
+        mock_run.return_value = MagicMock(stdout="")
+
+        assert changed_paths("/repo", "HEAD") == []
+
+    @patch("agronomist.git.subprocess.run")
+    def test_changed_paths_unknown_revision(self, mock_run):
+        """Test that git failures raise ScanError."""
+        import subprocess
+
+        error = subprocess.CalledProcessError(128, "git")
+        error.stderr = "fatal: bad revision 'nope'\n"
+        mock_run.side_effect = error
+
+        with pytest.raises(ScanError, match="bad revision"):
+            changed_paths("/repo", "nope")
+
+    @patch("agronomist.git.subprocess.run")
+    def test_changed_paths_git_missing(self, mock_run):
+        """Test that a missing git binary raises ScanError."""
+        mock_run.side_effect = FileNotFoundError()
+
+        with pytest.raises(ScanError, match="not installed"):
+            changed_paths("/repo", "HEAD")
+
+
+class TestGrepFiles:
+    """Test listing tracked files through git grep and ls-files."""
+
+    @patch("agronomist.git.subprocess.run")
+    def test_grep_files_splits_nul_separated_output(self, mock_run):
+        """Test that matching paths are returned in order."""
+        mock_run.return_value = MagicMock(returncode=0, stdout=b"a b/main.tf\0c.hcl\0")
+
+        assert grep_files("/repo", "?ref=") == ["a b/main.tf", "c.hcl"]
+        cmd = mock_run.call_args[0][0]
+        assert cmd[:4] == ["git", "-C", "/repo", "grep"]
+        assert cmd[-2:] == ["-e", "?ref="]
+        assert "-F" in cmd and "-z" in cmd
+
+    @patch("agronomist.git.subprocess.run")
+    def test_grep_files_without_matches(self, mock_run):
+        """Test that exit status 1 means no matches."""
+        mock_run.return_value = MagicMock(returncode=1, stdout=b"")
+
+        assert grep_files("/repo", "?ref=") == []
+
+    @patch("agronomist.git.subprocess.run")
+    def test_grep_files_outside_worktree(self, mock_run):
+        """Test that other exit statuses raise ScanError."""
+        mock_run.return_value = MagicMock(
+            returncode=128, stdout=b"", stderr=b"fatal: not a git repository\n"
+        )
+
+        with pytest.raises(ScanError, match="not a git repository"):
+            grep_files("/tmp", "?ref=")
+
+    @patch("agronomist.git.subprocess.run")
+    def test_untracked_paths_git_missing(self, mock_run):
+        """Test that a missing git binary raises ScanError."""
+        mock_run.side_effect = FileNotFoundError()
+
+        with pytest.raises(ScanError, match="Git not installed"):
+            untracked_paths("/repo")
+
+
+class TestListTree:
+    """Test listing the files of a revision."""
+
+    @patch("agronomist.git.subprocess.run")
+    def test_list_tree_keeps_regular_blobs(self, mock_run):
+        """Test that symlinks and submodules are skipped."""
+        mock_run.return_value = MagicMock(
+            stdout=(
+                b"100644 blob aaa\tinfra/main.tf\0"
+                b"100755 blob bbb\tbin/run.sh\0"
+                b"120000 blob ccc\tlink.tf\0"
+                b"160000 commit ddd\tvendor/mod\0"
+            )
+        )
+
+        result = list_tree("/repo.git", "v1.0.0")
+
+        assert result == [("infra/main.tf", "aaa"), ("bin/run.sh", "bbb")]
+        cmd = mock_run.call_args[0][0]
+        assert cmd == ["git", "-C", "/repo.git", "ls-tree", "-r", "-z", "v1.0.0"]
+
+    @patch("agronomist.git.subprocess.run")
+    def test_list_tree_unknown_revision(self, mock_run):
+        """Test that git failures raise ScanError."""
+        import subprocess
+
+        error = subprocess.CalledProcessError(128, "git")
+        error.stderr = b"fatal: Not a valid object name nope\n"
+        mock_run.side_effect = error
+
+        with pytest.raises(ScanError, match="Not a valid object name"):
+            list_tree("/repo.git", "nope")
+
+
+class TestIterBlobs:
+    """Test streaming blobs through git cat-file --batch."""
+
+    def test_iter_blobs_reads_contents_in_order(self, make_git_repo):
+        """Test that blobs are returned in request order."""
+        repo = make_git_repo({"a.tf": "alpha\n", "b.tf": "beta\n"})
+        blob_ids = dict(list_tree(str(repo), "HEAD"))
+
+        result = list(iter_blobs(str(repo), [blob_ids["b.tf"], blob_ids["a.tf"], "0" * 40]))
+
+        assert result == [
+            (blob_ids["b.tf"], b"beta\n"),
+            (blob_ids["a.tf"], b"alpha\n"),
+            ("0" * 40, None),
+        ]
+
+    def test_iter_blobs_without_objects_starts_no_process(self):
+        """Test that an empty request list yields nothing."""
+        with patch("agronomist.git.subprocess.Popen") as mock_popen:
+            assert list(iter_blobs("/repo.git", [])) == []
+        mock_popen.assert_not_called()
@@ -6,6 +6,8 @@ import pytest
 
 from agronomist.exceptions import AuthenticationError, NetworkError
 from agronomist.github import GitHubClient
+from agronomist.httpcache import ConditionalCache
+from agronomist.ratelimit import RateLimitScheduler
 
 
 class TestGitHubClient:
@@ -217,6 +219,23 @@ class TestGitHubClient:
         assert result == "v1.8.0"
         mock_tag.assert_called_once_with("example/repo")
 
+    @patch("requests.adapters.HTTPAdapter.send")
+    def test_latest_ref_reports_rate_limit_instead_of_access_denied(self, mock_send, caplog):
+        """Test a secondary rate limit is not mistaken for a permission error."""
+        throttled = MagicMock(
+            status_code=403,
+            headers={"Retry-After": "600"},
+            text="You have exceeded a secondary rate limit",
+        )
+        mock_send.return_value = throttled
+
+        client = GitHubClient(base_url="https://api.github.com", scheduler=RateLimitScheduler())
+        assert client.latest_ref("example/repo") is None
+
+        assert mock_send.call_count == 1
+        assert "rate limited while resolving example/repo" in caplog.text
+        assert "access denied" not in caplog.text
+
     @patch("requests.Session.get")
     def test_validate_token_forbidden(self, mock_get):
         """Test forbidden token raises AuthenticationError."""
@@ -271,3 +290,89 @@ class TestGitHubClient:
         result = client.latest_release_tag("example/repo")
 
         assert result is None
+
+    @patch("requests.Session.get")
+    def test_latest_tag_revalidates_with_etag(self, mock_get, tmp_path):
+        """Test a stored ETag is sent back and a 304 reuses the stored tag."""
+        ok = MagicMock(status_code=200, headers={"ETag": 'W/"abc"'})
+        ok.json.return_value = [{"name": "v2.0.0"}]
+        not_modified = MagicMock(status_code=304, headers={})
+        mock_get.side_effect = [ok, not_modified]
+        cache = ConditionalCache(str(tmp_path / "http-cache.sqlite"))
+
+        client = GitHubClient(base_url="https://api.github.com", conditional_cache=cache)
+        assert client.latest_tag("example/repo") == "v2.0.0"
+        assert "If-None-Match" not in mock_get.call_args_list[0][1]["headers"]
+
+        client = GitHubClient(base_url="https://api.github.com", conditional_cache=cache)
+        assert client.latest_tag("example/repo") == "v2.0.0"
+        assert mock_get.call_args_list[1][1]["headers"]["If-None-Match"] == 'W/"abc"'
+        not_modified.json.assert_not_called()
+        assert (cache.stats.fetched, cache.stats.not_modified) == (1, 1)
+        cache.close()
+
+
+class TestGitHubGraphQL:
+    """Test batched resolution through the GraphQL API."""
+
+    @staticmethod
+    def _answer(data: dict) -> MagicMock:
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"data": data}
+        return response
+
+    def test_graphql_url(self):
+        """Test the endpoint is derived from the REST base URL."""
+        assert GitHubClient(base_url="https://api.github.com").graphql_url() == (
+            "https://api.github.com/graphql"
+        )
+        enterprise = GitHubClient(base_url="https://ghe.example.com/api/v3/")
+        assert enterprise.graphql_url() == "https://ghe.example.com/api/graphql"
+
+    @patch("requests.Session.post")
+    def test_latest_refs_batches_repositories(self, mock_post):
+        """Test repositories are split into aliased queries of batch_size."""
+        mock_post.side_effect = [
+            self._answer(
+                {
+                    "r0": {"latestRelease": {"tagName": "v2.0.0"}, "refs": {"nodes": []}},
+                    "r1": {"latestRelease": None, "refs": {"nodes": [{"name": "v0.3.0"}]}},
+                }
+            ),
+            self._answer({"r0": None}),
+        ]
+        client = GitHubClient(base_url="https://api.github.com", token="t")
+
+        refs = client.latest_refs(["org/a", "org/b", "org/gone"], batch_size=2)
+
+        assert refs == {"org/a": "v2.0.0", "org/b": "v0.3.0", "org/gone": None}
+        assert mock_post.call_count == 2
+        first = mock_post.call_args_list[0][1]["json"]
+        assert first["variables"] == {"o0": "org", "n0": "a", "o1": "org", "n1": "b"}
+        assert "r1: repository(owner: $o1, name: $n1)" in first["query"]
+        assert "org" not in first["query"]
+
+    @patch("requests.Session.post")
+    def test_latest_refs_requires_token(self, mock_post):
+        """Test no query is sent without a token."""
+        client = GitHubClient(base_url="https://api.github.com")
+
+        assert client.latest_refs(["org/a"]) == {}
+        mock_post.assert_not_called()
+
+    @patch("requests.Session.post")
+    def test_latest_refs_skips_failed_batches(self, mock_post):
+        """Test repositories of a failed batch are left for the REST fallback."""
+        rejected = MagicMock(status_code=401)
+        errors = MagicMock(status_code=200)
+        errors.json.return_value = {"data": None, "errors": [{"message": "rate limited"}]}
+        mock_post.side_effect = [
+            rejected,
+            errors,
+            self._answer({"r0": {"latestRelease": {"tagName": "v1"}, "refs": None}}),
+        ]
+        client = GitHubClient(base_url="https://api.github.com", token="t")
+
+        refs = client.latest_refs(["org/a", "org/b", "org/c", "not-a-repo"], batch_size=1)
+
+        assert refs == {"org/c": "v1"}
@@ -6,6 +6,7 @@ import pytest
 
 from agronomist.exceptions import AuthenticationError, NetworkError
 from agronomist.gitlab import GitLabClient
+from agronomist.httpcache import ConditionalCache
 
 
 class TestGitLabClient:
@@ -232,3 +233,19 @@ class TestGitLabClient:
 
         assert "PRIVATE-TOKEN" in headers
         assert headers["PRIVATE-TOKEN"] == "my-token"
+
+    @patch("requests.Session.get")
+    def test_latest_tag_revalidates_with_last_modified(self, mock_get, tmp_path):
+        """Test a stored Last-Modified is sent back and a 304 reuses the stored tag."""
+        stamp = "Wed, 14 Oct 2026 08:00:00 GMT"
+        ok = MagicMock(status_code=200, headers={"Last-Modified": stamp})
+        ok.json.return_value = [{"name": "v3.1.0"}]
+        mock_get.side_effect = [ok, MagicMock(status_code=304, headers={})]
+        cache = ConditionalCache(str(tmp_path / "http-cache.sqlite"))
+        client = GitLabClient(base_url="https://gitlab.com", conditional_cache=cache)
+
+        assert client.latest_tag("group%2Fproject") == "v3.1.0"
+        assert client.latest_tag("group%2Fproject") == "v3.1.0"
+        assert mock_get.call_args_list[1][1]["headers"]["If-Modified-Since"] == stamp
+        assert cache.stats.not_modified == 1
+        cache.close()
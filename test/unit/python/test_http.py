@@ -1,6 +1,7 @@
 """Tests for the shared HTTP session builder."""
 
 from agronomist.http import build_session
+from agronomist.ratelimit import RateLimitAdapter, RateLimitScheduler
 
 
 class TestBuildSession:
@@ -25,9 +26,17 @@ class TestBuildSession:
         adapter = session.get_adapter("https://example.com")
         assert adapter.max_retries.total == 3
         assert adapter.max_retries.backoff_factor == 0.5
-        assert 429 in adapter.max_retries.status_forcelist
         assert 500 in adapter.max_retries.status_forcelist
 
+    def test_rate_limits_left_to_scheduler(self):
+        """Test 429 is not retried blindly but scheduled per host."""
+        scheduler = RateLimitScheduler()
+        session = build_session(scheduler=scheduler)
+        adapter = session.get_adapter("https://example.com")
+        assert isinstance(adapter, RateLimitAdapter)
+        assert adapter.scheduler is scheduler
+        assert 429 not in adapter.max_retries.status_forcelist
+
     def test_only_get_method_retried(self):
         """Test that only GET requests are retried."""
         session = build_session()
@@ -0,0 +1,41 @@
+"""Tests for the persistent conditional-request cache."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from agronomist.httpcache import CachedResponse, ConditionalCache
+
+
+def _response(**headers: str) -> MagicMock:
+    return MagicMock(status_code=200, headers=headers)
+
+
+class TestConditionalCache:
+    def test_store_and_lookup_persist(self, tmp_path):
+        path = str(tmp_path / "cache" / "http-cache.sqlite")
+        cache = ConditionalCache(path)
+        cache.store("https://api/x", _response(ETag='"1"', **{"Last-Modified": "then"}), "v1")
+        cache.close()
+
+        reopened = ConditionalCache(path)
+        cached = reopened.lookup("https://api/x")
+        assert cached == CachedResponse('"1"', "then", "v1")
+        assert cached.headers() == {"If-None-Match": '"1"', "If-Modified-Since": "then"}
+        assert reopened.lookup("https://api/y") is None
+        reopened.close()
+
+    def test_response_without_validators_is_not_stored(self, tmp_path):
+        cache = ConditionalCache(str(tmp_path / "http-cache.sqlite"))
+        cache.store("https://api/x", _response(), "v1")
+
+        assert cache.lookup("https://api/x") is None
+        assert cache.stats.fetched == 1
+        cache.close()
+
+    def test_empty_result_is_stored(self, tmp_path):
+        cache = ConditionalCache(str(tmp_path / "http-cache.sqlite"))
+        cache.store("https://api/x", _response(ETag='"e"'), None)
+
+        assert cache.lookup("https://api/x") == CachedResponse('"e"', None, None)
+        cache.close()
@@ -0,0 +1,132 @@
+"""Tests for lexer module."""
+
+import mmap
+import time
+
+from agronomist.lexer import SourceToken, iter_source_tokens
+
+_URL = b"git::https://github.com/org/repo.git?ref=v1.0.0"
+
+
+def _values(data: bytes) -> list[bytes]:
+    """Return the token values found in *data*."""
+    return [token.value for token in iter_source_tokens(data)]
+
+
+class TestIterSourceTokens:
+    """Test extraction of source attribute values."""
+
+    def test_reports_value_line_and_column(self):
+        """Test that tokens carry the keyword position."""
+        data = b'module "a" {\n  source = "' + _URL + b'"\n}\n'
+        assert list(iter_source_tokens(data)) == [SourceToken(_URL, 2, 3)]
+
+    def test_line_numbers_across_many_tokens(self):
+        """Test that line numbers accumulate between tokens."""
+        data = b"".join(b'source = "v%d"\n\n' % i for i in range(3))
+        tokens = list(iter_source_tokens(data))
+        assert [token.line for token in tokens] == [1, 3, 5]
+        assert [token.value for token in tokens] == [b"v0", b"v1", b"v2"]
+
+    def test_skips_line_comments(self):
+        """Test that # and // comments hide sources."""
+        data = b'# source = "a"\n// source = "b"\nx = 1 # source = "c"\nsource = "d"\n'
+        assert _values(data) == [b"d"]
+
+    def test_skips_block_comments(self):
+        """Test that /* */ comments hide sources across lines."""
+        data = b'/*\nsource = "a"\n*/ source = "b"\n/* x */ source = "c"\n/* source = "d"'
+        assert _values(data) == [b"b", b"c"]
+
+    def test_column_after_block_comment(self):
+        """Test that columns count from the line start."""
+        data = b'/* x */ source = "b"\n'
+        assert list(iter_source_tokens(data))[0].column == 9
+
+    def test_skips_heredocs(self):
+        """Test that heredoc bodies hide sources."""
+        data = (
+            b'policy = <<EOT\nsource = "a"\nEOT\nsource = "b"\n'
+            b'doc = <<-EOF\n  source = "c"\n  EOF\nsource = "d"\n'
+        )
+        assert _values(data) == [b"b", b"d"]
+
+    def test_unterminated_heredoc_hides_rest(self):
+        """Test that an unclosed heredoc runs to end of file."""
+        data = b'source = "a"\nx = <<EOT\nsource = "b"\n'
+        assert _values(data) == [b"a"]
+
+    def test_heredoc_operator_inside_string_is_ignored(self):
+        """Test that << inside a string does not start a heredoc."""
+        data = b'x = "<<EOT"\nsource = "a"\n'
+        assert _values(data) == [b"a"]
+
+    def test_skips_sources_inside_strings(self):
+        """Test that source text within a string is not reported."""
+        data = b'description = "set source = \\"x\\" here" source = "a"\n'
+        assert _values(data) == [b"a"]
+
+    def test_comment_markers_inside_strings(self):
+        """Test that # and // inside strings do not start comments."""
+        data = b'url = "https://x#y" source = "a"\n'
+        assert _values(data) == [b"a"]
+
+    def test_interpolation_with_nested_quotes(self):
+        """Test that interpolations are skipped as one token."""
+        data = b'name = "${var.a == "source = \\"x\\"" ? 1 : 2}" source = "a"\n'
+        assert _values(data) == [b"a"]
+
+    def test_unterminated_string_resyncs_at_newline(self):
+        """Test that a broken string does not hide later lines."""
+        data = b'name = "broken\nsource = "a"\n'
+        assert _values(data) == [b"a"]
+
+    def test_ignores_longer_identifiers(self):
+        """Test that resource, my-source or source_x are not matched."""
+        data = b'resource = "a"\nmy-source = "b"\nsource_x = "c"\nsource = "d"\n'
+        assert _values(data) == [b"d"]
+
+    def test_requires_assignment_and_quoted_value(self):
+        """Test that bare or unquoted occurrences are skipped."""
+        data = b'source\nsource = var.x\nsource = ""\nsource = "a"\n'
+        assert _values(data) == [b"a"]
+
+    def test_accepts_single_quoted_values(self):
+        """Test that single-quoted values are still reported."""
+        assert _values(b"source = 'a'\n") == [b"a"]
+
+    def test_value_with_interpolation_is_kept_verbatim(self):
+        """Test that template values are returned undecoded."""
+        data = b'source = "git::https://h/${var.org}/r?ref=v1"\n'
+        assert _values(data) == [b"git::https://h/${var.org}/r?ref=v1"]
+
+    def test_reads_memory_mapped_buffers(self, temp_dir):
+        """Test that mmap buffers are lexed like bytes."""
+        path = f"{temp_dir}/main.tf"
+        data = b'# header\nsource = "' + _URL + b'"\n'
+        with open(path, "wb") as handle:
+            handle.write(data)
+        with open(path, "rb") as handle:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                tokens = list(iter_source_tokens(mapped))
+        assert tokens == list(iter_source_tokens(data))
+        assert tokens[0].value == _URL
+
+    def test_long_line_is_lexed_in_linear_time(self):
+        """Test that thousands of sources on one line stay fast."""
+        item = b'x = "a # b" source = "' + _URL + b'" /* c */ '
+        data = item * 10000 + b'# source = "hidden"\n'
+        started = time.perf_counter()
+        tokens = list(iter_source_tokens(data))
+        assert time.perf_counter() - started < 5
+        assert len(tokens) == 10000
+        assert tokens[-1] == SourceToken(_URL, 1, len(item) * 9999 + 13)
+
+    def test_unterminated_string_does_not_hide_next_line(self):
+        """Test that a string never continues on the next line."""
+        data = b'a = "x\\\nsource = "a"\nb = "${"y\nsource = "b"\n'
+        assert _values(data) == [b"a", b"b"]
+
+    def test_single_quoted_value_does_not_open_a_string(self):
+        """Test that a # inside a single-quoted value is not a comment."""
+        assert _values(b"source = 'a#b' source = \"c\"\n") == [b"a#b", b"c"]
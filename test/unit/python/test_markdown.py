@@ -189,6 +189,15 @@ class TestGenerateMarkdown:
 
         assert "- Affected files: 2" in markdown
 
+    def test_generate_markdown_lists_tripped_hosts(self):
+        """Test that hosts skipped by the circuit breaker are listed."""
+        host = {"host": "gitlab.internal", "trips": 2, "open": True, "last_error": "a|b"}
+        for updates in ([], [{"repo": "repo1", "module": "mod1"}]):
+            markdown = generate_markdown({"updates": updates, "tripped_hosts": [host]})
+
+            assert "## Unreachable Hosts" in markdown
+            assert "| `gitlab.internal` | 2 | yes | a\\|b |" in markdown
+
 
 class TestWriteMarkdown:
     """Test write_markdown function."""
@@ -4,7 +4,15 @@ from __future__ import annotations
 
 import pytest
 
-from agronomist.models import Replacement, SourceRef, UpdateEntry
+from agronomist import models
+from agronomist.models import (
+    Replacement,
+    SourceRef,
+    UpdateEntry,
+    add_case_insensitive_hosts,
+    canonical_repo_key,
+    case_insensitive_hosts,
+)
 
 
 class TestReplacement:
@@ -95,6 +103,44 @@ class TestUpdateEntry:
 class TestSourceRef:
     """Test the SourceRef dataclass."""
 
+    def test_repo_key_is_derived_when_omitted(self):
+        """Test that repo_key defaults to the canonical key."""
+        ref = SourceRef(
+            file_path="main.tf",
+            raw="git::https://github.com/Org/Repo.git?ref=v1",
+            repo="Org/Repo",
+            repo_url="https://github.com/Org/Repo.git",
+            repo_host="GitHub.com",
+            ref="v1",
+        )
+        assert ref.repo_key == "github.com/org/repo"
+
+    @pytest.mark.parametrize(
+        ("host", "path", "expected"),
+        [
+            ("github.com", "/Org/Repo.git/", "github.com/org/repo"),
+            ("ghe.corp.example", "Org/Repo", "ghe.corp.example/Org/Repo"),
+            ("github.corp.example", "Org/Repo", "github.corp.example/Org/Repo"),
+            ("gitlab.com", "Group/Sub/Repo", "gitlab.com/group/sub/repo"),
+            ("bitbucket.org", "Team/Repo", "bitbucket.org/team/repo"),
+            ("git.example.com", "srv//Repo.GIT", "git.example.com/srv/Repo"),
+        ],
+    )
+    def test_canonical_repo_key(self, host, path, expected):
+        """Test host and path normalization of repository keys."""
+        assert canonical_repo_key(host, path) == expected
+
+    def test_registered_hosts_are_case_insensitive(self, monkeypatch):
+        """Test that self-hosted forges fold case once registered."""
+        monkeypatch.setattr(models, "_CASE_INSENSITIVE_HOSTS", models._CASE_INSENSITIVE_HOSTS)
+        assert canonical_repo_key("ghe.corp.example", "Org/Repo") == "ghe.corp.example/Org/Repo"
+
+        add_case_insensitive_hosts("GHE.corp.example.", "")
+
+        assert canonical_repo_key("ghe.corp.example", "Org/Repo") == "ghe.corp.example/org/repo"
+        assert "ghe.corp.example" in case_insensitive_hosts()
+        assert "" not in case_insensitive_hosts()
+
     def test_source_ref_module_defaults_to_none(self):
         """Test that module defaults to None."""
         ref = SourceRef(
@@ -0,0 +1,95 @@
+"""Tests for patterns module."""
+
+import fnmatch
+
+from agronomist.patterns import PatternSet, compile_patterns
+
+
+class TestPatternSet:
+    """Test compiled glob matching."""
+
+    def test_empty_set_matches_nothing(self):
+        """Test that an empty set never matches."""
+        patterns = PatternSet([])
+        assert not patterns
+        assert len(patterns) == 0
+        assert patterns.first_match("main.tf") is None
+        assert not patterns.matches("main.tf")
+
+    def test_first_match_returns_declaration_index(self):
+        """Test that the first matching pattern wins."""
+        patterns = PatternSet(["**/*.hcl", "*.tf", "**/main.tf"])
+        assert patterns.first_match("infra/main.tf") == 1
+        assert patterns.first_match("infra/terragrunt.hcl") == 0
+        assert patterns.first_match("README.md") is None
+
+    def test_matches_agrees_with_fnmatch(self):
+        """Test equivalence with per-pattern fnmatch calls."""
+        pattern_list = [
+            "**/*.tf",
+            "test/**",
+            "**/legacy/**",
+            "env-?/*.hcl",
+            "[!.]*/vendor/*",
+            "*/terraform-aws-*",
+        ]
+        paths = [
+            "main.tf",
+            "a/b/main.tf",
+            "test/fixtures/data.json",
+            "a/legacy/x.hcl",
+            "legacy/x.hcl",
+            "env-1/terragrunt.hcl",
+            "env-10/terragrunt.hcl",
+            "mods/vendor/x",
+            ".hidden/vendor/x",
+            "org/terraform-aws-vpc",
+            "",
+        ]
+        patterns = PatternSet(pattern_list)
+        for path in paths:
+            expected_hits = [i for i, p in enumerate(pattern_list) if fnmatch.fnmatch(path, p)]
+            expected = expected_hits[0] if expected_hits else None
+            assert patterns.first_match(path) == expected, path
+            assert patterns.matches(path) == bool(expected_hits), path
+
+    def test_patterns_with_regex_metacharacters(self):
+        """Test that regex metacharacters are matched literally."""
+        patterns = PatternSet(["modules/(old)+.tf", "a|b"])
+        assert patterns.first_match("modules/(old)+.tf") == 0
+        assert patterns.first_match("a|b") == 1
+        assert patterns.first_match("a") is None
+
+    def test_compile_patterns_is_cached(self):
+        """Test that identical pattern tuples share one instance."""
+        first = compile_patterns(("**/*.tf",))
+        second = compile_patterns(("**/*.tf",))
+        assert first is second
+
+
+class TestMatches:
+    """Test PatternSet.matches, which replaced the scanner's _match_any."""
+
+    def test_single_pattern_match(self):
+        """Test matching a single pattern."""
+        assert compile_patterns(("**/*.tf",)).matches("src/main.tf")
+
+    def test_single_pattern_no_match(self):
+        """Test non-matching pattern."""
+        assert not compile_patterns(("**/*.tf",)).matches("src/main.py")
+
+    def test_multiple_patterns(self):
+        """Test matching with multiple patterns."""
+        patterns = compile_patterns(("**/*.tf", "**/*.hcl"))
+        assert patterns.matches("src/main.tf")
+        assert patterns.matches("src/terragrunt.hcl")
+        assert not patterns.matches("src/main.py")
+
+    def test_empty_patterns(self):
+        """Test with empty patterns list."""
+        assert not compile_patterns(()).matches("src/main.tf")
+
+    def test_wildcard_patterns(self):
+        """Test various wildcard patterns."""
+        assert compile_patterns(("test/**",)).matches("test/fixtures/data.json")
+        assert compile_patterns(("**/file.tf",)).matches("deep/nested/file.tf")
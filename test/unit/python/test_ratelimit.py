@@ -0,0 +1,159 @@
+"""Tests for rate-limit-aware request scheduling."""
+
+from __future__ import annotations
+
+import io
+import threading
+import time
+from email.utils import formatdate
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from agronomist.exceptions import RateLimitError
+from agronomist.http import build_session
+from agronomist.ratelimit import RateLimitScheduler, retry_after, throttle_delay
+
+
+def _response(status: int = 200, body: str = "", **headers: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update({name.replace("_", "-"): value for name, value in headers.items()})
+    response._content = body.encode()
+    response.raw = io.BytesIO()
+    return response
+
+
+class TestThrottleDelay:
+    def test_retry_after_seconds_and_http_date(self):
+        assert retry_after(_response(429, Retry_After="7")) == 7.0
+        when = formatdate(time.time() + 30, usegmt=True)
+        assert 28 <= retry_after(_response(429, Retry_After=when)) <= 30
+        assert retry_after(_response(429, Retry_After="soon")) is None
+
+    def test_exhausted_quota_waits_until_reset(self):
+        reset = str(int(time.time()) + 100)
+        response = _response(403, X_RateLimit_Remaining="0", X_RateLimit_Reset=reset)
+        assert 98 <= throttle_delay(response) <= 100
+
+    def test_gitlab_headers_are_understood(self):
+        reset = str(int(time.time()) + 10)
+        response = _response(429, RateLimit_Remaining="0", RateLimit_Reset=reset)
+        assert 8 <= throttle_delay(response) <= 10
+
+    def test_secondary_rate_limit_403_is_throttled(self):
+        body = '{"message": "You have exceeded a secondary rate limit."}'
+        assert throttle_delay(_response(403, body)) == 60.0
+
+    def test_permission_errors_are_not_throttled(self):
+        assert throttle_delay(_response(403, '{"message": "Resource not accessible"}')) is None
+        assert throttle_delay(_response(404)) is None
+        assert throttle_delay(_response(200, X_RateLimit_Remaining="0")) is None
+
+
+class TestRateLimitScheduler:
+    def test_concurrency_halves_on_throttling_and_recovers(self):
+        scheduler = RateLimitScheduler(max_concurrency=8)
+
+        scheduler.acquire("api.github.com")
+        scheduler.release("api.github.com", _response(429, Retry_After="0"))
+        assert scheduler.concurrency("api.github.com") == 4
+        assert scheduler.concurrency("gitlab.com") == 8
+
+        for _ in range(40):
+            scheduler.acquire("api.github.com")
+            scheduler.release("api.github.com", _response(200))
+        assert scheduler.concurrency("api.github.com") == 8
+        assert scheduler.stats.throttled == 1
+
+    def test_configured_hosts_override_the_default_limit(self):
+        scheduler = RateLimitScheduler(max_concurrency=8, host_limits={"gitlab.internal": 2})
+
+        assert scheduler.concurrency("gitlab.internal") == 2
+        for _ in range(10):
+            scheduler.acquire("gitlab.internal")
+            scheduler.release("gitlab.internal", _response(200))
+        assert scheduler.concurrency("gitlab.internal") == 2
+        assert scheduler.concurrency("api.github.com") == 8
+
+    def test_in_flight_requests_are_bounded(self):
+        scheduler = RateLimitScheduler(max_concurrency=2)
+        scheduler.acquire("h")
+        scheduler.acquire("h")
+        entered = threading.Event()
+
+        def third() -> None:
+            scheduler.acquire("h")
+            entered.set()
+
+        thread = threading.Thread(target=third)
+        thread.start()
+        assert not entered.wait(0.05)
+        scheduler.release("h", _response(200))
+        assert entered.wait(1)
+        thread.join()
+
+    def test_exhausted_quota_fails_fast_beyond_max_wait(self):
+        scheduler = RateLimitScheduler(max_wait=5)
+        scheduler.acquire("h")
+        reset = str(int(time.time()) + 600)
+        scheduler.release("h", _response(200, X_RateLimit_Remaining="0", X_RateLimit_Reset=reset))
+
+        with pytest.raises(RateLimitError, match="rate limited"):
+            scheduler.acquire("h")
+
+    def test_low_quota_spaces_requests_over_the_window(self):
+        scheduler = RateLimitScheduler()
+        reset = str(time.time() + 0.3)
+        scheduler.acquire("h")
+        scheduler.release(
+            "h",
+            _response(
+                200, X_RateLimit_Limit="100", X_RateLimit_Remaining="3", X_RateLimit_Reset=reset
+            ),
+        )
+
+        start = time.monotonic()
+        for _ in range(3):
+            scheduler.acquire("h")
+            scheduler.release("h", None)
+        assert time.monotonic() - start >= 0.15
+        assert scheduler.stats.waited > 0
+
+
+class TestRateLimitAdapter:
+    def test_throttled_request_is_retried_after_retry_after(self):
+        session = build_session(scheduler=RateLimitScheduler())
+        replies = [_response(429, Retry_After="0.05"), _response(200, "ok")]
+
+        with patch("requests.adapters.HTTPAdapter.send", side_effect=replies) as send:
+            start = time.monotonic()
+            response = session.get("https://api.github.com/repos/o/r/tags")
+
+        assert response.status_code == 200
+        assert send.call_count == 2
+        assert time.monotonic() - start >= 0.04
+
+    def test_throttling_pauses_other_requests_to_the_host(self):
+        scheduler = RateLimitScheduler(max_wait=1)
+        session = build_session(scheduler=scheduler)
+        secondary = _response(403, "You have exceeded a secondary rate limit")
+
+        with patch("requests.adapters.HTTPAdapter.send", return_value=secondary) as send:
+            with pytest.raises(RateLimitError):
+                session.get("https://api.github.com/repos/o/a/tags")
+            with pytest.raises(RateLimitError):
+                session.get("https://api.github.com/repos/o/b/tags")
+
+        assert send.call_count == 1
+
+    def test_permission_errors_are_returned(self):
+        session = build_session(scheduler=RateLimitScheduler())
+        denied = _response(403, '{"message": "Must have admin rights"}')
+
+        with patch("requests.adapters.HTTPAdapter.send", return_value=denied) as send:
+            assert session.get("https://api.github.com/repos/o/r").status_code == 403
+            assert session.get("https://api.github.com/repos/o/r").status_code == 403
+
+        assert send.call_count == 2
@@ -63,6 +63,13 @@ class TestBuildReport:
         # Report should reference the same list
         assert len(report["updates"]) == 2
 
+    def test_build_report_lists_tripped_hosts(self):
+        """Test that tripped hosts are included only when present."""
+        tripped = [{"host": "gitlab.internal", "trips": 1}]
+
+        assert build_report("/root", [], tripped)["tripped_hosts"] == tripped
+        assert "tripped_hosts" not in build_report("/root", [], [])
+
 
 class TestWriteReport:
     """Test report file writing functionality."""
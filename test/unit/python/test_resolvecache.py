@@ -0,0 +1,216 @@
+"""Tests for the persistent resolution cache."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agronomist.exceptions import CircuitOpenError, ResolverError
+from agronomist.resolvecache import ResolutionCache
+
+
+@pytest.fixture
+def clock():
+    """Patch the cache's clock; tests advance ``clock.now``."""
+    fake = MagicMock()
+    fake.now = 1_000.0
+    with patch("agronomist.resolvecache.time.time", side_effect=lambda: fake.now):
+        yield fake
+
+
+def _cache(tmp_path, **kwargs) -> ResolutionCache:
+    return ResolutionCache(str(tmp_path / "cache" / "resolve.sqlite"), **kwargs)
+
+
+class TestResolutionCache:
+    def test_fresh_entry_is_served_without_lookup(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=60)
+        fetch = MagicMock(return_value="v2.0.0")
+
+        assert cache.resolve("git https://host/a", fetch) == "v2.0.0"
+        clock.now += 59
+        assert cache.resolve("git https://host/a", fetch) == "v2.0.0"
+
+        fetch.assert_called_once()
+        assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+        cache.close()
+
+    def test_entries_persist_across_instances(self, tmp_path, clock):
+        cache = _cache(tmp_path)
+        cache.resolve("key", lambda: "v1")
+        cache.close()
+
+        reopened = _cache(tmp_path)
+        fetch = MagicMock()
+        assert reopened.resolve("key", fetch) == "v1"
+        fetch.assert_not_called()
+        reopened.close()
+
+    def test_expired_entry_is_looked_up_again(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=60)
+        cache.resolve("key", lambda: "v1")
+        clock.now += 61
+
+        assert cache.resolve("key", lambda: "v2") == "v2"
+        assert cache.stats.misses == 2
+        cache.close()
+
+    def test_failures_are_cached_with_negative_ttl(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=3600, negative_ttl=10)
+        fetch = MagicMock(side_effect=ResolverError("timed out"))
+
+        with pytest.raises(ResolverError):
+            cache.resolve("key", fetch)
+        assert cache.resolve("key", fetch) is None
+        assert cache.stats.negative_hits == 1
+        fetch.assert_called_once()
+
+        clock.now += 11
+        fetch.side_effect = None
+        fetch.return_value = "v3"
+        assert cache.resolve("key", fetch) == "v3"
+        cache.close()
+
+    def test_lookups_skipped_by_the_breaker_are_not_cached(self, tmp_path, clock):
+        cache = _cache(tmp_path, negative_ttl=3600)
+        fetch = MagicMock(side_effect=[CircuitOpenError("host is unreachable"), "v2"])
+
+        with pytest.raises(CircuitOpenError):
+            cache.resolve("key", fetch)
+        assert cache.resolve("key", fetch) == "v2"
+        assert fetch.call_count == 2
+        cache.close()
+
+    def test_empty_result_is_cached_negatively(self, tmp_path, clock):
+        cache = _cache(tmp_path, negative_ttl=10)
+        fetch = MagicMock(return_value=None)
+
+        assert cache.resolve("key", fetch) is None
+        assert cache.resolve("key", fetch) is None
+        fetch.assert_called_once()
+        cache.close()
+
+    def test_stale_while_revalidate_refreshes_in_background(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=60, stale_while_revalidate=True)
+        cache.resolve("key", lambda: "v1")
+        clock.now += 61
+
+        release = threading.Event()
+
+        def slow_fetch() -> str:
+            release.wait(5)
+            return "v2"
+
+        assert cache.resolve("key", slow_fetch) == "v1"
+        assert cache.resolve("key", slow_fetch) == "v1"
+        release.set()
+        cache.close()
+        assert (cache.stats.stale, cache.stats.refreshed) == (2, 1)
+
+        reopened = _cache(tmp_path, ttl=60)
+        assert reopened.resolve("key", MagicMock()) == "v2"
+        reopened.close()
+
+    def test_failed_background_refresh_keeps_stale_value(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=60, stale_while_revalidate=True)
+        cache.resolve("key", lambda: "v1")
+        clock.now += 61
+
+        assert cache.resolve("key", MagicMock(side_effect=ResolverError("down"))) == "v1"
+        cache.close()
+        assert cache.stats.refreshed == 0
+
+        reopened = _cache(tmp_path, ttl=60, stale_while_revalidate=True)
+        assert reopened.resolve("key", lambda: "v2") == "v1"
+        reopened.close()
+
+    def test_wrap_keys_lookups(self, tmp_path, clock):
+        cache = _cache(tmp_path)
+        resolver = MagicMock(side_effect=lambda url: url.upper())
+        cached = cache.wrap(resolver, lambda url: f"git {url}")
+
+        assert cached("a") == "A"
+        assert cached("a") == "A"
+        assert cached("b") == "B"
+        assert resolver.call_count == 2
+        cache.close()
+
+    def test_covers_reports_entries_served_without_waiting(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=60, negative_ttl=10)
+        cache.resolve("ok", lambda: "v1")
+        cache.resolve("empty", lambda: None)
+        assert cache.covers("ok") and cache.covers("empty")
+        assert not cache.covers("unknown")
+
+        clock.now += 61
+        assert not cache.covers("ok") and not cache.covers("empty")
+        cache.stale_while_revalidate = True
+        assert cache.covers("ok") and not cache.covers("empty")
+        cache.close()
+
+    def test_wrap_async_shares_entries_with_sync_lookups(self, tmp_path, clock):
+        cache = _cache(tmp_path)
+        cache.resolve("git a", lambda: "v1")
+
+        async def resolver(url: str) -> str:
+            return f"{url}@async"
+
+        cached = cache.wrap_async(resolver, MagicMock(), lambda url: f"git {url}")
+
+        assert asyncio.run(cached("a")) == "v1"
+        assert asyncio.run(cached("b")) == "b@async"
+        assert cache.resolve("git b", MagicMock()) == "b@async"
+        cache.close()
+
+    def test_tag_lists_are_cached_with_the_same_ttls(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=60, negative_ttl=10)
+        fetch = MagicMock(return_value=["v2.0.0", "v1.0.0"])
+
+        assert cache.resolve_tags("git a", fetch) == ["v2.0.0", "v1.0.0"]
+        assert cache.resolve_tags("git a", fetch) == ["v2.0.0", "v1.0.0"]
+        fetch.assert_called_once()
+        assert cache.resolve("git a", lambda: "latest") == "latest"
+
+        empty = MagicMock(return_value=[])
+        assert cache.resolve_tags("git b", empty) == []
+        clock.now += 9
+        assert cache.resolve_tags("git b", empty) == []
+        assert empty.call_count == 1
+        clock.now += 2
+        cache.resolve_tags("git b", empty)
+        assert empty.call_count == 2
+        cache.close()
+
+    def test_refresh_does_not_serve_nested_stale_tag_lists(self, tmp_path, clock):
+        cache = _cache(tmp_path, ttl=60, stale_while_revalidate=True)
+        tags = MagicMock(return_value=["v1"])
+
+        def latest() -> str:
+            return cache.resolve_tags("git a", tags)[0]
+
+        assert cache.resolve("ref a", latest) == "v1"
+        clock.now += 61
+        tags.return_value = ["v2", "v1"]
+
+        assert cache.resolve("ref a", latest) == "v1"
+        cache.close()
+        reopened = _cache(tmp_path, ttl=60)
+        assert reopened.resolve("ref a", MagicMock()) == "v2"
+        assert reopened.resolve_tags("git a", MagicMock()) == ["v2", "v1"]
+        reopened.close()
+
+    def test_resolve_tags_async_shares_entries_with_sync_lookups(self, tmp_path, clock):
+        cache = _cache(tmp_path)
+
+        async def list_tags() -> list[str]:
+            return ["v3", "v2"]
+
+        assert asyncio.run(cache.resolve_tags_async("git a", list_tags, MagicMock())) == [
+            "v3",
+            "v2",
+        ]
+        assert cache.resolve_tags("git a", MagicMock()) == ["v3", "v2"]
+        cache.close()
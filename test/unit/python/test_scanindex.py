@@ -0,0 +1,254 @@
+"""Tests for scanindex module."""
+
+import json
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from agronomist.git import iter_blobs, list_tree
+from agronomist.lexer import iter_source_tokens
+from agronomist.models import ScanStats
+from agronomist.scanindex import SCAN_INDEX_VERSION, BlobCache, ScanIndex
+from agronomist.scanner import blob_id, scan_sources
+
+_SOURCE = 'module "x" {{ source = "git::https://github.com/org/{name}.git?ref=v1.0.0" }}\n'
+
+
+def _write_old(path: Path, content: str) -> None:
+    """Write *content* and backdate mtime past the racy window."""
+    path.write_text(content)
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+
+def _make_tree(root: str) -> Path:
+    """Create a small tree with two indexed files."""
+    infra_dir = Path(root) / "infra"
+    infra_dir.mkdir()
+    _write_old(infra_dir / "a.tf", _SOURCE.format(name="a"))
+    _write_old(infra_dir / "b.tf", _SOURCE.format(name="b"))
+    return infra_dir
+
+
+class TestScanIndex:
+    """Test the persistent incremental scan index."""
+
+    def test_second_scan_is_served_from_index(self, temp_dir):
+        """Test that unchanged files are not re-parsed."""
+        _make_tree(temp_dir)
+        index_path = os.path.join(temp_dir, ".agronomist", "scan-index")
+
+        index = ScanIndex.load(index_path)
+        first = scan_sources(temp_dir, index=index)
+        index.save()
+
+        stats = ScanStats()
+        second = scan_sources(temp_dir, index=ScanIndex.load(index_path), stats=stats)
+
+        assert second == first
+        assert stats.files_cached == 2
+        assert stats.files_scanned == 0
+
+    def test_cached_repo_keys_are_interned(self, temp_dir):
+        """Test that refs loaded from the index share one repo_key string."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        _write_old(infra_dir / "a.tf", _SOURCE.format(name="Shared"))
+        _write_old(infra_dir / "b.tf", _SOURCE.format(name="Shared"))
+        index_path = os.path.join(temp_dir, ".agronomist", "scan-index")
+        index = ScanIndex.load(index_path)
+        scan_sources(temp_dir, index=index)
+        index.save()
+
+        first, second = scan_sources(temp_dir, index=ScanIndex.load(index_path))
+
+        assert first.repo_key == "github.com/org/shared"
+        assert first.repo_key is second.repo_key
+
+    def test_changed_and_deleted_files(self, temp_dir):
+        """Test that changed files are re-parsed and deleted ones dropped."""
+        infra_dir = _make_tree(temp_dir)
+        index_path = os.path.join(temp_dir, "index")
+        index = ScanIndex.load(index_path)
+        scan_sources(temp_dir, index=index)
+        index.save()
+
+        _write_old(infra_dir / "a.tf", _SOURCE.format(name="changed-name"))
+        (infra_dir / "b.tf").unlink()
+
+        stats = ScanStats()
+        index = ScanIndex.load(index_path)
+        results = scan_sources(temp_dir, index=index, stats=stats)
+
+        assert [r.repo for r in results] == ["org/changed-name"]
+        assert stats.files_scanned == 1
+        assert stats.files_cached == 0
+        assert len(index) == 1
+
+    def test_blacklists_apply_to_cached_refs(self, temp_dir):
+        """Test that blacklist changes take effect on cached files."""
+        _make_tree(temp_dir)
+        index_path = os.path.join(temp_dir, "index")
+        index = ScanIndex.load(index_path)
+        scan_sources(temp_dir, index=index)
+        index.save()
+
+        results = scan_sources(
+            temp_dir,
+            index=ScanIndex.load(index_path),
+            blacklist_repos=["org/a"],
+        )
+
+        assert [r.repo for r in results] == ["org/b"]
+
+    def test_recently_modified_files_are_not_indexed(self, temp_dir):
+        """Test that racily-clean files are never trusted."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "a.tf").write_text(_SOURCE.format(name="a"))
+
+        index = ScanIndex(os.path.join(temp_dir, "index"))
+        scan_sources(temp_dir, index=index)
+
+        assert len(index) == 0
+
+    def test_schema_version_mismatch_is_ignored(self, temp_dir):
+        """Test that an index with another version is discarded."""
+        index_path = Path(temp_dir) / "index"
+        index_path.write_text(
+            json.dumps(
+                {
+                    "version": SCAN_INDEX_VERSION + 1,
+                    "files": {"a.tf": {"stat": [0, 0, 0], "refs": []}},
+                }
+            )
+        )
+
+        assert len(ScanIndex.load(str(index_path))) == 0
+
+    def test_corrupt_index_is_ignored(self, temp_dir):
+        """Test that an unparsable index yields an empty one."""
+        index_path = Path(temp_dir) / "index"
+        index_path.write_text("{not json")
+
+        assert len(ScanIndex.load(str(index_path))) == 0
+
+    def test_save_writes_only_when_dirty(self, temp_dir):
+        """Test that an unchanged index is not rewritten."""
+        index_path = os.path.join(temp_dir, "cache", "index")
+        ScanIndex(index_path).save()
+
+        assert not os.path.exists(index_path)
+
+    def test_malformed_rows_are_reparsed(self, temp_dir):
+        """Test that an entry with invalid rows counts as a miss."""
+        infra_dir = _make_tree(temp_dir)
+        stat = os.stat(infra_dir / "a.tf")
+        index_path = Path(temp_dir) / "index"
+        index_path.write_text(
+            json.dumps(
+                {
+                    "version": SCAN_INDEX_VERSION,
+                    "files": {
+                        "infra/a.tf": {
+                            "stat": [stat.st_mtime_ns, stat.st_size, stat.st_ino],
+                            "blob": "1234",
+                        }
+                    },
+                    "blobs": {"1234": [[1, 2, 3, 4, 5, None, None, None]]},
+                }
+            )
+        )
+
+        index = ScanIndex.load(str(index_path))
+        assert len(index.blobs) == 0
+        assert index.lookup(temp_dir, "infra/a.tf") is None
+
+
+class TestBlobCache:
+    """Test the content-addressed parse cache."""
+
+    def test_identical_files_are_parsed_once_per_run(self, temp_dir):
+        """Test that byte-identical files share one parse."""
+        for env in ("dev", "stage", "prod"):
+            env_dir = Path(temp_dir) / env
+            env_dir.mkdir()
+            (env_dir / "terragrunt.hcl").write_text(_SOURCE.format(name="vpc"))
+        stats = ScanStats()
+
+        with patch("agronomist.scanner.iter_source_tokens", wraps=iter_source_tokens) as lexer:
+            results = scan_sources(temp_dir, stats=stats)
+
+        assert sorted(r.file_path for r in results) == [
+            "dev/terragrunt.hcl",
+            "prod/terragrunt.hcl",
+            "stage/terragrunt.hcl",
+        ]
+        assert {r.repo for r in results} == {"org/vpc"}
+        assert lexer.call_count == 1
+        assert stats.files_scanned == 3
+        assert stats.files_reused == 2
+
+    def test_content_cache_survives_new_checkout(self, temp_dir):
+        """Test that a fresh copy of the tree reuses parse results."""
+        first_root = os.path.join(temp_dir, "first")
+        second_root = os.path.join(temp_dir, "second")
+        os.mkdir(first_root)
+        _make_tree(first_root)
+        index_path = os.path.join(temp_dir, "index")
+        index = ScanIndex.load(index_path)
+        first = scan_sources(first_root, index=index)
+        index.save()
+
+        os.mkdir(second_root)
+        _make_tree(second_root)
+        (Path(second_root) / "infra" / "c.tf").write_text(_SOURCE.format(name="c"))
+        stats = ScanStats()
+        index = ScanIndex.load(index_path)
+        second = scan_sources(second_root, index=index, stats=stats)
+
+        assert [r for r in second if r.repo != "org/c"] == first
+        assert sorted(r.repo for r in second) == ["org/a", "org/b", "org/c"]
+        assert stats.files_cached == 0
+        assert stats.files_reused == 2
+        assert stats.files_scanned == 3
+
+    def test_blob_id_matches_git(self, make_git_repo):
+        """Test that content hashes equal Git blob IDs."""
+        content = _SOURCE.format(name="a")
+        repo = make_git_repo({"main.tf": content, "empty.tf": ""})
+
+        tree = dict(list_tree(str(repo), "HEAD"))
+
+        assert blob_id(content.encode()) == tree["main.tf"]
+        assert blob_id(b"") == tree["empty.tf"]
+
+    def test_git_rev_scan_skips_cached_blobs(self, make_git_repo, temp_dir):
+        """Test that cached blobs are not read from Git again."""
+        repo = make_git_repo({"live/main.tf": _SOURCE.format(name="a")})
+        index_path = os.path.join(temp_dir, "index")
+        index = ScanIndex.load(index_path)
+        first = scan_sources(str(repo), index=index, git_rev="v1")
+        index.save()
+        stats = ScanStats()
+
+        with patch("agronomist.scanner.iter_blobs", wraps=iter_blobs) as read_blobs:
+            second = scan_sources(
+                str(repo), index=ScanIndex.load(index_path), git_rev="v1", stats=stats
+            )
+
+        assert second == first
+        assert list(read_blobs.call_args[0][1]) == []
+        assert stats.files_reused == 1
+
+    def test_trim_keeps_used_and_recent_blobs(self):
+        """Test that the least recently used unreferenced blobs go first."""
+        cache = BlobCache()
+        for name in ("a", "b", "c", "d"):
+            cache.store(name, [])
+        cache.refs("a", "x.tf")
+
+        cache.trim({"b"}, limit=2)
+
+        assert list(cache) == ["b", "a"]
@@ -1,40 +1,11 @@
 """Tests for scanner module."""
 
 from agronomist.scanner import (
-    _match_any,
     _parse_git_source,
     scan_sources,
 )
 
 
-class TestMatchAny:
-    """Test pattern matching functionality."""
-
-    def test_match_any_single_pattern_match(self):
-        """Test matching a single pattern."""
-        assert _match_any("src/main.tf", ["**/*.tf"])
-
-    def test_match_any_single_pattern_no_match(self):
-        """Test non-matching pattern."""
-        assert not _match_any("src/main.py", ["**/*.tf"])
-
-    def test_match_any_multiple_patterns(self):
-        """Test matching with multiple patterns."""
-        patterns = ["**/*.tf", "**/*.hcl"]
-        assert _match_any("src/main.tf", patterns)
-        assert _match_any("src/terragrunt.hcl", patterns)
-        assert not _match_any("src/main.py", patterns)
-
-    def test_match_any_empty_patterns(self):
-        """Test with empty patterns list."""
-        assert not _match_any("src/main.tf", [])
-
-    def test_match_any_wildcard_patterns(self):
-        """Test various wildcard patterns."""
-        assert _match_any("test/fixtures/data.json", ["test/**"])
-        assert _match_any("deep/nested/file.tf", ["**/file.tf"])
-
-
 class TestParseGitSource:
     """Test Git source parsing."""
 
@@ -122,6 +93,25 @@ class TestParseGitSource:
         assert result.module is None
         assert result.repo_url == ("https://github.com/owner/repo")
 
+    def test_spellings_of_one_remote_share_a_repo_key(self):
+        """Test that SSH, SCP and HTTPS forms of a remote get one key."""
+        sources = [
+            "git::git@github.com:Acme/VPC.git?ref=v1",
+            "git::ssh://git@github.com/acme/vpc?ref=v1",
+            "git::https://github.com/acme/vpc.git//modules/a?ref=v1",
+        ]
+        keys = {_parse_git_source(source).repo_key for source in sources}
+
+        assert keys == {"github.com/acme/vpc"}
+
+    def test_repo_key_separates_hosts_and_keeps_plain_git_case(self):
+        """Test that equal paths on other hosts get distinct keys."""
+        internal = _parse_git_source("git::https://git.internal/Acme/VPC.git?ref=v1")
+        gitlab = _parse_git_source("git::https://GitLab.internal/acme/vpc.git?ref=v1")
+
+        assert internal.repo_key == "git.internal/Acme/VPC"
+        assert gitlab.repo_key == "gitlab.internal/acme/vpc"
+
     def test_parse_scp_ssh_without_git_prefix(self):
         """Test SCP-style SSH without git:: prefix."""
         source = "git@gitlab.com:group/project.git?ref=v3.1.0"
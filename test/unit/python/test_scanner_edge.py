@@ -2,10 +2,31 @@
 
 from __future__ import annotations
 
+import io
+import os
+import subprocess
+import tarfile
+import time
+import zipfile
 from pathlib import Path
 from unittest.mock import patch
 
-from agronomist.scanner import _parse_git_source, scan_sources
+import pytest
+
+from agronomist import models
+from agronomist.exceptions import ScanError
+from agronomist.models import ScanStats
+from agronomist.scanindex import ScanIndex
+from agronomist.scanner import (
+    MMAP_MIN_BYTES,
+    PARALLEL_SCAN_MIN_FILES,
+    _dir_prune_patterns,
+    _parse_git_source,
+    _parse_source_value,
+    _scan_file,
+    scan_sources,
+)
+from agronomist.sourcetable import SourceTable
 
 
 class TestScannerEdgeCases:
@@ -178,3 +199,461 @@ class TestScannerEdgeCases:
         assert len(results) == 2
         repos = {r.repo for r in results}
         assert repos == {"org/repo-a", "org/repo-b"}
+
+    def test_scan_sources_prunes_default_directories(self, temp_dir):
+        """Test that .git/.terraform/.terragrunt-cache are not walked."""
+        source = 'module "x" { source = "git::https://github.com/org/repo.git?ref=v1.0.0" }'
+        for name in (".git", ".terraform", ".terragrunt-cache"):
+            cache_dir = Path(temp_dir) / "env" / name / "modules"
+            cache_dir.mkdir(parents=True)
+            (cache_dir / "main.tf").write_text(source)
+        (Path(temp_dir) / "env" / "main.tf").write_text(source)
+
+        stats = ScanStats()
+        results = scan_sources(temp_dir, stats=stats)
+
+        assert [r.file_path for r in results] == ["env/main.tf"]
+        assert stats.dirs_pruned == 3
+        assert stats.files_scanned == 1
+
+    def test_scan_sources_default_prune_opt_out(self, temp_dir):
+        """Test that prune_defaults=False walks cache directories."""
+        cache_dir = Path(temp_dir) / ".terraform" / "modules"
+        cache_dir.mkdir(parents=True)
+        (cache_dir / "main.tf").write_text(
+            'module "x" { source = "git::https://github.com/org/repo.git?ref=v1.0.0" }'
+        )
+
+        results = scan_sources(temp_dir, prune_defaults=False)
+
+        assert len(results) == 1
+
+    def test_scan_sources_prunes_directory_exclude_patterns(self, temp_dir):
+        """Test that directory-only excludes prune the walk."""
+        source = 'module "x" { source = "git::https://github.com/org/repo.git?ref=v1.0.0" }'
+        vendor_dir = Path(temp_dir) / "infra" / "vendor" / "deep"
+        vendor_dir.mkdir(parents=True)
+        (vendor_dir / "main.tf").write_text(source)
+        (Path(temp_dir) / "infra" / "main.tf").write_text(source)
+
+        stats = ScanStats()
+        results = scan_sources(
+            temp_dir,
+            exclude=["**/vendor/**"],
+            stats=stats,
+        )
+
+        assert [r.file_path for r in results] == ["infra/main.tf"]
+        assert stats.dirs_pruned == 1
+
+    def test_scan_sources_file_excludes_do_not_prune(self, temp_dir):
+        """Test that file-level excludes leave directories walked."""
+        source = 'module "x" { source = "git::https://github.com/org/repo.git?ref=v1.0.0" }'
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "main.tf").write_text(source)
+        (infra_dir / "skip.tf").write_text(source)
+
+        stats = ScanStats()
+        results = scan_sources(temp_dir, exclude=["**/skip.tf"], stats=stats)
+
+        assert [r.file_path for r in results] == ["infra/main.tf"]
+        assert stats.dirs_pruned == 0
+
+    def test_dir_prune_patterns_only_keeps_tree_globs(self):
+        """Test which exclude globs can prune whole directories."""
+        patterns = ["**/vendor/**", "test/*", "**/*.tf", "*", "/**", "a/b*"]
+        assert _dir_prune_patterns(patterns) == ["**/vendor", "test"]
+
+    def test_scan_sources_parallel_matches_serial(self, temp_dir):
+        """Test that a process-pool scan returns the serial result."""
+        for i in range(PARALLEL_SCAN_MIN_FILES + 20):
+            env_dir = Path(temp_dir) / f"env{i % 7}" / f"stack{i}"
+            env_dir.mkdir(parents=True)
+            (env_dir / "terragrunt.hcl").write_text(
+                f'terraform {{ source = "git::https://github.com/org/mod{i % 13}.git'
+                f'//modules/m{i}?ref=v1.{i}.0" }}\n'
+                'module "b" { source = "git::git@github.com:org/shared.git?ref=v2.0.0" }\n'
+            )
+
+        serial_stats = ScanStats()
+        parallel_stats = ScanStats()
+        serial = scan_sources(temp_dir, stats=serial_stats)
+        parallel = scan_sources(temp_dir, stats=parallel_stats, workers=4)
+
+        assert parallel == serial
+        assert len(serial) == 2 * (PARALLEL_SCAN_MIN_FILES + 20)
+        assert parallel_stats == serial_stats
+
+    def test_scan_sources_small_tree_stays_serial(self, temp_dir):
+        """Test that small trees never start a process pool."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "main.tf").write_text(
+            'module "x" { source = "git::https://github.com/org/repo.git?ref=v1.0.0" }'
+        )
+
+        with patch("agronomist.scanner.concurrent.futures.ProcessPoolExecutor") as pool:
+            results = scan_sources(temp_dir, workers=8)
+
+        pool.assert_not_called()
+        assert len(results) == 1
+
+    def test_scan_sources_explicit_file_list(self, temp_dir):
+        """Test scanning only listed files, with filters applied."""
+        source = 'module "x" {{ source = "git::https://github.com/org/{name}.git?ref=v1.0.0" }}'
+        infra_dir = Path(temp_dir) / "infra"
+        (infra_dir / "legacy").mkdir(parents=True)
+        (infra_dir / ".terraform").mkdir()
+        for name in ("a", "b", "legacy/c", ".terraform/d"):
+            (infra_dir / f"{name}.tf").write_text(source.format(name=name.split("/")[-1]))
+        (infra_dir / "notes.md").write_text(source.format(name="md"))
+
+        results = scan_sources(
+            temp_dir,
+            exclude=["**/legacy/**"],
+            files=[
+                "infra/b.tf",
+                "./infra/b.tf",
+                str(infra_dir / "legacy" / "c.tf"),
+                "infra/.terraform/d.tf",
+                "infra/notes.md",
+                "infra/missing.tf",
+                "../outside.tf",
+            ],
+        )
+
+        assert [r.repo for r in results] == ["org/b"]
+
+    def test_scan_sources_tolerates_non_utf8_files(self, temp_dir):
+        """Test that files in other encodings are scanned, not fatal."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "main.tf").write_bytes(
+            b"# Configura\xe7\xe3o legada\n"
+            b'module "a" { source = "git::https://github.com/org/repo.git?ref=v1.0.0" }\n'
+            b'module "b" { source = "git::https://github.com/org/\xff.git?ref=v1.0.0" }\n'
+        )
+
+        results = scan_sources(temp_dir)
+
+        assert [r.repo for r in results] == ["org/repo"]
+
+    def test_scan_sources_memory_maps_large_files(self, temp_dir):
+        """Test that sources in large (mmap'ed) files are found."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        padding = "# filler\n" * (MMAP_MIN_BYTES // 9 + 1)
+        (infra_dir / "big.tf").write_text(
+            padding + 'module "a" { source = "git::https://github.com/org/big.git?ref=v3.0.0" }\n'
+        )
+
+        with patch("agronomist.scanner.mmap.mmap", wraps=__import__("mmap").mmap) as mapper:
+            results = scan_sources(temp_dir)
+
+        mapper.assert_called_once()
+        assert [(r.repo, r.ref) for r in results] == [("org/big", "v3.0.0")]
+
+    def test_scan_sources_prefilter_skips_files_without_ref(self, temp_dir):
+        """Test that files without ?ref= never reach the lexer."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "main.tf").write_text('module "a" { source = "./local" }\n')
+
+        with patch("agronomist.scanner.iter_source_tokens") as lexer:
+            results = scan_sources(temp_dir)
+
+        lexer.assert_not_called()
+        assert results == []
+
+    def test_scan_sources_records_line_and_column(self, temp_dir):
+        """Test that refs carry the position of the source keyword."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "main.tf").write_text(
+            'module "a" {\n    source = "git::https://github.com/org/repo.git?ref=v1.0.0"\n}\n'
+        )
+
+        results = scan_sources(temp_dir)
+
+        assert [(r.line, r.column) for r in results] == [(2, 5)]
+
+    def test_scan_sources_ignores_commented_sources(self, temp_dir):
+        """Test that sources in comments and heredocs are not reported."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "main.tf").write_text(
+            '# source = "git::https://github.com/org/old.git?ref=v0.1.0"\n'
+            '/* source = "git::https://github.com/org/older.git?ref=v0.0.1" */\n'
+            'doc = <<EOT\nsource = "git::https://github.com/org/doc.git?ref=v9.9.9"\nEOT\n'
+            'module "a" { source = "git::https://github.com/org/new.git?ref=v1.0.0" }\n'
+        )
+
+        results = scan_sources(temp_dir)
+
+        assert [r.repo for r in results] == ["org/new"]
+
+    def test_scan_sources_parses_each_distinct_source_once(self, temp_dir):
+        """Test that repeated sources reuse one memoized parse."""
+        source = 'module "a" {{ source = "git::https://github.com/org/{name}.git?ref=v1.0.0" }}\n'
+        for env in ("dev", "prod", "stage"):
+            env_dir = Path(temp_dir) / env
+            env_dir.mkdir()
+            (env_dir / "main.tf").write_text(source.format(name="shared") * 2)
+            (env_dir / "other.tf").write_text(source.format(name="other"))
+
+        _parse_source_value.cache_clear()
+        with patch("agronomist.scanner._parse_git_source", wraps=_parse_git_source) as parser:
+            results = scan_sources(temp_dir)
+
+        assert len(results) == 9
+        assert parser.call_count == 2
+        shared = [r for r in results if r.repo == "org/shared"]
+        assert len({id(r.repo_url) for r in shared}) == 1
+        assert {r.file_path for r in shared} == {"dev/main.tf", "prod/main.tf", "stage/main.tf"}
+
+    def test_registering_a_host_refreshes_memoized_repo_keys(self, temp_dir, monkeypatch):
+        """Test that memoized parses follow changes to the case-insensitive hosts."""
+        monkeypatch.setattr(models, "_CASE_INSENSITIVE_HOSTS", models._CASE_INSENSITIVE_HOSTS)
+        Path(temp_dir, "main.tf").write_text(
+            'module "a" { source = "git::https://ghe.corp.example/Org/Repo.git?ref=v1" }\n'
+        )
+
+        before = scan_sources(temp_dir, include=["*.tf"])
+        models.add_case_insensitive_hosts("ghe.corp.example")
+        after = scan_sources(temp_dir, include=["*.tf"])
+
+        assert before[0].repo_key == "ghe.corp.example/Org/Repo"
+        assert after[0].repo_key == "ghe.corp.example/org/repo"
+
+    def test_scan_sources_as_table_matches_list(self, temp_dir):
+        """Test that the columnar result holds the same refs."""
+        infra_dir = Path(temp_dir) / "infra"
+        infra_dir.mkdir()
+        (infra_dir / "main.tf").write_text(
+            'module "a" { source = "git::https://github.com/org/a.git//mod?ref=v1.0.0" }\n'
+            'module "b" { source = "git@gitlab.com:org/b.git?ref=v2.0.0" }\n'
+        )
+
+        table = scan_sources(temp_dir, as_table=True)
+
+        assert isinstance(table, SourceTable)
+        assert list(table) == scan_sources(temp_dir)
+
+    def _make_symlinked_tree(self, temp_dir: str) -> Path:
+        """Create a shared dir linked into two envs, plus a cycle."""
+        root = Path(temp_dir)
+        common = root / "_envcommon"
+        common.mkdir()
+        (common / "vpc.hcl").write_text(
+            'terraform { source = "git::https://github.com/org/vpc.git?ref=v1.0.0" }\n'
+        )
+        (common / "loop").symlink_to(common, target_is_directory=True)
+        for env in ("dev", "prod"):
+            env_dir = root / "live" / env
+            env_dir.mkdir(parents=True)
+            (env_dir / "common").symlink_to(common, target_is_directory=True)
+        return root
+
+    def test_scan_sources_does_not_follow_symlinks_by_default(self, temp_dir):
+        """Test that symlinked directories are not walked by default."""
+        self._make_symlinked_tree(temp_dir)
+
+        results = scan_sources(temp_dir)
+
+        assert [r.file_path for r in results] == ["_envcommon/vpc.hcl"]
+
+    def test_scan_sources_follow_symlinks_parses_each_file_once(self, temp_dir):
+        """Test that linked files are parsed once but reported per path."""
+        self._make_symlinked_tree(temp_dir)
+        stats = ScanStats()
+
+        with patch("agronomist.scanner._scan_file", wraps=_scan_file) as scan_file:
+            results = scan_sources(temp_dir, stats=stats, follow_symlinks=True)
+
+        assert sorted(r.file_path for r in results) == [
+            "_envcommon/vpc.hcl",
+            "live/dev/common/vpc.hcl",
+            "live/prod/common/vpc.hcl",
+        ]
+        assert {r.repo for r in results} == {"org/vpc"}
+        assert scan_file.call_count == 1
+        assert stats.files_scanned == 1
+        assert stats.files_deduplicated == 2
+
+    def test_scan_sources_follow_symlinks_stops_at_cycles(self, temp_dir):
+        """Test that a link back to an ancestor is not descended."""
+        root = self._make_symlinked_tree(temp_dir)
+        (root / "live" / "dev" / "up").symlink_to(root / "live", target_is_directory=True)
+
+        results = scan_sources(temp_dir, follow_symlinks=True)
+
+        assert sorted(r.file_path for r in results) == [
+            "_envcommon/vpc.hcl",
+            "live/dev/common/vpc.hcl",
+            "live/prod/common/vpc.hcl",
+        ]
+
+    def test_scan_sources_git_rev_reads_bare_repository(self, make_git_repo, temp_dir):
+        """Test that a revision is scanned without a worktree."""
+        source = (
+            'module "{name}" {{ source = "git::https://github.com/org/{name}.git?ref=v1.0.0" }}\n'
+        )
+        repo = make_git_repo(
+            {
+                "live/dev/main.tf": source.format(name="vpc"),
+                "live/prod/main.tf": source.format(name="vpc"),
+                "live/prod/eks.tf": source.format(name="eks"),
+                "test/fixture.tf": source.format(name="fixture"),
+                "README.md": source.format(name="readme"),
+            }
+        )
+        bare = Path(temp_dir) / "bare.git"
+        subprocess.run(
+            ["git", "clone", "-q", "--bare", str(repo), str(bare)], check=True, capture_output=True
+        )
+        stats = ScanStats()
+
+        results = scan_sources(str(bare), blacklist_files=["test/**"], stats=stats, git_rev="v1")
+
+        assert [(r.file_path, r.repo) for r in results] == [
+            ("live/dev/main.tf", "org/vpc"),
+            ("live/prod/eks.tf", "org/eks"),
+            ("live/prod/main.tf", "org/vpc"),
+        ]
+        assert stats.files_scanned == 2
+        assert stats.files_deduplicated == 1
+
+    def test_scan_sources_git_rev_in_subdirectory(self, make_git_repo):
+        """Test that a subdirectory root scans its own files, relative to it."""
+        source = 'module "m" {{ source = "git::https://github.com/org/{name}.git?ref=v1" }}\n'
+        repo = make_git_repo(
+            {
+                "infra/live/main.tf": source.format(name="vpc"),
+                "other/live/main.tf": source.format(name="eks"),
+            }
+        )
+
+        results = scan_sources(str(repo / "infra"), git_rev="HEAD")
+
+        assert [(r.file_path, r.repo) for r in results] == [("live/main.tf", "org/vpc")]
+
+    def test_scan_sources_git_rev_unknown_revision(self, make_git_repo):
+        """Test that an unknown revision raises ScanError."""
+        repo = make_git_repo({"main.tf": ""})
+
+        with pytest.raises(ScanError):
+            scan_sources(str(repo), git_rev="no-such-rev")
+
+    def test_scan_sources_git_grep_matches_walk(self, make_git_repo):
+        """Test that the git-grep backend finds what the walker finds."""
+        source = 'module "m" {{ source = "git::https://github.com/org/{name}.git?ref=v1" }}\n'
+        repo = make_git_repo(
+            {
+                "live/main.tf": source.format(name="vpc"),
+                "live/plain.tf": 'module "m" { source = "./local" }\n',
+                "modules/x/terragrunt.hcl": source.format(name="eks"),
+                "test/fixture.tf": source.format(name="fixture"),
+                "docs/example.md": source.format(name="docs"),
+                ".gitignore": "ignored/\n",
+            }
+        )
+        (repo / "live" / "main.tf").write_text(source.format(name="changed"))
+        (repo / "ignored").mkdir()
+        (repo / "ignored" / "main.tf").write_text(source.format(name="ignored"))
+        walk_stats = ScanStats()
+        grep_stats = ScanStats()
+
+        walked = scan_sources(str(repo), exclude=["ignored/**"], stats=walk_stats)
+        grepped = scan_sources(str(repo), stats=grep_stats, backend="git-grep")
+
+        assert sorted(grepped, key=lambda r: r.file_path) == sorted(
+            walked, key=lambda r: r.file_path
+        )
+        assert {r.repo for r in grepped} == {"org/changed", "org/eks", "org/fixture"}
+        assert grep_stats.files_scanned == 3
+        assert walk_stats.files_scanned == 4
+
+    def test_scan_sources_git_grep_keeps_other_index_entries(self, make_git_repo):
+        """Test that a git-grep scan does not drop files it did not list."""
+        source = 'module "m" { source = "git::https://github.com/org/vpc.git?ref=v1" }\n'
+        repo = make_git_repo(
+            {"live/main.tf": source, "live/plain.tf": 'module "m" { source = "./local" }\n'}
+        )
+        past = time.time() - 60
+        for name in ("main.tf", "plain.tf"):
+            os.utime(repo / "live" / name, (past, past))
+        index = ScanIndex(str(repo / ".agronomist" / "scan-index"))
+        scan_sources(str(repo), index=index)
+        assert len(index) == 2
+
+        scan_sources(str(repo), index=index, backend="git-grep")
+        stats = ScanStats()
+        scan_sources(str(repo), index=index, stats=stats)
+
+        assert len(index) == 2
+        assert (stats.files_cached, stats.files_scanned) == (2, 0)
+
+    def test_scan_sources_git_grep_falls_back_for_untracked_files(self, make_git_repo):
+        """Test that untracked candidates make the scan walk the tree."""
+        repo = make_git_repo({"main.tf": ""})
+        (repo / "live").mkdir()
+        (repo / "live" / "new.tf").write_text(
+            'module "m" { source = "git::https://github.com/org/new.git?ref=v1" }\n'
+        )
+
+        results = scan_sources(str(repo), backend="git-grep")
+
+        assert [r.repo for r in results] == ["org/new"]
+
+    def test_scan_sources_git_grep_falls_back_outside_git(self, temp_dir):
+        """Test that a directory outside Git is walked."""
+        (Path(temp_dir) / "live").mkdir()
+        (Path(temp_dir) / "live" / "main.tf").write_text(
+            'module "m" { source = "git::https://github.com/org/a.git?ref=v1" }\n'
+        )
+
+        with patch("agronomist.scanner.untracked_paths", side_effect=ScanError("no git")):
+            results = scan_sources(temp_dir, backend="git-grep")
+
+        assert [r.repo for r in results] == ["org/a"]
+
+    def test_scan_sources_reads_tar_archive(self, temp_dir):
+        """Test that members of a tarball are filtered and scanned."""
+        source = 'module "m" {{ source = "git::https://github.com/org/{name}.git?ref=v1" }}\n'
+        members = {
+            "./live/main.tf": source.format(name="vpc"),
+            "./live/main.tf.bak": source.format(name="backup"),
+            "./test/fixture.tf": source.format(name="fixture"),
+            "./.terraform/modules/x/main.tf": source.format(name="cached"),
+            "modules/eks/terragrunt.hcl": source.format(name="eks"),
+            "../escape/main.tf": source.format(name="escape"),
+        }
+        bundle = Path(temp_dir) / "bundle.tar.gz"
+        with tarfile.open(bundle, "w:gz") as archive:
+            for name, content in members.items():
+                data = content.encode()
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        stats = ScanStats()
+
+        results = scan_sources(str(bundle), exclude=["test/**"], stats=stats)
+
+        assert [(r.file_path, r.repo, r.line) for r in results] == [
+            ("live/main.tf", "org/vpc", 1),
+            ("modules/eks/terragrunt.hcl", "org/eks", 1),
+        ]
+        assert stats.files_scanned == 2
+
+    def test_scan_sources_reads_zip_archive_files_subset(self, temp_dir):
+        """Test that *files* selects archive members by name."""
+        source = 'module "m" {{ source = "git::https://github.com/org/{name}.git?ref=v1" }}\n'
+        bundle = Path(temp_dir) / "bundle.zip"
+        with zipfile.ZipFile(bundle, "w") as archive:
+            archive.writestr("a/main.tf", source.format(name="a"))
+            archive.writestr("b/main.tf", source.format(name="b"))
+
+        results = scan_sources(str(bundle), files=["b/main.tf"], as_table=True)
+
+        assert [r.repo for r in results] == ["org/b"]
@@ -0,0 +1,228 @@
+"""Tests for the in-process git smart HTTP (protocol v2) tag lister."""
+
+from __future__ import annotations
+
+import functools
+import os
+import socket
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agronomist.circuit import CircuitBreaker
+from agronomist.exceptions import NetworkError, ResolverError
+from agronomist.git import GitClient
+from agronomist.smarthttp import (
+    SmartHttpClient,
+    iter_pkt_lines,
+    latest_version_tag,
+    pkt_line,
+    version_sorted_tags,
+    versioncmp,
+)
+
+TAGS = [
+    "v1.0.0",
+    "v1.9.0",
+    "v1.10.0",
+    "v1.10.0-rc1",
+    "v1.10.0-rc10",
+    "v1.10.0-rc2",
+    "v01.2",
+    "v1.02",
+    "release-2024.01.05",
+]
+
+
+class _GitHttpBackend(BaseHTTPRequestHandler):
+    """Serves repositories through ``git http-backend`` (CGI)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._run_backend()
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._run_backend()
+
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        pass
+
+    def _run_backend(self) -> None:
+        self.server.clients.add(self.client_address)
+        path, _, query = self.path.partition("?")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        env = {
+            "PATH": os.environ["PATH"],
+            "GIT_PROJECT_ROOT": self.server.root,
+            "GIT_HTTP_EXPORT_ALL": "1",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "REQUEST_METHOD": self.command,
+            "CONTENT_TYPE": self.headers.get("Content-Type", ""),
+            "CONTENT_LENGTH": str(len(body)),
+            "GIT_PROTOCOL": self.headers.get("Git-Protocol", ""),
+        }
+        output = subprocess.run(
+            ["git", "http-backend"], input=body, env=env, capture_output=True, check=True
+        ).stdout
+        head, _, payload = output.partition(b"\r\n\r\n")
+        status = 200
+        headers = []
+        for line in head.decode().split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.lower() == "status":
+                status = int(value.split()[0])
+            else:
+                headers.append((name, value.strip()))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def _git(*args: str) -> None:
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+
+def _repo_with_tags(path, tags: list[str]) -> None:
+    _git("init", "-q", str(path))
+    _git("-C", str(path), "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q",
+         "--allow-empty", "-m", "init")  # fmt: skip
+    for tag in tags:
+        _git("-C", str(path), "tag", tag)
+
+
+@pytest.fixture
+def git_server(tmp_path):
+    """Serve two repositories with tags and many branches over HTTP."""
+    work = tmp_path / "work"
+    _repo_with_tags(work, TAGS)
+    for i in range(50):
+        _git("-C", str(work), "branch", f"feature/v9.{i}")
+    served = tmp_path / "served"
+    _git("clone", "-q", "--bare", str(work), str(served / "modules.git"))
+    _git("init", "-q", "--bare", str(served / "empty.git"))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GitHttpBackend)
+    server.root = str(served)
+    server.clients = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestVersionSort:
+    def test_matches_git_version_sort(self, tmp_path):
+        names = ["x9", "x09", "x009", "x0", "1.0.0", "1.0.0.0", "1.0.0a", "b1", "b01", "b10"]
+        repo = tmp_path / "repo"
+        _repo_with_tags(repo, names + TAGS)
+        listed = subprocess.run(
+            ["git", "ls-remote", "--tags", "--sort=-v:refname", str(repo)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        expected = [line.split("\trefs/tags/")[1] for line in listed.splitlines()]
+
+        ordered = sorted(names + TAGS, key=functools.cmp_to_key(versioncmp), reverse=True)
+
+        assert ordered == expected
+
+    def test_latest_version_tag_ignores_other_refs(self):
+        refs = ["refs/heads/v9", "refs/tags/v1.2^{}", "refs/tags/v1.2", "refs/tags/v1.10"]
+        assert latest_version_tag(refs) == "v1.10"
+        assert latest_version_tag(["refs/heads/main"]) is None
+
+    def test_version_sorted_tags_orders_like_ls_remote(self):
+        refs = ["refs/tags/v1.9", "refs/tags/v1.10", "refs/tags/v1.10^{}", "refs/heads/main"]
+        assert version_sorted_tags(refs) == ["v1.10", "v1.9"]
+        assert version_sorted_tags(["refs/heads/main"]) == []
+
+
+class TestPktLine:
+    def test_round_trip(self):
+        stream = pkt_line(b"version 2\n") + b"0000" + pkt_line(b"ls-refs\n") + b"0001"
+        assert list(iter_pkt_lines(stream)) == [b"version 2", None, b"ls-refs", None]
+
+    def test_truncated_stream_raises(self):
+        with pytest.raises(ResolverError, match="Truncated"):
+            list(iter_pkt_lines(b"0010abc"))
+
+
+class TestSmartHttpClient:
+    def test_latest_ref_matches_git_ls_remote(self, git_server):
+        url = f"{git_server.url}/modules.git"
+        client = SmartHttpClient(timeout=5)
+
+        assert client.latest_ref(url) == GitClient(timeout=5).latest_ref(url) == "v1.10.0-rc10"
+
+    def test_list_tags_matches_git_ls_remote(self, git_server):
+        url = f"{git_server.url}/modules.git"
+
+        assert SmartHttpClient(timeout=5).list_tags(url) == GitClient(timeout=5).list_tags(url)
+
+    def test_lists_only_tags(self, git_server):
+        refs = SmartHttpClient(timeout=5).list_refs(f"{git_server.url}/modules.git")
+
+        assert sorted(refs) == sorted(f"refs/tags/{tag}" for tag in TAGS)
+
+    def test_repository_without_tags(self, git_server):
+        assert SmartHttpClient(timeout=5).latest_ref(f"{git_server.url}/empty.git") is None
+
+    def test_connection_is_reused_across_repositories(self, git_server):
+        client = SmartHttpClient(timeout=5)
+        for _ in range(3):
+            client.latest_ref(f"{git_server.url}/modules.git")
+            client.latest_ref(f"{git_server.url}/empty.git")
+
+        assert len(git_server.clients) == 1
+
+    def test_missing_repository_raises(self, git_server):
+        with pytest.raises(ResolverError, match="not found"):
+            SmartHttpClient(timeout=5).latest_ref(f"{git_server.url}/missing.git")
+
+    def test_supports_only_http_urls(self):
+        assert SmartHttpClient.supports("https://github.com/org/repo.git")
+        assert not SmartHttpClient.supports("ssh://git@github.com/org/repo.git")
+        assert not SmartHttpClient.supports("/srv/git/repo.git")
+
+
+class TestGitClientHttp:
+    def test_git_client_uses_http_lister(self, git_server):
+        client = GitClient(timeout=5, http=SmartHttpClient(timeout=5))
+
+        assert client.latest_ref(f"{git_server.url}/modules.git") == "v1.10.0-rc10"
+
+    def test_git_client_falls_back_to_ls_remote(self, tmp_path):
+        repo = tmp_path / "repo"
+        _repo_with_tags(repo, ["v3.0.0"])
+        http = MagicMock()
+        http.supports.return_value = True
+        http.latest_ref.side_effect = ResolverError("not a smart HTTP remote")
+
+        assert GitClient(timeout=5, http=http).latest_ref(str(repo)) == "v3.0.0"
+        http.latest_ref.assert_called_once_with(str(repo))
+
+    def test_unreachable_host_does_not_fall_back(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        breaker = CircuitBreaker(threshold=2)
+        http = SmartHttpClient(timeout=5, retries=0, breaker=breaker)
+        client = GitClient(timeout=5, http=http, breaker=breaker)
+
+        with patch("agronomist.git.subprocess.run") as run:
+            with pytest.raises(NetworkError, match="cannot reach"):
+                client.latest_ref(f"http://127.0.0.1:{port}/modules.git")
+
+        run.assert_not_called()
+        assert not breaker.is_open("127.0.0.1")
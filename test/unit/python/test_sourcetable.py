@@ -0,0 +1,101 @@
+"""Tests for sourcetable module."""
+
+import pytest
+
+from agronomist.models import SourceRef
+from agronomist.sourcetable import SourceTable
+
+
+def _ref(file_path: str, repo: str, ref: str = "v1.0.0", module: str | None = None) -> SourceRef:
+    """Build a SourceRef for *repo* referenced from *file_path*."""
+    raw = f"git::https://github.com/{repo}.git?ref={ref}"
+    return SourceRef(
+        file_path=file_path,
+        raw=raw,
+        repo=repo,
+        repo_url=f"https://github.com/{repo}",
+        repo_host="github.com",
+        ref=ref,
+        module=module,
+        line=3,
+        column=5,
+    )
+
+
+class TestSourceTable:
+    """Test the columnar SourceRef collection."""
+
+    def test_round_trips_refs_in_order(self):
+        """Test that iteration yields the appended refs unchanged."""
+        refs = [
+            _ref("a/main.tf", "org/vpc", module="modules/x"),
+            _ref("b/main.tf", "org/vpc"),
+            _ref("b/main.tf", "org/eks", ref="v2.0.0"),
+        ]
+        table = SourceTable(refs)
+
+        assert len(table) == 3
+        assert list(table) == refs
+        assert table[-1] == refs[-1]
+
+    def test_preserves_missing_optional_fields(self):
+        """Test that None module, line and column survive storage."""
+        ref = SourceRef(
+            file_path="main.tf",
+            raw="git::https://github.com/org/x.git?ref=v1",
+            repo="org/x",
+            repo_url="https://github.com/org/x",
+            repo_host="github.com",
+            ref="v1",
+        )
+        table = SourceTable()
+        table.append(ref)
+
+        assert table[0] == ref
+        assert table[0].module is None
+        assert table[0].line is None
+
+    def test_stores_each_distinct_string_once(self):
+        """Test that repeated values share one string-table entry."""
+        table = SourceTable(_ref(f"env{i}/main.tf", "org/vpc") for i in range(100))
+
+        assert len(table) == 100
+        # 100 file paths plus raw, repo, url, host, ref and repo key.
+        assert len(table._strings) == 106
+
+    def test_out_of_range_row_raises(self):
+        """Test that indexing past the end raises IndexError."""
+        with pytest.raises(IndexError):
+            SourceTable()[0]
+
+    def test_first_by_repo_returns_first_occurrence(self):
+        """Test that each repository maps to its first row."""
+        table = SourceTable(
+            [
+                _ref("a.tf", "org/vpc"),
+                _ref("b.tf", "org/eks"),
+                _ref("c.tf", "org/vpc", ref="v0.9.0"),
+            ]
+        )
+
+        first = table.first_by_repo()
+
+        assert list(first) == ["github.com/org/vpc", "github.com/org/eks"]
+        assert first["github.com/org/vpc"].file_path == "a.tf"
+
+    def test_first_by_repo_keeps_hosts_apart(self):
+        """Test that the same path on two hosts is two repositories."""
+        other = SourceRef(
+            file_path="d.tf",
+            raw="git::https://gitlab.internal/org/vpc.git?ref=v3",
+            repo="org/vpc",
+            repo_url="https://gitlab.internal/org/vpc",
+            repo_host="gitlab.internal",
+            ref="v3",
+        )
+        table = SourceTable([_ref("a.tf", "org/vpc"), other, _ref("c.tf", "Org/VPC")])
+
+        first = table.first_by_repo()
+
+        assert list(first) == ["github.com/org/vpc", "gitlab.internal/org/vpc"]
+        assert first["gitlab.internal/org/vpc"] == other
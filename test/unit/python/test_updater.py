@@ -171,6 +171,19 @@ class TestApplyUpdates:
             result_files = apply_updates(temp_dir, updates)
             assert result_files == []
 
+    def test_apply_updates_skips_non_utf8_files(self):
+        """Test that files with invalid UTF-8 are skipped, not fatal."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            (Path(temp_dir) / "main.tf").write_bytes(b"# caf\xe9\nref=v1.0.0\n")
+            updates = [
+                _mk_update(
+                    files=["main.tf"],
+                    replacements=[("ref=v1.0.0", "ref=v2.0.0")],
+                )
+            ]
+
+            assert apply_updates(temp_dir, updates) == []
+
     def test_apply_updates_path_traversal_blocked(self):
         """Test that path traversal attempts are blocked."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -0,0 +1,166 @@
+"""Tests for watch module."""
+
+import os
+import struct
+import sys
+import threading
+
+import pytest
+
+from agronomist.models import SourceRef
+from agronomist.watch import (
+    IN_CLOSE_WRITE,
+    IN_ISDIR,
+    TreeWatcher,
+    WatchState,
+    expand_changed,
+    parse_events,
+)
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+)
+
+
+def _ref(file_path: str, repo: str = "org/repo") -> SourceRef:
+    """Build a minimal SourceRef."""
+    return SourceRef(
+        file_path=file_path,
+        raw=f"git::https://github.com/{repo}.git?ref=v1",
+        repo=repo,
+        repo_url=f"https://github.com/{repo}.git",
+        repo_host="github.com",
+        ref="v1",
+        module=None,
+    )
+
+
+def _write(path: str, content: str = "x") -> None:
+    """Create parent directories and write *content* to *path*."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+
+
+class TestParseEvents:
+    """Test decoding of raw inotify records."""
+
+    def test_parse_events_reads_padded_names(self):
+        """Test that names are stripped of NUL padding."""
+        data = struct.pack("iIII", 1, IN_CLOSE_WRITE, 0, 16) + b"main.tf".ljust(16, b"\0")
+        data += struct.pack("iIII", 2, IN_ISDIR, 0, 0)
+
+        events = parse_events(data)
+
+        assert [(e.wd, e.mask, e.name) for e in events] == [
+            (1, IN_CLOSE_WRITE, "main.tf"),
+            (2, IN_ISDIR, ""),
+        ]
+
+
+@linux_only
+class TestTreeWatcher:
+    """Test recursive inotify watching on a real directory."""
+
+    def test_wait_times_out_without_events(self, temp_dir):
+        """Test that an idle tree yields an empty set."""
+        watcher = TreeWatcher(temp_dir)
+        try:
+            assert watcher.wait(0.01, timeout=0.01) == set()
+        finally:
+            watcher.close()
+
+    def test_burst_of_writes_is_one_batch(self, temp_dir):
+        """Test that repeated saves are debounced into one batch."""
+        _write(os.path.join(temp_dir, "live", "main.tf"))
+        watcher = TreeWatcher(temp_dir)
+        try:
+            for content in ("a", "b", "c"):
+                _write(os.path.join(temp_dir, "live", "main.tf"), content)
+            _write(os.path.join(temp_dir, "root.tf"))
+
+            assert watcher.wait(0.05, timeout=1) == {os.path.join("live", "main.tf"), "root.tf"}
+            assert watcher.wait(0.01, timeout=0.01) == set()
+        finally:
+            watcher.close()
+
+    def test_new_directories_are_watched(self, temp_dir):
+        """Test that files in directories created later are seen."""
+        watcher = TreeWatcher(temp_dir)
+        try:
+            os.makedirs(os.path.join(temp_dir, "new", "deep"))
+            assert watcher.wait(0.05, timeout=1) == {"new"}
+
+            _write(os.path.join(temp_dir, "new", "deep", "main.tf"))
+            assert watcher.wait(0.05, timeout=1) == {os.path.join("new", "deep", "main.tf")}
+        finally:
+            watcher.close()
+
+    def test_pruned_directories_are_not_watched(self, temp_dir):
+        """Test that changes below pruned directories are ignored."""
+        _write(os.path.join(temp_dir, ".terraform", "main.tf"))
+        watcher = TreeWatcher(temp_dir, frozenset({".terraform"}))
+        try:
+            _write(os.path.join(temp_dir, ".terraform", "main.tf"), "changed")
+            assert watcher.wait(0.05, timeout=0.1) == set()
+        finally:
+            watcher.close()
+
+    def test_moved_directory_is_reported_and_forgotten(self, temp_dir):
+        """Test that moving a directory away reports its path."""
+        _write(os.path.join(temp_dir, "old", "main.tf"))
+        watcher = TreeWatcher(temp_dir)
+        try:
+            os.rename(os.path.join(temp_dir, "old"), os.path.join(temp_dir, "new"))
+            assert watcher.wait(0.05, timeout=1) == {"old", "new"}
+
+            _write(os.path.join(temp_dir, "new", "main.tf"), "changed")
+            assert watcher.wait(0.05, timeout=1) == {os.path.join("new", "main.tf")}
+        finally:
+            watcher.close()
+
+    def test_wait_blocks_until_another_thread_writes(self, temp_dir):
+        """Test that wait returns once a change arrives."""
+        watcher = TreeWatcher(temp_dir)
+        timer = threading.Timer(0.05, _write, [os.path.join(temp_dir, "late.tf")])
+        timer.start()
+        try:
+            assert watcher.wait(0.02, timeout=2) == {"late.tf"}
+        finally:
+            timer.join()
+            watcher.close()
+
+
+class TestWatchState:
+    """Test the in-memory refs kept between rescans."""
+
+    def test_discard_drops_files_and_directories(self):
+        """Test that directory paths drop every file below them."""
+        state = WatchState(
+            [_ref("a/main.tf"), _ref("a/main.tf", "org/b"), _ref("ab/main.tf"), _ref("c.tf")]
+        )
+
+        assert state.discard(["a", "c.tf", "missing.tf"]) == 2
+        assert [r.file_path for r in state] == ["ab/main.tf"]
+        assert len(state) == 1
+
+    def test_add_replaces_in_path_order(self):
+        """Test that refs are yielded grouped by file path."""
+        state = WatchState([_ref("b.tf")])
+        state.add([_ref("a.tf")])
+
+        assert [r.file_path for r in state] == ["a.tf", "b.tf"]
+
+
+class TestExpandChanged:
+    """Test turning changed paths into files to re-parse."""
+
+    def test_expand_changed_walks_directories(self, temp_dir):
+        """Test that directories expand and missing paths vanish."""
+        _write(os.path.join(temp_dir, "mod", "main.tf"))
+        _write(os.path.join(temp_dir, "mod", ".terraform", "x.tf"))
+        _write(os.path.join(temp_dir, "top.tf"))
+
+        result = expand_changed(temp_dir, {"mod", "top.tf", "gone.tf"}, frozenset({".terraform"}))
+
+        assert result == [os.path.join("mod", "main.tf"), "top.tf"]